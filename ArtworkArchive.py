@@ -0,0 +1,319 @@
+import argparse
+import os
+import secrets
+import shutil
+import sqlite3
+import threading
+import time
+import traceback
+from datetime import datetime
+import Metrics
+
+# ====== Sharded Artwork Archive ======
+# 原本所有 300 dpi PNG 都放在 GeneratedImages/ 同一層，檔名只精確到秒（快速循環時會互相覆寫），
+# 觀眾每次找最新作品都要 listdir + stat 整個資料夾。這裡改成：
+#   GeneratedImages/2025/01/01/generated_exhibition_20250101_120000_123456_a1b2c3.png
+#   GeneratedImages/manifest.sqlite   每件作品的路徑、大小、建立時間、狀態、策展論述紀錄的 seq
+#                                     （論述本文只存在 logs/exhibition_statement，見 ExhibitionLog.py）
+#   GeneratedImages/LATEST            最新作品的相對路徑（原子 rename，ArtworkWatcher 監看這個檔案）
+# 檔名含微秒與隨機字尾，不會碰撞；檔名（basename）仍是 log / 回饋紀錄中的作品 key。
+#
+# 保留政策（GEMINI_ARCHIVE_MAX_MB / GEMINI_ARCHIVE_MAX_DAYS，0 = 不限制）：超過容量或天數時，
+# 從最舊的作品開始只留下縮圖（cold，最長邊 THUMBNAIL_EDGE 的 JPEG）或直接刪除，最新作品永遠保留。
+# register() 只在背景執行緒排程保留政策，產生縮圖與刪檔不會佔用展示執行緒。
+#
+#   python ArtworkArchive.py status
+#   python ArtworkArchive.py migrate                    # 把舊的平面檔案搬進日期分層並登錄
+#   python ArtworkArchive.py retention --max-mb 2048 --max-days 90
+
+ARCHIVE_DIR = "GeneratedImages"
+MANIFEST_NAME = "manifest.sqlite"
+LATEST_POINTER = "LATEST"
+FILENAME_PREFIX = "generated_exhibition_"
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+MAX_BYTES = int(float(os.environ.get("GEMINI_ARCHIVE_MAX_MB", "0")) * 1024 * 1024)
+MAX_DAYS = float(os.environ.get("GEMINI_ARCHIVE_MAX_DAYS", "0"))
+# 設為 0 時超出保留政策的作品直接刪除，不留縮圖
+COLD_THUMBNAILS = os.environ.get("GEMINI_ARCHIVE_COLD_THUMBNAILS", "1") != "0"
+THUMBNAIL_EDGE = int(os.environ.get("GEMINI_ARCHIVE_THUMBNAIL_EDGE", "512"))
+
+HOT, COLD, DELETED = "hot", "cold", "deleted"
+
+
+def new_artwork_id(now=None):
+    now = now or datetime.now()
+    return f"{FILENAME_PREFIX}{now.strftime('%Y%m%d_%H%M%S_%f')}_{secrets.token_hex(3)}"
+
+
+def shard_for(created):
+    return datetime.fromtimestamp(created).strftime(os.path.join("%Y", "%m", "%d"))
+
+
+def read_latest(folder=ARCHIVE_DIR):
+    """讀 LATEST 指標（不開資料庫、不掃描資料夾）；還沒有任何作品時回傳 None。"""
+    try:
+        with open(os.path.join(folder, LATEST_POINTER), "r", encoding="utf-8") as f:
+            relative = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return os.path.join(folder, relative) if relative else None
+
+
+class ArtworkArchive:
+    def __init__(self, folder=ARCHIVE_DIR):
+        self.folder = folder
+        self._lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(folder, MANIFEST_NAME), timeout=30, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS artworks ("
+            "id TEXT PRIMARY KEY, path TEXT, created REAL, bytes INTEGER, state TEXT, "
+            "thumbnail TEXT, thumbnail_bytes INTEGER, statement_seq INTEGER)"
+        )
+        # 舊的 manifest 存的是論述本文（statement 欄），補上 statement_seq 欄
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(artworks)")}
+        if "statement_seq" not in columns:
+            self.db.execute("ALTER TABLE artworks ADD COLUMN statement_seq INTEGER")
+        self.db.execute("CREATE INDEX IF NOT EXISTS artworks_state_created ON artworks (state, created)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.db.commit()
+        self._retention = None
+        self._retention_pending = False
+        self._retention_lock = threading.Lock()
+
+    # ---------- 寫入 ----------
+    def new_path(self, extension=".png"):
+        """配置一個新作品的路徑（建立當天的分層資料夾），存檔後再呼叫 register()。"""
+        now = datetime.now()
+        shard = os.path.join(self.folder, shard_for(now.timestamp()))
+        os.makedirs(shard, exist_ok=True)
+        return os.path.join(shard, new_artwork_id(now) + extension)
+
+    def register(self, path, statement_seq=None, created=None):
+        """登錄已存好的作品並更新最新指標；有設定保留政策時在背景執行。"""
+        artwork_id = os.path.splitext(os.path.basename(path))[0]
+        relative = os.path.relpath(path, self.folder)
+        created = created or os.path.getmtime(path)
+        with self._lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO artworks (id, path, created, bytes, state, statement_seq) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (artwork_id, relative, created, os.path.getsize(path), HOT, statement_seq)
+            )
+            latest = self._meta("latest_created")
+            if latest is None or created >= float(latest):
+                self._set_meta("latest", relative)
+                self._set_meta("latest_created", repr(created))
+                self._publish_latest(relative)
+            self.db.commit()
+        if MAX_BYTES or MAX_DAYS:
+            self.schedule_retention()
+        return artwork_id
+
+    def set_statement_seq(self, path, statement_seq):
+        """作品的策展論述寫入 ExhibitionLog 後，記下該筆紀錄的 seq。"""
+        artwork_id = os.path.splitext(os.path.basename(path))[0]
+        with self._lock:
+            self.db.execute("UPDATE artworks SET statement_seq = ? WHERE id = ?", (statement_seq, artwork_id))
+            self.db.commit()
+
+    def _meta(self, key):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    def _publish_latest(self, relative):
+        # 先寫暫存檔再 rename：讀取端不會看到寫到一半的內容，inotify 收到 IN_MOVED_TO
+        tmp = os.path.join(self.folder, f".{LATEST_POINTER}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(relative)
+        os.replace(tmp, os.path.join(self.folder, LATEST_POINTER))
+
+    # ---------- 查詢 ----------
+    def latest(self):
+        with self._lock:
+            relative = self._meta("latest")
+        return os.path.join(self.folder, relative) if relative else None
+
+    def get(self, artwork_id):
+        with self._lock:
+            row = self.db.execute(
+                "SELECT id, path, created, bytes, state, thumbnail, thumbnail_bytes, statement_seq "
+                "FROM artworks WHERE id = ?", (artwork_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ("id", "path", "created", "bytes", "state", "thumbnail", "thumbnail_bytes", "statement_seq")
+        return dict(zip(keys, row))
+
+    def __len__(self):
+        with self._lock:
+            return self.db.execute("SELECT COUNT(*) FROM artworks WHERE state != ?", (DELETED,)).fetchone()[0]
+
+    def usage(self):
+        """{state: (件數, 佔用位元組)}"""
+        with self._lock:
+            rows = self.db.execute(
+                "SELECT state, COUNT(*), COALESCE(SUM(CASE WHEN state = ? THEN bytes ELSE thumbnail_bytes END), 0) "
+                "FROM artworks GROUP BY state", (HOT,)
+            ).fetchall()
+        return {state: (count, size or 0) for state, count, size in rows}
+
+    # ---------- 保留政策 ----------
+    def schedule_retention(self):
+        # 同一時間只有一個背景執行緒；執行中又有新作品登錄時，它做完這一輪會再跑一輪
+        with self._retention_lock:
+            self._retention_pending = True
+            if self._retention is not None:
+                return
+            self._retention = threading.Thread(target=self._retain, name="ArchiveRetention", daemon=True)
+            self._retention.start()
+
+    def _retain(self):
+        while True:
+            with self._retention_lock:
+                if not self._retention_pending:
+                    self._retention = None
+                    return
+                self._retention_pending = False
+            try:
+                self.enforce_retention()
+            except Exception:
+                traceback.print_exc()
+
+    def wait_for_retention(self, timeout=None):
+        """等待背景的保留政策跑完（CLI 與測試用）。"""
+        with self._retention_lock:
+            thread = self._retention
+        if thread is not None:
+            thread.join(timeout)
+
+    def enforce_retention(self, max_bytes=None, max_days=None, cold_thumbnails=None):
+        max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+        max_days = MAX_DAYS if max_days is None else max_days
+        cold_thumbnails = COLD_THUMBNAILS if cold_thumbnails is None else cold_thumbnails
+        if not max_bytes and not max_days:
+            return 0
+        cutoff = time.time() - max_days * 86400 if max_days else None
+        with Metrics.stage("archive_retention") as fields:
+            with self._lock:
+                usage, expired = self._expired(max_bytes, cutoff)
+            # 產生縮圖、刪檔時不持有 manifest 的鎖，register() 不必等待；最新作品不在 expired 中
+            done = [(artwork_id, *self._expire(relative, cold_thumbnails)) for artwork_id, relative in expired]
+            with self._lock:
+                for artwork_id, thumbnail, thumbnail_bytes in done:
+                    self.db.execute(
+                        "UPDATE artworks SET state = ?, thumbnail = ?, thumbnail_bytes = ? WHERE id = ?",
+                        (COLD if thumbnail else DELETED, thumbnail, thumbnail_bytes, artwork_id)
+                    )
+                    usage += thumbnail_bytes
+                self.db.commit()
+            fields["expired"] = len(expired)
+            fields["bytes"] = usage
+        return len(expired)
+
+    def _expired(self, max_bytes, cutoff):
+        usage = self.db.execute(
+            "SELECT COALESCE(SUM(CASE WHEN state = ? THEN bytes ELSE thumbnail_bytes END), 0) "
+            "FROM artworks WHERE state != ?", (HOT, DELETED)
+        ).fetchone()[0]
+        latest = self._meta("latest")
+        # (state, created) 索引：由舊到新，遇到第一件未超限的作品就停止
+        candidates = self.db.execute(
+            "SELECT id, path, created, bytes FROM artworks WHERE state = ? ORDER BY created", (HOT,)
+        )
+        expired = []
+        for artwork_id, relative, created, size in candidates:
+            over_size = max_bytes and usage > max_bytes
+            too_old = cutoff is not None and created < cutoff
+            if relative == latest or not (over_size or too_old):
+                break
+            expired.append((artwork_id, relative))
+            usage -= size
+        return usage, expired
+
+    def _expire(self, relative, cold_thumbnails):
+        path = os.path.join(self.folder, relative)
+        thumbnail = None
+        thumbnail_bytes = 0
+        if cold_thumbnails and os.path.exists(path):
+            thumbnail = os.path.splitext(relative)[0] + ".thumb.jpg"
+            thumbnail_bytes = make_thumbnail(path, os.path.join(self.folder, thumbnail))
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        return thumbnail, thumbnail_bytes
+
+    # ---------- 舊資料夾遷移 ----------
+    def migrate(self):
+        """把 GeneratedImages/ 最上層的舊作品依 mtime 搬進日期分層並登錄，回傳搬移件數。"""
+        legacy = sorted(
+            (entry for entry in os.scandir(self.folder)
+             if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS)),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        for entry in legacy:
+            created = entry.stat().st_mtime
+            shard = os.path.join(self.folder, shard_for(created))
+            os.makedirs(shard, exist_ok=True)
+            # 檔名不變（log 與觀眾回饋都以檔名當 key）
+            target = os.path.join(shard, entry.name)
+            shutil.move(entry.path, target)
+            self.register(target, created=created)
+        return len(legacy)
+
+
+def make_thumbnail(path, thumbnail_path, edge=None):
+    from PIL import Image
+    edge = edge or THUMBNAIL_EDGE
+    with Image.open(path) as image:
+        image = image.convert("RGB")
+        image.thumbnail((edge, edge), Image.LANCZOS)
+        image.save(thumbnail_path, "JPEG", quality=85)
+    return os.path.getsize(thumbnail_path)
+
+
+_archives = {}
+_archives_lock = threading.Lock()
+
+
+def get_archive(folder=ARCHIVE_DIR):
+    key = os.path.abspath(folder)
+    with _archives_lock:
+        archive = _archives.get(key)
+        if archive is None:
+            archive = _archives[key] = ArtworkArchive(folder)
+        return archive
+
+
+# ====== CLI ======
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and maintain the sharded artwork archive.")
+    parser.add_argument("--folder", default=ARCHIVE_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="show counts, disk usage and the latest artwork")
+    sub.add_parser("migrate", help="move legacy flat images into date shards and register them")
+    retention = sub.add_parser("retention", help="apply the size/age retention policy now")
+    retention.add_argument("--max-mb", type=float, default=MAX_BYTES / 1024 / 1024, help="0 = no size limit")
+    retention.add_argument("--max-days", type=float, default=MAX_DAYS, help="0 = no age limit")
+    retention.add_argument("--delete", action="store_true", help="delete expired artworks instead of keeping thumbnails")
+    args = parser.parse_args()
+
+    archive = get_archive(args.folder)
+    if args.command == "migrate":
+        print(f"📦 已搬移並登錄 {archive.migrate()} 件舊作品")
+        archive.wait_for_retention()
+    elif args.command == "retention":
+        expired = archive.enforce_retention(int(args.max_mb * 1024 * 1024), args.max_days, not args.delete)
+        print(f"🧹 {expired} 件作品已轉為{'刪除' if args.delete else '縮圖'}")
+    for state, (count, size) in sorted(archive.usage().items()):
+        print(f"   {state:<8} {count:>7} 件  {size / 1024 / 1024:10.1f} MB")
+    print(f"🖼️ 最新作品：{archive.latest()}")
+
+
+if __name__ == "__main__":
+    main()
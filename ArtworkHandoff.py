@@ -0,0 +1,165 @@
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from PIL import Image
+
+# ====== Shared-memory Artwork Handoff ======
+# 策展人把剛完成的展覽畫面（未壓縮的像素）寫進一個記憶體映射的環狀緩衝區，
+# 觀眾直接映射讀取，不必再從磁碟讀入並解碼 300 dpi 的 PNG；磁碟 PNG 只作為典藏。
+#
+# 檔案配置（little-endian）：
+#   [全域標頭 64 bytes] magic, version, slots, slot_bytes, latest_seq
+#   [slot 0][slot 1]...，每個 slot = 256 bytes 標頭 (seq, width, height, mode, data_len, image name, key) + 像素
+#   key 是典藏 PNG 的 sha256（UploadCache.bytes_key，與磁碟檔案的 file_key 相同），觀眾從 handoff 或磁碟讀取同一件作品時用同一個快取 key
+# 寫入時先把 slot 的 seq 清為 0、寫完像素後才填入 seq 並更新 latest_seq；
+# 讀取端在使用完像素後再比對一次 seq，被覆寫就放棄（seqlock）。
+# 版面（slot 數或大小）不同時不會就地截斷舊檔（讀取端正映射著它，縮小會讓讀取端 SIGBUS），
+# 而是建立新檔後 rename 取代；讀取端發現 inode 改變就改映射新檔，舊的映射在 frame 用完後才釋放。
+
+MAGIC = b"GART"
+VERSION = 2
+GLOBAL_HEADER = struct.Struct("<4sIIQQ")
+GLOBAL_SIZE = 64
+SLOT_HEADER = struct.Struct("<QII8sQ120s32s")
+SLOT_HEADER_SIZE = 256
+LATEST_SEQ_OFFSET = struct.calcsize("<4sIIQ")
+
+DEFAULT_SLOTS = 3
+DEFAULT_SLOT_BYTES = 4600 * 2500 * 4   # 15x8 吋 @ 300 dpi 的 RGBA 畫面
+
+
+def default_path():
+    folder = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(folder, "gemini_artwork.ring")
+
+
+class HandoffWriter:
+    def __init__(self, path=None, slots=DEFAULT_SLOTS, slot_bytes=DEFAULT_SLOT_BYTES):
+        self.path = path or default_path()
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self._lock = threading.Lock()
+        total = GLOBAL_SIZE + slots * (SLOT_HEADER_SIZE + slot_bytes)
+        reuse = False
+        if os.path.exists(self.path) and os.path.getsize(self.path) == total:
+            with open(self.path, "rb") as f:
+                magic, version, old_slots, old_bytes, _ = GLOBAL_HEADER.unpack(f.read(GLOBAL_HEADER.size))
+            reuse = (magic, version, old_slots, old_bytes) == (MAGIC, VERSION, slots, slot_bytes)
+        if reuse:
+            self._file = open(self.path, "r+b")
+            self.mm = mmap.mmap(self._file.fileno(), total)
+            return
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        self._file = open(tmp, "w+b")
+        self._file.truncate(total)
+        self.mm = mmap.mmap(self._file.fileno(), total)
+        self.mm[:GLOBAL_HEADER.size] = GLOBAL_HEADER.pack(MAGIC, VERSION, slots, slot_bytes, 0)
+        os.replace(tmp, self.path)
+
+    def publish(self, name, image=None, mode=None, size=None, data=None, key=""):
+        """發布一張畫面：傳入 PIL Image，或直接傳入 (mode, size, data) 的原始像素；key 為典藏 PNG 的 sha256。"""
+        if image is not None:
+            mode, size, data = image.mode, image.size, image.tobytes()
+        data = memoryview(data).cast("B")
+        if len(data) > self.slot_bytes:
+            print(f"⚠️ 畫面 {size} 超過共享記憶體 slot 大小，略過 handoff")
+            return None
+        with self._lock:
+            seq = struct.unpack_from("<Q", self.mm, LATEST_SEQ_OFFSET)[0] + 1
+            offset = GLOBAL_SIZE + (seq % self.slots) * (SLOT_HEADER_SIZE + self.slot_bytes)
+            struct.pack_into("<Q", self.mm, offset, 0)
+            start = offset + SLOT_HEADER_SIZE
+            self.mm[start:start + len(data)] = data
+            SLOT_HEADER.pack_into(
+                self.mm, offset, seq, size[0], size[1], mode.encode("ascii"), len(data),
+                name.encode("utf-8")[:120], bytes.fromhex(key)
+            )
+            struct.pack_into("<Q", self.mm, LATEST_SEQ_OFFSET, seq)
+        return seq
+
+    def close(self):
+        self.mm.close()
+        self._file.close()
+
+
+class HandoffFrame:
+    def __init__(self, reader, seq, name, image, view, key):
+        self.reader = reader
+        self.seq = seq
+        self.name = name
+        self.key = key        # 典藏 PNG 的 sha256（hex）；舊的寫入端沒有時為空字串
+        self.image = image    # 直接映射共享記憶體的 PIL Image（零複製），用完請呼叫 still_valid()
+        self.view = view      # 同一塊像素的 memoryview
+
+    def still_valid(self):
+        return self.reader._slot_seq(self.seq) == self.seq
+
+
+class HandoffReader:
+    def __init__(self, path=None):
+        self.path = path or default_path()
+        self.mm = None
+        self._file = None
+        self._inode = None
+
+    def _replaced(self):
+        try:
+            return os.stat(self.path).st_ino != self._inode
+        except FileNotFoundError:
+            return False
+
+    def _open(self):
+        if self.mm is not None and self._replaced():
+            self.close(release=True)   # 策展人以不同版面重建了緩衝區
+        if self.mm is not None:
+            return True
+        if not os.path.exists(self.path):
+            return False
+        self._file = open(self.path, "rb")
+        self._inode = os.fstat(self._file.fileno()).st_ino
+        self.mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.slots, self.slot_bytes, _ = GLOBAL_HEADER.unpack_from(self.mm, 0)
+        if (magic, version) != (MAGIC, VERSION):
+            self.close()
+            return False
+        return True
+
+    def _offset(self, seq):
+        return GLOBAL_SIZE + (seq % self.slots) * (SLOT_HEADER_SIZE + self.slot_bytes)
+
+    def _slot_seq(self, seq):
+        return struct.unpack_from("<Q", self.mm, self._offset(seq))[0]
+
+    def read(self, name=None):
+        """回傳最新畫面；指定 name 時只有最新畫面正好是該作品才回傳。"""
+        if not self._open():
+            return None
+        seq = struct.unpack_from("<Q", self.mm, LATEST_SEQ_OFFSET)[0]
+        if seq == 0:
+            return None
+        offset = self._offset(seq)
+        slot_seq, width, height, mode, length, raw_name, key = SLOT_HEADER.unpack_from(self.mm, offset)
+        if slot_seq != seq:
+            return None
+        frame_name = raw_name.rstrip(b"\0").decode("utf-8", errors="replace")
+        if name is not None and frame_name != name:
+            return None
+        start = offset + SLOT_HEADER_SIZE
+        mode = mode.rstrip(b"\0").decode("ascii")
+        view = memoryview(self.mm)[start:start + length]
+        image = Image.frombuffer(mode, (width, height), view, "raw", mode, 0, 1)
+        return HandoffFrame(self, seq, frame_name, image, view, key.hex() if key.strip(b"\0") else "")
+
+    def close(self, release=False):
+        """release=True：仍有 frame 指向舊映射時也放開它（frame 用完後由 GC 釋放）。"""
+        if self.mm is not None:
+            try:
+                self.mm.close()
+            except BufferError:  # 仍有 frame 指向這塊記憶體
+                if not release:
+                    return
+            self._file.close()
+        self.mm = None
+        self._file = None
@@ -0,0 +1,154 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+import ArtworkArchive
+
+# ====== Artwork Watcher ======
+# 在記憶體中保存 GeneratedImages/ 的最新作品，新作品登錄時喚醒等待中的觀眾。
+# 策展人存檔後以 rename 更新 GeneratedImages/LATEST（見 ArtworkArchive.py），這裡只監看最上層：
+# Linux 上使用 inotify；其他平台（或 inotify 無法使用時）改為輪詢資料夾的 mtime，
+# 只有資料夾內容變動時才重新讀取指標，不必掃描日期分層中的所有檔案。
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_DELETE_SELF = 0x00000400
+IN_IGNORED = 0x00008000
+IN_CLOEXEC = 0o2000000
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def _load_libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+def parse_events(buffer):
+    """把 inotify read() 的結果拆成 (mask, 檔名)；檔名長度包含結尾補齊的 NUL。"""
+    offset = 0
+    while offset < len(buffer):
+        _, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+        offset += EVENT_HEADER.size
+        yield mask, os.fsdecode(buffer[offset:offset + length].rstrip(b"\0"))
+        offset += length
+
+
+def scan_latest(folder):
+    latest = ArtworkArchive.read_latest(folder)
+    if latest is not None:
+        return latest
+    # 尚未使用 ArtworkArchive 的舊資料夾：所有作品都在最上層
+    image_files = [f for f in os.listdir(folder) if f.lower().endswith(IMAGE_EXTENSIONS)]
+    if not image_files:
+        return None
+    latest = max(image_files, key=lambda x: os.path.getmtime(os.path.join(folder, x)))
+    return os.path.join(folder, latest)
+
+
+class ArtworkWatcher:
+    def __init__(self, folder="GeneratedImages", poll_interval=1.0):
+        self.folder = folder
+        self.poll_interval = poll_interval
+        self.backend = None
+        self._latest = None
+        self._condition = threading.Condition()
+        self._stopped = threading.Event()
+        os.makedirs(folder, exist_ok=True)
+        self._set_latest(scan_latest(folder))
+        self._thread = threading.Thread(target=self._run, name=f"ArtworkWatcher({folder})", daemon=True)
+        self._thread.start()
+
+    @property
+    def latest(self):
+        with self._condition:
+            return self._latest
+
+    def _set_latest(self, path):
+        with self._condition:
+            if path and path != self._latest:
+                self._latest = path
+                self._condition.notify_all()
+
+    def wait_for_new(self, since=None, timeout=None):
+        """等到最新作品不同於 since（None 表示等到有任何作品），逾時回傳 None。"""
+        with self._condition:
+            self._condition.wait_for(lambda: self._latest is not None and self._latest != since, timeout)
+            if self._latest is None or self._latest == since:
+                return None
+            return self._latest
+
+    def stop(self):
+        self._stopped.set()
+
+    # ---------- 背景執行緒 ----------
+    def _run(self):
+        libc = _load_libc()
+        if libc is not None and self._watch_inotify(libc):
+            return
+        self._watch_polling()
+
+    def _watch_inotify(self, libc):
+        fd = libc.inotify_init1(IN_CLOEXEC)
+        if fd < 0:
+            return False
+        wd = libc.inotify_add_watch(fd, os.fsencode(self.folder), IN_CLOSE_WRITE | IN_MOVED_TO | IN_DELETE_SELF)
+        if wd < 0:
+            os.close(fd)
+            return False
+        self.backend = "inotify"
+        try:
+            while not self._stopped.is_set():
+                readable, _, _ = select.select([fd], [], [], self.poll_interval)
+                if not readable:
+                    continue
+                for mask, filename in parse_events(os.read(fd, 64 * 1024)):
+                    if mask & (IN_DELETE_SELF | IN_IGNORED):
+                        # 資料夾被刪除或移走，改用輪詢（會自動重建資料夾）
+                        return False
+                    if filename == ArtworkArchive.LATEST_POINTER:
+                        self._set_latest(ArtworkArchive.read_latest(self.folder))
+                    elif filename.lower().endswith(IMAGE_EXTENSIONS):
+                        self._set_latest(os.path.join(self.folder, filename))
+        finally:
+            os.close(fd)
+        return True
+
+    def _watch_polling(self):
+        self.backend = "polling"
+        last_mtime = None
+        while not self._stopped.is_set():
+            try:
+                mtime = os.stat(self.folder).st_mtime_ns
+            except FileNotFoundError:
+                os.makedirs(self.folder, exist_ok=True)
+                continue
+            if mtime != last_mtime:
+                last_mtime = mtime
+                self._set_latest(scan_latest(self.folder))
+            time.sleep(self.poll_interval)
+
+
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+
+def get_watcher(folder="GeneratedImages"):
+    with _watchers_lock:
+        watcher = _watchers.get(folder)
+        if watcher is None:
+            watcher = ArtworkWatcher(folder)
+            _watchers[folder] = watcher
+        return watcher
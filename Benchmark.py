@@ -0,0 +1,272 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+from datetime import datetime
+import GeminiClient
+from RunInfo import SOURCE_DIR, current_rss_mb, git_revision, peak_rss_mb
+
+# ====== End-to-end Benchmark: Curator → Audience ======
+# 以本機假後端（GeminiClient fake 模式）跑完整的 generate_exhibition_once 與觀眾評論流程，
+# 記錄每個階段的耗時、吞吐量（展覽/小時）與 RSS 峰值，並隨著 GeneratedImages/ 檔案數
+# 與文字紀錄大小增加重複測試。結果寫成 JSON，方便比較不同版本。
+#
+#   python Benchmark.py --cycles 20 --archive-sizes 0,1000,5000 --log-mb 0,1,8
+
+TINY_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010802000000907753de"
+    "0000000c4944415408d763f8ffff3f0005fe02fea7d6a4480000000049454e44ae426082"
+)
+
+
+# ====== Stage Timer ======
+class StageTimer:
+    def __init__(self):
+        self.samples = {}
+        self.last_end = {}
+        self._patched = []
+
+    def add(self, stage, seconds):
+        self.samples.setdefault(stage, []).append(seconds)
+        self.last_end[stage] = time.perf_counter()
+
+    def wrap(self, owner, attr, stage):
+        original = getattr(owner, attr)
+
+        if asyncio.iscoroutinefunction(original):
+            async def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await original(*args, **kwargs)
+                finally:
+                    self.add(stage, time.perf_counter() - start)
+        else:
+            def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return original(*args, **kwargs)
+                finally:
+                    self.add(stage, time.perf_counter() - start)
+
+        setattr(owner, attr, timed)
+        self._patched.append((owner, attr, original))
+
+    def restore(self):
+        for owner, attr, original in reversed(self._patched):
+            setattr(owner, attr, original)
+        self._patched.clear()
+
+    def summary(self):
+        result = {}
+        for stage, values in self.samples.items():
+            ordered = sorted(values)
+            result[stage] = {
+                "count": len(values),
+                "total_s": sum(values),
+                "mean_s": statistics.fmean(values),
+                "p50_s": ordered[len(ordered) // 2],
+                "p95_s": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                "max_s": ordered[-1],
+            }
+        return result
+
+
+# ====== Scenario Fixtures ======
+def populate_archive(folder, count):
+    import ArtworkArchive
+    archive = ArtworkArchive.get_archive(folder)
+    old = time.time() - 86400
+    for i in range(count):
+        shard = os.path.join(folder, ArtworkArchive.shard_for(old + i))
+        os.makedirs(shard, exist_ok=True)
+        path = os.path.join(shard, f"generated_exhibition_20000101_{i:06d}.png")
+        with open(path, "wb") as f:
+            f.write(TINY_PNG)
+        os.utime(path, (old + i, old + i))
+        archive.register(path, created=old + i)
+
+
+def grow_log(filename, target_bytes, image_lines=False):
+    size = os.path.getsize(filename) if os.path.exists(filename) else 0
+    n = 0
+    with open(filename, "a", encoding="utf-8") as f:
+        while size < target_bytes:
+            header = f"🖼️ 圖片：generated_exhibition_19990101_{n:06d}.png\n" if image_lines else ""
+            entry = f"\n{'-'*60}\n{header}🕒 時間：1999-01-01 00:00:00\n\n{'lorem ipsum ' * 40}\n{'-'*60}\n"
+            f.write(entry)
+            size += len(entry.encode("utf-8"))
+            n += 1
+
+
+# ====== Run One Scenario ======
+def model_usage():
+    # 假後端累計的每個模型呼叫次數與 token（見 GeminiClient.FakeModels.usage；token 是估計值，不是實際計費）
+    usage = getattr(GeminiClient.get_client().models, "usage", {})
+    return {model: dict(counts) for model, counts in usage.items()}
+
+
+def run_scenario(workdir, archive_images, log_mb, cycles, renderer, audiences, review_mode="separate"):
+    import ArtworkWatcher
+    import GeminiAudience
+    import GeminiCurator
+    import PillowCompositor
+    import Triptych
+
+    scenario_dir = os.path.join(workdir, f"archive{archive_images}_log{log_mb}mb")
+    os.makedirs(scenario_dir, exist_ok=True)
+    os.chdir(scenario_dir)
+    folder = os.path.join(scenario_dir, "GeneratedImages")
+    populate_archive(folder, archive_images)
+    personas = [
+        GeminiAudience.make_persona(i + 1, feedback_file=os.path.join(scenario_dir, f"audience_feedback{i + 1}.txt"))
+        for i in range(audiences)
+    ]
+    log_bytes = int(log_mb * 1024 * 1024)
+    grow_log("exhibition_statement.txt", log_bytes)
+    grow_log("generated_image_response.txt", log_bytes)
+    for persona in personas:
+        grow_log(persona["feedback_file"], log_bytes, image_lines=True)
+
+    timer = StageTimer()
+    timer.wrap(GeminiCurator, "generate_exhibition_statement", "statement")
+    timer.wrap(GeminiCurator, "request_exhibition_image", "image_call")
+    timer.wrap(Triptych, "decode", "decode")
+    timer.wrap(Triptych, "split", "split")
+    timer.wrap(Triptych, "check", "quality_gate")
+    timer.wrap(GeminiCurator, "extract_captions", "captions")
+    timer.wrap(GeminiCurator, "save_exhibition_statement", "log_append")
+    timer.wrap(GeminiCurator, "save_response_text", "log_append")
+    timer.wrap(GeminiAudience, "save_audience_response", "feedback_write")
+    timer.wrap(GeminiAudience, "review_artwork", "audience_review")
+    if renderer == "pillow":
+        fig, axs = None, None
+        timer.wrap(PillowCompositor, "compose_exhibition", "render")
+        timer.wrap(PillowCompositor, "save_canvas", "savefig")
+    else:
+        fig, axs = GeminiCurator.plot_init()
+        timer.wrap(GeminiCurator, "plot_image", "render")
+        timer.wrap(GeminiCurator.plt, "savefig", "savefig")
+
+    GeminiAudience.review_mode = review_mode
+    usage_before = model_usage()
+    watcher = ArtworkWatcher.ArtworkWatcher(folder, poll_interval=0.05)
+    missed_detections = 0
+    rss_samples = []
+    started = time.perf_counter()
+    try:
+        for _ in range(cycles):
+            cycle_start = time.perf_counter()
+            previous = watcher.latest
+            _, image_path, _ = GeminiCurator.generate_exhibition_once(fig, axs, render_pause=0)
+            saved_at = timer.last_end.get("savefig", time.perf_counter())
+            if watcher.wait_for_new(previous, timeout=2) is None:
+                missed_detections += 1  # 新作品登錄後 2 秒內沒有喚醒 watcher
+            else:
+                timer.add("detection", time.perf_counter() - saved_at)
+            asyncio.run(GeminiAudience.review_artwork(image_path, personas))
+            timer.add("cycle", time.perf_counter() - cycle_start)
+
+            # 觀眾每輪的成本：找最新作品（LATEST 指標，舊版為完整掃描資料夾）+ 已評論查詢
+            start = time.perf_counter()
+            ArtworkWatcher.scan_latest(folder)
+            timer.add("archive_scan", time.perf_counter() - start)
+            start = time.perf_counter()
+            GeminiAudience.has_already_commented(image_path, personas[0]["feedback_file"])
+            timer.add("commented_lookup", time.perf_counter() - start)
+            rss_samples.append(current_rss_mb())
+    finally:
+        elapsed = time.perf_counter() - started
+        watcher.stop()
+        timer.restore()
+        if fig is not None:
+            GeminiCurator.plt.close(fig)
+        os.chdir(SOURCE_DIR)
+
+    usage = {}
+    for model, counts in model_usage().items():
+        before = usage_before.get(model, {})
+        usage[model] = {key: (value - before.get(key, 0)) / cycles for key, value in counts.items()}
+    return {
+        "archive_images": archive_images,
+        "log_bytes": log_bytes,
+        "cycles": cycles,
+        "elapsed_s": elapsed,
+        "exhibitions_per_hour": cycles / elapsed * 3600 if elapsed else None,
+        "missed_detections": missed_detections,
+        "rss_mb_end": rss_samples[-1] if rss_samples else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": timer.summary(),
+        "model_usage_per_exhibition": usage,
+    }
+
+
+def print_report(results):
+    for scenario in results["scenarios"]:
+        print(f"\n📊 archive={scenario['archive_images']} images, logs={scenario['log_bytes'] / 1024 / 1024:.1f} MB, "
+              f"{scenario['exhibitions_per_hour']:.0f} exhibitions/hour, peak RSS {scenario['peak_rss_mb']} MB")
+        for stage, stats in scenario["stages"].items():
+            print(f"   {stage:<18} n={stats['count']:<4} mean={stats['mean_s'] * 1000:9.2f} ms  p95={stats['p95_s'] * 1000:9.2f} ms")
+        for model, usage in scenario.get("model_usage_per_exhibition", {}).items():
+            print(f"   🔢 {model:<38} {usage['calls']:.1f} calls, {usage['prompt_tokens']:.0f} prompt + "
+                  f"{usage['candidates_tokens']:.0f} output tokens per exhibition (fake-backend estimate)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the curator → audience loop against a local fake backend.")
+    parser.add_argument("--cycles", type=int, default=10, help="exhibitions per scenario")
+    parser.add_argument("--archive-sizes", default="0,1000,5000", help="comma-separated pre-existing archive sizes")
+    parser.add_argument("--log-mb", default="0,1,8", help="comma-separated text log sizes (MB), one per archive size")
+    parser.add_argument("--renderer", choices=["matplotlib", "pillow"], default="matplotlib")
+    parser.add_argument("--audiences", type=int, default=3)
+    parser.add_argument("--review-mode", choices=["separate", "joint"], default="separate",
+                        help="audience requests per exhibition: one per persona, or one structured request")
+    parser.add_argument("--latency", type=float, default=0.0, help="mean injected model latency (s)")
+    parser.add_argument("--image-size", type=int, default=1024, help="edge of the fake model image (px)")
+    parser.add_argument("--workdir", help="scratch directory (default: temporary)")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--verbose", action="store_true", help="keep curator/audience console output")
+    args = parser.parse_args()
+
+    archive_sizes = [int(x) for x in args.archive_sizes.split(",")]
+    log_sizes = [float(x) for x in args.log_mb.split(",")]
+    if len(log_sizes) != len(archive_sizes):
+        parser.error("--log-mb needs one value per --archive-sizes entry")
+
+    # 必須在第一次模型請求之前指定假後端
+    GeminiClient.use_client(GeminiClient.fake_client(latency=args.latency, image_size=(args.image_size, args.image_size)))
+    if args.renderer == "matplotlib":
+        import matplotlib
+        matplotlib.use("Agg")
+
+    output = os.path.abspath(args.output)
+    workdir = args.workdir or tempfile.mkdtemp(prefix="gemini_benchmark_")
+    results = {
+        "revision": git_revision(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": vars(args),
+        "scenarios": [],
+    }
+    for archive_images, log_mb in zip(archive_sizes, log_sizes):
+        print(f"▶️ scenario: archive={archive_images}, logs={log_mb} MB, cycles={args.cycles}")
+        sink = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        with sink:
+            results["scenarios"].append(
+                run_scenario(workdir, archive_images, log_mb, args.cycles, args.renderer, args.audiences, args.review_mode)
+            )
+
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print_report(results)
+    print(f"\n✅ 基準測試結果已儲存到 {output}（工作目錄：{workdir}）")
+
+
+if __name__ == "__main__":
+    main()
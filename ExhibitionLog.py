@@ -0,0 +1,277 @@
+import argparse
+import contextlib
+import glob
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+
+# ====== Structured Exhibition / Feedback Logs ======
+# 策展論述、圖片附加描述與觀眾回饋以 JSONL 紀錄（每筆含 seq、時間、圖片檔名與文字），
+# 依大小切成多個 segment，並在旁邊維護 SQLite offset 索引：
+#   logs/<stream>/segment-000001.jsonl ...
+#   logs/<stream>/index.sqlite   (seq, image, ts, segment, offset, length)
+# 「圖片 X 的回饋」「最近 50 筆論述」都只需一次索引查詢加上精準的檔案讀取。
+# 多個程序（三位觀眾、策展人）可能寫同一個 stream：append 在 SQLite 的 BEGIN IMMEDIATE 交易中
+# 配置 seq、追加 segment、寫入索引，整段跨程序互斥，seq 不會重複。
+# 原本的文字檔（exhibition_statement.txt 等）可隨時用 export_text() 重新產生。
+#
+#   python ExhibitionLog.py tail exhibition_statement -n 50
+#   python ExhibitionLog.py find audience_feedback1 generated_exhibition_20250101_120000.png
+#   python ExhibitionLog.py export --all
+
+LOG_DIR = os.environ.get("GEMINI_LOG_DIR", "logs")
+SEGMENT_BYTES = int(os.environ.get("GEMINI_LOG_SEGMENT_BYTES", str(8 * 1024 * 1024)))
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+# 設為 0 時不再同步追加舊的 .txt，需要時再用 export 產生
+TEXT_LOGS = os.environ.get("GEMINI_TEXT_LOGS", "1") != "0"
+LOCK_TIMEOUT = float(os.environ.get("GEMINI_LOG_LOCK_TIMEOUT", "30"))
+
+
+# ====== Human-readable Text Format (same as the original .txt logs) ======
+def format_entry(kind, text, timestamp, image=None):
+    if kind == "statement":
+        return (
+            f"\n{'='*60}\n"
+            f"🗓️ 策展時間：{timestamp}\n\n"
+            f"{text.strip()}\n"
+            f"{'='*60}\n"
+        )
+    if kind == "response":
+        return (
+            f"\n{'-'*60}\n"
+            f"🕒 生成時間：{timestamp}\n\n"
+            f"{text.strip()}\n"
+            f"{'-'*60}\n"
+        )
+    return (
+        f"\n{'-'*60}\n"
+        f"🖼️ 圖片：{image}\n"
+        f"🕒 時間：{timestamp}\n\n"
+        f"{text.strip()}\n"
+        f"{'-'*60}\n"
+    )
+
+
+def stream_kind(stream):
+    if stream.startswith("exhibition_statement"):
+        return "statement"
+    if stream.startswith("generated_image_response"):
+        return "response"
+    return "feedback"
+
+
+def stream_for_file(filename):
+    return os.path.splitext(os.path.basename(filename))[0]
+
+
+# ====== Segmented Log with Offset Index ======
+class ExhibitionLog:
+    def __init__(self, stream, folder=LOG_DIR, segment_bytes=SEGMENT_BYTES):
+        self.stream = stream
+        self.kind = stream_kind(stream)
+        self.folder = os.path.join(folder, stream)
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.folder, exist_ok=True)
+        # isolation_level=None：交易由 _write() 明確以 BEGIN IMMEDIATE 開始
+        self.db = sqlite3.connect(os.path.join(self.folder, "index.sqlite"), timeout=LOCK_TIMEOUT,
+                                  check_same_thread=False, isolation_level=None)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            "seq INTEGER PRIMARY KEY, image TEXT, ts TEXT, segment INTEGER, offset INTEGER, length INTEGER)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS records_image ON records (image)")
+        with self._write():
+            self._recover()
+
+    def _segment_path(self, segment):
+        return os.path.join(self.folder, f"segment-{segment:06d}.jsonl")
+
+    @contextlib.contextmanager
+    def _write(self):
+        # 執行緒之間用 _lock，程序之間用 SQLite 的寫入鎖（其他程序在 LOCK_TIMEOUT 內等待）
+        with self._lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+            self.db.execute("COMMIT")
+
+    def _last(self):
+        return self.db.execute(
+            "SELECT seq, segment, offset, length FROM records ORDER BY seq DESC LIMIT 1"
+        ).fetchone()
+
+    def _recover(self):
+        # 寫入 segment 後、更新索引前中斷的話，把尚未索引的完整行補進索引（需在 _write() 交易中呼叫）；
+        # 寫到一半的最後一行（沒有換行）截掉，下一筆才不會接在它後面
+        last = self._last()
+        segments = sorted(glob.glob(os.path.join(self.folder, "segment-*.jsonl")))
+        if not segments:
+            return
+        newest = int(re.search(r"segment-(\d+)\.jsonl$", segments[-1]).group(1))
+        segment, position = (newest, 0) if last is None or last[1] != newest else (newest, last[2] + last[3])
+        with open(self._segment_path(segment), "rb") as f:
+            f.seek(position)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                record = json.loads(line)
+                self.db.execute(
+                    "INSERT OR IGNORE INTO records VALUES (?, ?, ?, ?, ?, ?)",
+                    (record["seq"], record.get("image"), record["ts"], segment, position, len(line))
+                )
+                position += len(line)
+        path = self._segment_path(segment)
+        if os.path.getsize(path) > position:
+            with open(path, "r+b") as f:
+                f.truncate(position)
+
+    def append(self, text, image=None, timestamp=None, **extra):
+        timestamp = timestamp or datetime.now().strftime(TIMESTAMP_FORMAT)
+        with self._write():
+            last = self._last()
+            if last is not None and os.path.getsize(self._segment_path(last[1])) > last[2] + last[3]:
+                # 其他程序寫完 segment 後、寫入索引前中斷：先補上索引，seq 才不會重複
+                self._recover()
+                last = self._last()
+            seq = last[0] + 1 if last else 1
+            segment = last[1] if last else 1
+            path = self._segment_path(segment)
+            if os.path.exists(path) and os.path.getsize(path) >= self.segment_bytes:
+                segment += 1
+                path = self._segment_path(segment)
+            record = {"seq": seq, "ts": timestamp, "image": image, "text": text.strip()}
+            record.update(extra)
+            line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+            with open(path, "ab") as f:
+                offset = f.tell()
+                f.write(line)
+            self.db.execute(
+                "INSERT INTO records VALUES (?, ?, ?, ?, ?, ?)",
+                (seq, image, timestamp, segment, offset, len(line))
+            )
+        return record
+
+    def _read(self, rows):
+        records = []
+        for segment, offset, length in rows:
+            with open(self._segment_path(segment), "rb") as f:
+                f.seek(offset)
+                records.append(json.loads(f.read(length)))
+        return records
+
+    def find(self, image):
+        with self._lock:
+            rows = self.db.execute(
+                "SELECT segment, offset, length FROM records WHERE image = ? ORDER BY seq", (image,)
+            ).fetchall()
+        return self._read(rows)
+
+    def has_image(self, image):
+        with self._lock:
+            return self.db.execute("SELECT 1 FROM records WHERE image = ? LIMIT 1", (image,)).fetchone() is not None
+
+    def tail(self, n=50):
+        with self._lock:
+            rows = self.db.execute(
+                "SELECT segment, offset, length FROM records ORDER BY seq DESC LIMIT ?", (n,)
+            ).fetchall()
+        return self._read(reversed(rows))
+
+    def __len__(self):
+        with self._lock:
+            return self.db.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def __iter__(self):
+        for path in sorted(glob.glob(os.path.join(self.folder, "segment-*.jsonl"))):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.endswith("\n"):
+                        yield json.loads(line)
+
+    def export_text(self, filename=None):
+        filename = filename or f"{self.stream}.txt"
+        tmp = f"{filename}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for record in self:
+                f.write(format_entry(self.kind, record["text"], record["ts"], record.get("image")))
+        os.replace(tmp, filename)
+        return filename
+
+
+_logs = {}
+_logs_lock = threading.Lock()
+
+
+def get_log(stream, folder=LOG_DIR):
+    key = (os.path.abspath(folder), stream)
+    with _logs_lock:
+        log = _logs.get(key)
+        if log is None:
+            log = _logs[key] = ExhibitionLog(stream, folder)
+        return log
+
+
+def write_entry(filename, text, image=None, timestamp=None):
+    """寫入結構化紀錄；TEXT_LOGS 開啟時同時追加到原本的文字檔。回傳該筆紀錄。"""
+    stream = stream_for_file(filename)
+    record = get_log(stream).append(text, image=image, timestamp=timestamp)
+    if TEXT_LOGS:
+        with open(filename, "a", encoding="utf-8") as f:
+            f.write(format_entry(stream_kind(stream), record["text"], record["ts"], image))
+    return record
+
+
+def streams(folder=LOG_DIR):
+    if not os.path.isdir(folder):
+        return []
+    return sorted(name for name in os.listdir(folder) if os.path.isdir(os.path.join(folder, name)))
+
+
+# ====== CLI ======
+def _print_records(records):
+    for record in records:
+        header = f"#{record['seq']} {record['ts']}" + (f" 🖼️ {record['image']}" if record.get("image") else "")
+        print(header)
+        print(record["text"])
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query and export the structured exhibition/feedback logs.")
+    parser.add_argument("--folder", default=LOG_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    tail = sub.add_parser("tail", help="show the latest records of a stream")
+    tail.add_argument("stream")
+    tail.add_argument("-n", type=int, default=50)
+    find = sub.add_parser("find", help="show the records for one image")
+    find.add_argument("stream")
+    find.add_argument("image")
+    export = sub.add_parser("export", help="regenerate the human-readable .txt logs")
+    export.add_argument("stream", nargs="*")
+    export.add_argument("--all", action="store_true")
+    export.add_argument("--output-dir", default=".")
+    args = parser.parse_args()
+
+    if args.command == "tail":
+        _print_records(get_log(args.stream, args.folder).tail(args.n))
+    elif args.command == "find":
+        _print_records(get_log(args.stream, args.folder).find(args.image))
+    else:
+        names = streams(args.folder) if args.all else args.stream
+        if not names:
+            sys.exit("⚠️ 請指定 stream 或使用 --all")
+        for name in names:
+            filename = get_log(name, args.folder).export_text(os.path.join(args.output_dir, f"{name}.txt"))
+            print(f"✅ 已匯出 {filename}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+import Metrics
+
+# ====== On-disk Exhibition Queue ======
+# 事先（離線、批次）生成的展覽放在 exhibition_queue/，每檔一個資料夾：
+#   exhibition_queue/<id>/exhibition.json   策展論述、模型附加文字、圖說、建立時間
+#   exhibition_queue/<id>/image.png         模型回傳的原始三聯圖
+# 生產端先寫進 <id>.tmp/ 再 rename 成 <id>/；取用端 rename 成 <id>.claimed/ 後讀取並刪除，
+# 兩者都是原子操作，因此多個生產者/展示程序可以同時使用同一個佇列。id 依時間排序（FIFO）。
+#
+#   python ExhibitionQueue.py produce --count 50 --concurrency 4
+#   python ExhibitionQueue.py status
+#   python GeminiCurator.py --queue exhibition_queue --low-water 5 --refill 10
+
+QUEUE_DIR = os.environ.get("GEMINI_EXHIBITION_QUEUE", "exhibition_queue")
+STALE_SECONDS = 600
+TMP_SUFFIX = ".tmp"
+CLAIMED_SUFFIX = ".claimed"
+
+
+class ExhibitionQueue:
+    def __init__(self, folder=QUEUE_DIR):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        self._cleanup()
+
+    def _cleanup(self):
+        # 生產者/取用者中途崩潰留下的暫存資料夾
+        now = time.time()
+        for name in os.listdir(self.folder):
+            if not name.endswith((TMP_SUFFIX, CLAIMED_SUFFIX)):
+                continue
+            path = os.path.join(self.folder, name)
+            try:
+                stale = now - os.path.getmtime(path) > STALE_SECONDS
+            except FileNotFoundError:
+                continue  # 其他程序剛好讀完並刪除
+            if stale:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def _ready(self):
+        return sorted(
+            name for name in os.listdir(self.folder)
+            if not name.endswith((TMP_SUFFIX, CLAIMED_SUFFIX)) and os.path.isdir(os.path.join(self.folder, name))
+        )
+
+    def __len__(self):
+        return len(self._ready())
+
+    def put(self, statement, image_data, text_response, captions=None):
+        entry_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{os.getpid()}_{threading.get_ident() % 100000}"
+        tmp = os.path.join(self.folder, entry_id + TMP_SUFFIX)
+        with Metrics.stage("queue_put", bytes=len(image_data or b"")):
+            os.makedirs(tmp)
+            if image_data:
+                with open(os.path.join(tmp, "image.png"), "wb") as f:
+                    f.write(image_data)
+            with open(os.path.join(tmp, "exhibition.json"), "w", encoding="utf-8") as f:
+                json.dump({
+                    "statement": statement,
+                    "text_response": text_response,
+                    "captions": captions or [],
+                    "created_at": datetime.now().isoformat(timespec="seconds"),
+                }, f, ensure_ascii=False, indent=2)
+            os.rename(tmp, os.path.join(self.folder, entry_id))
+        return entry_id
+
+    def pop(self):
+        """取出最舊的一檔（statement, image_data, text_response, captions）；佇列空了回傳 None。"""
+        for entry_id in self._ready():
+            claimed = os.path.join(self.folder, entry_id + CLAIMED_SUFFIX)
+            try:
+                os.rename(os.path.join(self.folder, entry_id), claimed)
+            except FileNotFoundError:
+                continue  # 被其他程序搶先取走
+            with Metrics.stage("queue_pop") as fields:
+                with open(os.path.join(claimed, "exhibition.json"), "r", encoding="utf-8") as f:
+                    raw = json.load(f)
+                image_path = os.path.join(claimed, "image.png")
+                raw["image_data"] = None
+                if os.path.exists(image_path):
+                    with open(image_path, "rb") as f:
+                        raw["image_data"] = f.read()
+                fields["bytes"] = len(raw["image_data"] or b"")
+            shutil.rmtree(claimed, ignore_errors=True)
+            raw["id"] = entry_id
+            return raw
+        return None
+
+
+# ====== Batch Producer ======
+def produce(exhibition_queue, count, concurrency=2, prompt=None):
+    """以最多 concurrency 個執行緒同時生成 count 檔展覽放進佇列，回傳成功的數量。"""
+    import GeminiCurator
+    prompt = prompt or GeminiCurator.curator_prompt
+
+    def one():
+        raw = GeminiCurator.request_exhibition(prompt)
+        if not raw["image_data"]:
+            raise RuntimeError("沒有可用的三聯圖（未回傳圖片或未通過品質檢查）")
+        entry_id = None
+        try:
+            entry_id = exhibition_queue.put(raw["statement"], raw["image_data"], raw["text_response"],
+                                            GeminiCurator.extract_captions(raw["text_response"]))
+        finally:
+            # 圖片存進佇列後論述才寫入相似度索引（展示它的程序不會再寫一次）
+            GeminiCurator.settle_statement(raw["statement"], entry_id)
+        return entry_id
+
+    done = 0
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="Producer") as pool:
+        futures = [pool.submit(one) for _ in range(count)]
+        for future in as_completed(futures):
+            try:
+                entry_id = future.result()
+            except Exception:
+                print("❌ 生成展覽失敗：")
+                traceback.print_exc()
+                continue
+            done += 1
+            print(f"📦 已加入佇列：{entry_id}（{done}/{count}，佇列共 {len(exhibition_queue)} 檔）")
+    return done
+
+
+# ====== Display-side Buffer with Low-water Refill ======
+class BufferedExhibitions:
+    """
+    展示迴圈從磁碟佇列取展覽（介面同 GeminiCurator.ExhibitionPipeline）。
+    剩餘數量低於 low_water 時在背景補 refill 檔；佇列空了才會等待。
+    """
+
+    def __init__(self, folder=QUEUE_DIR, low_water=5, refill=10, concurrency=2):
+        self.queue = ExhibitionQueue(folder)
+        self.low_water = low_water
+        self.refill = refill
+        self.concurrency = concurrency
+        self._refilling = None
+
+    def start(self):
+        self._maybe_refill()
+        return self
+
+    def stop(self):
+        pass  # 補貨執行緒是 daemon，做到一半的展覽下次啟動時由 _cleanup 清掉
+
+    def qsize(self):
+        return len(self.queue)
+
+    def _maybe_refill(self):
+        if self.refill <= 0 or (self._refilling is not None and self._refilling.is_alive()):
+            return
+        if len(self.queue) >= self.low_water:
+            return
+        print(f"🔄 佇列剩 {len(self.queue)} 檔（低於 {self.low_water}），背景補充 {self.refill} 檔")
+        self._refilling = threading.Thread(
+            target=produce, args=(self.queue, self.refill, self.concurrency), name="QueueRefill", daemon=True
+        )
+        self._refilling.start()
+
+    def get(self, fig=None, poll: float = 0.5, gallery=None):
+        import GeminiCurator
+        while True:
+            raw = self.queue.pop()
+            self._maybe_refill()
+            if raw is not None:
+                return GeminiCurator.build_exhibition(raw)
+            GeminiCurator.pause(poll, fig)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate exhibitions into the on-disk exhibition queue.")
+    parser.add_argument("--queue", default=QUEUE_DIR, help="queue folder")
+    sub = parser.add_subparsers(dest="command", required=True)
+    produce_parser = sub.add_parser("produce", help="generate exhibitions with a bounded worker pool")
+    produce_parser.add_argument("--count", type=int, default=10)
+    produce_parser.add_argument("--concurrency", type=int, default=2, help="max concurrent generations")
+    produce_parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics over HTTP on this port")
+    sub.add_parser("status", help="show how many exhibitions are queued")
+    args = parser.parse_args()
+
+    exhibition_queue = ExhibitionQueue(args.queue)
+    if args.command == "status":
+        print(f"📦 {args.queue}：{len(exhibition_queue)} 檔展覽待展出")
+        return
+    Metrics.configure("producer", port=args.metrics_port)
+    start = time.perf_counter()
+    done = produce(exhibition_queue, args.count, args.concurrency)
+    elapsed = time.perf_counter() - start
+    print(f"✅ 完成 {done}/{args.count} 檔，耗時 {elapsed:.1f} 秒（{done / elapsed * 3600:.0f} 檔/小時）")
+
+
+if __name__ == "__main__":
+    main()
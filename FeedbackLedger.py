@@ -0,0 +1,63 @@
+import os
+import re
+import sqlite3
+import threading
+
+# ====== Feedback Ledger ======
+# 觀眾回饋的文字檔 (audience_feedbackN.txt) 只會越來越大，
+# 這裡在旁邊維護一個 SQLite 索引 (audience_feedbackN.index.sqlite)，
+# 以圖片檔名為主鍵，讓「是否已評論過」變成單次索引查詢，而不用每輪重讀整個文字檔。
+# 新的回饋只寫進結構化 log（ExhibitionLog），這裡只在第一次使用時匯入既有文字檔，不再逐筆寫入。
+
+IMAGE_LINE_PATTERN = re.compile(r"^🖼️ 圖片：(.+?)\s*$", flags=re.MULTILINE)
+
+_connections = {}
+_lock = threading.Lock()
+
+
+def index_path(filename):
+    root, _ = os.path.splitext(filename)
+    return f"{root}.index.sqlite"
+
+
+def _backfill(conn, filename):
+    # 第一次建立索引時，把既有文字檔中的圖片紀錄匯入（只做一次）
+    done = conn.execute("SELECT value FROM meta WHERE key = 'backfilled'").fetchone()
+    if done:
+        return
+    if os.path.exists(filename):
+        with open(filename, "r", encoding="utf-8") as f:
+            names = IMAGE_LINE_PATTERN.findall(f.read())
+        conn.executemany(
+            "INSERT OR IGNORE INTO commented (image_name, commented_at) VALUES (?, NULL)",
+            [(name,) for name in names]
+        )
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('backfilled', '1')")
+    conn.commit()
+
+
+def _connect(filename):
+    path = index_path(filename)
+    with _lock:
+        conn = _connections.get(path)
+        if conn is None:
+            conn = sqlite3.connect(path, check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS commented ("
+                "image_name TEXT PRIMARY KEY, commented_at TEXT)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            _backfill(conn, filename)
+            _connections[path] = conn
+        return conn
+
+
+def has_commented(image_name, filename):
+    if not os.path.exists(filename):
+        return False
+    conn = _connect(filename)
+    with _lock:
+        row = conn.execute(
+            "SELECT 1 FROM commented WHERE image_name = ?", (image_name,)
+        ).fetchone()
+    return row is not None
@@ -0,0 +1,96 @@
+import numpy as np
+from GalleryStyle import CAPTION_STYLE, TITLE_STYLE, caption_text, title_text
+
+# ====== Blitted Live Gallery Display ======
+# plot_image 每輪都 ax.clear() 再重畫，連同木框與所有座標軸一起重繪。
+# 這裡只在開始時（以及視窗大小改變時）畫一次靜態背景並用 copy_from_bbox 存起來，
+# 之後換展只更新三張圖的 set_data 與文字的 set_text，再用 blit 貼回畫面。
+
+PLACEHOLDER = np.zeros((1, 1, 3), dtype=np.uint8)
+
+
+class BlitGallery:
+    def __init__(self, fig, axs):
+        self.fig = fig
+        self.axs = axs
+        self.canvas = fig.canvas
+        self.background = None
+        self.visible = False
+        self._saving = False
+
+        fig.subplots_adjust(top=0.8, bottom=0.15)
+        self.image_artists = []
+        self.caption_artists = []
+        for ax in axs:
+            ax.clear()
+            ax.axis("off")
+            # 固定在單位正方形中顯示，換圖時不會改變座標軸版面，背景快取因此一直有效
+            image_artist = ax.imshow(PLACEHOLDER, extent=(0, 1, 1, 0), animated=True)
+            ax.set_xlim(0, 1)
+            ax.set_ylim(1, 0)
+            caption = ax.text(0.5, -0.1, "", transform=ax.transAxes, animated=True, **CAPTION_STYLE)
+            self.image_artists.append(image_artist)
+            self.caption_artists.append(caption)
+        self.title_artist = fig.suptitle("", **TITLE_STYLE)
+        self.title_artist.set_animated(True)
+
+        # 視窗重繪（例如改變大小）後重新擷取背景
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+        self.canvas.draw()
+
+    @property
+    def animated_artists(self):
+        return self.image_artists + self.caption_artists + [self.title_artist]
+
+    def _on_draw(self, event=None):
+        if self._saving:
+            return
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self._blit()
+
+    def _blit(self):
+        if self.background is None:
+            return
+        self.canvas.restore_region(self.background)
+        if self.visible:
+            for artist in self.animated_artists:
+                self.fig.draw_artist(artist)
+        self.canvas.blit(self.fig.bbox)
+        self.canvas.flush_events()
+
+    def show(self, images: list, statement: str, captions: list = None):
+        for i, artist in enumerate(self.image_artists):
+            artist.set_data(np.asarray(images[i]) if i < len(images) else PLACEHOLDER)
+            artist.set_visible(i < len(images))
+        for i, caption in enumerate(self.caption_artists):
+            text = captions[i] if captions and i < len(captions) and i < len(images) else ""
+            caption.set_text(caption_text(text))
+        self.title_artist.set_text(title_text(statement))
+        self.visible = True
+        self._blit()
+
+    def show_title(self, statement: str):
+        # 串流模式：圖片還沒準備好時只顯示（逐步長出的）標題
+        for artist in self.image_artists:
+            artist.set_visible(False)
+        for caption in self.caption_artists:
+            caption.set_text("")
+        self.title_artist.set_text(title_text(statement))
+        self.visible = True
+        self._blit()
+
+    def clear(self):
+        self.visible = False
+        self._blit()
+
+    def savefig(self, path, **kwargs):
+        # savefig 不會畫 animated 的 artist，存檔時暫時關閉
+        self._saving = True
+        for artist in self.animated_artists:
+            artist.set_animated(False)
+        try:
+            self.fig.savefig(path, **kwargs)
+        finally:
+            for artist in self.animated_artists:
+                artist.set_animated(True)
+            self._saving = False
@@ -0,0 +1,29 @@
+import textwrap
+
+# ====== Exhibition Title / Caption Style ======
+# matplotlib 畫廊（GeminiCurator.plot_image）與 blit 畫廊（GalleryDisplay）共用的文字樣式；
+# 獨立成一個模組，GalleryDisplay 不必匯入 GeminiCurator（以 python GeminiCurator.py 執行時會載入第二份）。
+TITLE_STYLE = dict(
+    fontsize=30,
+    fontweight="bold",
+    color="black",
+    y=0.85,
+    linespacing=1.5,
+    horizontalalignment="center"
+)
+
+def title_text(statement: str) -> str:
+    texts = statement.split(":")[0]
+    # texts = texts.split(".")[0] + "."
+    return "\n".join(textwrap.wrap(texts, width=125))
+
+# 每張圖片下方的 caption（x=中間，y=圖片下方）
+CAPTION_STYLE = dict(
+    fontsize=10,
+    color="gray",
+    ha='center',  # 水平置中
+    va='top'      # 垂直對齊頂端
+)
+
+def caption_text(caption: str) -> str:
+    return textwrap.fill(caption, width=40)
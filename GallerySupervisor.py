@@ -0,0 +1,171 @@
+import argparse
+import asyncio
+import threading
+import time
+import traceback
+import GeminiAudience
+import Metrics
+
+# ====== Gallery Supervisor ======
+# 一個程序同時執行策展人與 N 位觀眾，每個都是獨立受管理的 task：
+#   curator              - 主執行緒（matplotlib 視窗必須在主執行緒）
+#   audiences            - 背景執行緒中的 asyncio event loop，所有觀眾共用一個 run_audiences，
+#                          每件新作品只讀取一次（失敗的個別觀眾由 run_audiences 自己重試）
+# 某個 task 崩潰時只重啟它自己；client、字型、figure、上傳快取、背景生成的展覽佇列都保留，
+# 不必像舊的 *Monitor.py 那樣 importlib.reload 整個模組、重建 client 與視窗。
+# 連續崩潰（執行不到 STABLE_SECONDS 就掛掉）時重啟間隔加倍，最長 MAX_BACKOFF 秒。
+# 只跑觀眾（--no-curator）時不匯入 GeminiCurator，不必載入 numpy / matplotlib。
+
+MIN_BACKOFF = 0.1
+MAX_BACKOFF = 60
+STABLE_SECONDS = 60
+
+
+class TaskState:
+    def __init__(self, name):
+        self.name = name
+        self.restarts = 0
+        self.backoff = 0.0
+        self.started_at = None
+        self.last_error = None
+
+    def crashed(self, error):
+        ran = time.monotonic() - self.started_at
+        self.restarts += 1
+        self.last_error = repr(error)
+        # 跑了夠久才掛掉的視為偶發錯誤，立即重啟；否則是 crash loop，逐步拉長間隔
+        self.backoff = MIN_BACKOFF if ran >= STABLE_SECONDS else min(MAX_BACKOFF, max(MIN_BACKOFF, self.backoff * 2))
+        Metrics.record("task_run", ran, outcome="error", task=self.name, error=type(error).__name__,
+                       restarts=self.restarts)
+        print("\n" + "=" * 60)
+        print(f"[ERROR] {self.name} 崩潰了（第 {self.restarts} 次），錯誤訊息：")
+        traceback.print_exception(type(error), error, error.__traceback__)
+        print("=" * 60)
+        print(f">>> {self.backoff:.1f} 秒後重啟 {self.name}...\n")
+        return self.backoff
+
+
+tasks = {}
+
+
+def _state(name):
+    return tasks.setdefault(name, TaskState(name))
+
+
+def supervise(name, run, before_restart=None):
+    """在目前執行緒反覆執行 run()；例外時只重啟這個 task。"""
+    state = _state(name)
+    while True:
+        state.started_at = time.monotonic()
+        try:
+            run()
+            return
+        except Exception as e:
+            time.sleep(state.crashed(e))
+            if before_restart is not None:
+                before_restart()
+
+
+async def supervise_async(name, run):
+    """同上，run 是回傳 coroutine 的函式，在同一個 event loop 中重啟。"""
+    state = _state(name)
+    while True:
+        state.started_at = time.monotonic()
+        try:
+            await run()
+            return
+        except Exception as e:
+            await asyncio.sleep(state.crashed(e))
+
+
+# ====== Managed Tasks ======
+async def run_audiences(personas):
+    await supervise_async("audiences", lambda: GeminiAudience.run_audiences(personas))
+
+
+def run_curator(prefetch=2, workers=1, dwell=3, transition=1, renderer="matplotlib", blit=False, queue_dir=None,
+                low_water=5, refill=10, concurrency=2):
+    import GeminiCurator
+    display = {}
+
+    def init():
+        display["fig"], display["axs"], display["gallery"] = GeminiCurator.init_display(renderer, blit)
+
+    def reset():
+        fig = display["fig"]
+        if fig is not None and not GeminiCurator.plt.fignum_exists(fig.number):
+            init()   # 視窗被關掉才重建，否則沿用同一個 figure
+            return
+        GeminiCurator.clear_display(fig, display["axs"], display["gallery"])
+
+    # 背景生成的 worker 與已準備好的展覽不隨顯示迴圈重啟；先送出第一個請求再建立視窗
+    pipeline = GeminiCurator.make_source(prefetch, workers, queue_dir, low_water, refill, concurrency)
+    init()
+    try:
+        supervise(
+            "curator",
+            lambda: GeminiCurator.run_gallery(display["fig"], display["axs"], pipeline, dwell, transition,
+                                              display["gallery"]),
+            before_restart=reset
+        )
+    finally:
+        if pipeline is not None:
+            pipeline.stop()
+
+
+def main(curator=True, count=3, personas=None, prefetch=2, workers=1, dwell=3, transition=1,
+         renderer="matplotlib", blit=False, metrics_port=None, use_handoff=False, upload_original=False,
+         component="gallery", use_stream=False, queue_dir=None, low_water=5, refill=10, concurrency=2,
+         review_mode="separate", track_resources=0):
+    if curator:
+        import GeminiCurator
+        GeminiCurator.setup(metrics_port, use_handoff, component=component, use_stream=use_stream,
+                            track_resources=track_resources)
+        metrics_port = None
+    GeminiAudience.setup(metrics_port, use_handoff, upload_original, component=component, use_stream=use_stream,
+                         mode=review_mode)
+    personas = GeminiAudience.make_personas(count) if personas is None else personas
+    print(f"🏛️ Supervisor 啟動：{'策展人 + ' if curator else ''}{len(personas)} 位觀眾")
+
+    if not curator:
+        asyncio.run(run_audiences(personas))
+        return
+    if personas:
+        threading.Thread(target=asyncio.run, args=(run_audiences(personas),), name="Audiences", daemon=True).start()
+    run_curator(prefetch, workers, dwell, transition, renderer, blit, queue_dir, low_water, refill, concurrency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the curator and N audiences as supervised tasks in one process.")
+    parser.add_argument("--audiences", type=int, default=3, help="number of audience personas (0 = curator only)")
+    parser.add_argument("--personas", help="JSON file with persona definitions (overrides --audiences)")
+    parser.add_argument("--no-curator", action="store_true", help="run only the audiences")
+    parser.add_argument("--prefetch", type=int, default=2, help="ready exhibitions to buffer (0 = serial loop)")
+    parser.add_argument("--workers", type=int, default=1, help="background generation workers")
+    parser.add_argument("--dwell", type=float, default=3, help="seconds each exhibition stays on display")
+    parser.add_argument("--transition", type=float, default=1, help="blank pause between exhibitions")
+    parser.add_argument("--renderer", choices=["matplotlib", "pillow"], default="matplotlib",
+                        help="pillow = headless compositor, no matplotlib/GUI needed")
+    parser.add_argument("--blit", action="store_true", help="blitted live display for the matplotlib gallery")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics over HTTP on this port")
+    parser.add_argument("--handoff", action="store_true",
+                        help="hand artworks from the curator to the audiences through shared memory")
+    parser.add_argument("--upload-original", action="store_true",
+                        help="upload the full archive PNG instead of the cached, size-optimised derivative")
+    parser.add_argument("--stream", action="store_true",
+                        help="stream statements (console + gallery title) and reviews as text arrives")
+    parser.add_argument("--review-mode", choices=GeminiAudience.REVIEW_MODES, default="separate",
+                        help="joint = one structured request (one image upload) for all personas")
+    parser.add_argument("--queue", help="display pre-generated exhibitions from this on-disk queue (see ExhibitionQueue.py)")
+    parser.add_argument("--low-water", type=int, default=5, help="refill the queue in the background below this many")
+    parser.add_argument("--refill", type=int, default=10, help="exhibitions generated per refill (0 = never refill)")
+    parser.add_argument("--concurrency", type=int, default=2, help="concurrent generations during a refill")
+    parser.add_argument("--track-resources", type=int, default=0, metavar="N",
+                        help="every N exhibitions, record RSS/tracemalloc/artists/open files to resource_report.jsonl")
+    args = parser.parse_args()
+    main(not args.no_curator, args.audiences,
+         GeminiAudience.load_personas(args.personas) if args.personas else None,
+         args.prefetch, args.workers, args.dwell, args.transition, args.renderer, args.blit,
+         args.metrics_port, args.handoff, args.upload_original, use_stream=args.stream,
+         queue_dir=args.queue, low_water=args.low_water, refill=args.refill, concurrency=args.concurrency,
+         review_mode=args.review_mode, track_resources=args.track_resources)
@@ -0,0 +1,290 @@
+from google.genai import types
+import argparse
+import asyncio
+import json
+import os
+import time
+import traceback
+import ArtworkWatcher
+import ExhibitionLog
+import FeedbackLedger
+import GeminiClient
+import Metrics
+import UploadCache
+
+# client 在第一次評論時才建立（見 GeminiClient.DeferredClient）
+client = GeminiClient.DeferredClient()
+
+# 共享記憶體 handoff（main(use_handoff=True) 時啟用，見 ArtworkHandoff.py）
+handoff = None
+# 上傳縮小後的衍生圖（見 UploadCache.py）；False 則上傳原始 PNG
+upload_derivatives = True
+# 串流模式（main(use_stream=True)）：評論一邊生成一邊印出
+stream = False
+# "separate"：每位觀眾各自送出一次請求（同一張圖上傳、計費 N 次）
+# "joint"：一次請求帶一張圖與所有觀眾的問題，要求以 JSON 陣列回傳每位觀眾的評論
+review_mode = "separate"
+REVIEW_MODES = ("separate", "joint")
+
+AUDIENCE_MODEL = "gemini-2.0-flash"
+AUDIENCE_PROMPT = "As an AI audience, how is your feeling when you look at this work?"
+JOINT_PROMPT = (
+    "You are {count} different AI audience members looking at this work together. "
+    "Each member below is asked their own question. Answer for every member separately, in their own voice, "
+    "as if the others were not there. Return a JSON array with one object per member: "
+    '{{"name": <member name>, "review": <their answer>}}.\n{members}'
+)
+MIME_TYPES = {".png": "image/png", ".jpg": "image/jpeg", ".jpeg": "image/jpeg"}
+# 某位觀眾評論失敗時，稍後只替他重試同一件作品（間隔每次加倍）；
+# 重試 REVIEW_RETRIES 次仍失敗就丟出 ReviewFailed，交給 GallerySupervisor / *Monitor.py 重啟
+REVIEW_RETRIES = int(os.environ.get("GEMINI_REVIEW_RETRIES", "3"))
+REVIEW_RETRY_DELAY = float(os.environ.get("GEMINI_REVIEW_RETRY_DELAY", "10"))
+
+
+class ReviewFailed(Exception):
+    pass
+
+# ---------- 觀眾設定 ----------
+def make_persona(index, prompt=AUDIENCE_PROMPT, name=None, feedback_file=None):
+    return {
+        "name": name or f"Audience{index}",
+        "feedback_file": feedback_file or f"audience_feedback{index}.txt",
+        "prompt": prompt,
+    }
+
+def make_personas(count=3):
+    return [make_persona(i + 1) for i in range(count)]
+
+def load_personas(path):
+    # JSON 陣列：[{"name": ..., "feedback_file": ..., "prompt": ...}, ...]
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    return [make_persona(i + 1, **entry) for i, entry in enumerate(entries)]
+
+# ---------- 檢查是否已經評論過 ----------
+def has_already_commented(image_path, filename="audience_feedback1.txt"):
+    image_name = os.path.basename(image_path)
+    if ExhibitionLog.get_log(ExhibitionLog.stream_for_file(filename)).has_image(image_name):
+        return True
+    if not os.path.exists(filename):
+        return False
+    # 結構化 log 是唯一的寫入來源；FeedbackLedger 只索引結構化 log 之前的舊文字檔紀錄
+    return FeedbackLedger.has_commented(image_name, filename)
+
+# ---------- 儲存觀眾回應 ----------
+def save_audience_response(response_text, image_path, filename="audience_feedback1.txt"):
+    image_name = os.path.basename(image_path)
+    with Metrics.stage("log_append", file=filename) as m:
+        record = ExhibitionLog.write_entry(filename, response_text, image=image_name)
+        m["bytes"] = len(record["text"].encode("utf-8"))
+    print(f"✅ 回應已儲存到 {filename}")
+
+# ---------- 讀取作品（每件作品只讀一次，所有觀眾共用） ----------
+def load_handoff_artwork(image_path):
+    # 策展人已把同一件作品的畫面放在共享記憶體：直接從映射的像素產生上傳用縮圖，不讀磁碟、不解碼 PNG
+    frame = handoff.read(os.path.basename(image_path))
+    if frame is None or not frame.key:
+        return None
+    with Metrics.stage("artwork_read", source="handoff") as fields:
+        result = UploadCache.derivative_for_image(frame.key, frame.image, frame.still_valid)
+        if result is None:
+            return None   # 讀取途中 slot 被覆寫，改從磁碟讀
+        data, mime_type, fields["cache_hit"] = result
+        fields["bytes"] = len(data)
+    return types.Part.from_bytes(data=data, mime_type=mime_type)
+
+def load_artwork(image_path):
+    if handoff is not None:
+        artwork = load_handoff_artwork(image_path)
+        if artwork is not None:
+            return artwork
+    if upload_derivatives:
+        with Metrics.stage("artwork_read", source="derivative") as fields:
+            data, mime_type, fields["cache_hit"] = UploadCache.derivative_for_file(image_path)
+            fields["bytes"] = len(data)
+        return types.Part.from_bytes(data=data, mime_type=mime_type)
+    with Metrics.stage("artwork_read", source="disk") as fields:
+        with open(image_path, "rb") as f:
+            data = f.read()
+        fields["bytes"] = len(data)
+    mime_type = MIME_TYPES.get(os.path.splitext(image_path)[1].lower(), "image/png")
+    return types.Part.from_bytes(data=data, mime_type=mime_type)
+
+# ---------- 單一觀眾評論 ----------
+async def stream_comment(persona, contents):
+    # 多位觀眾同時串流，每段文字前加上觀眾名稱以免混在一起
+    response_text = ""
+    chunks = await client.aio.models.generate_content_stream(model=AUDIENCE_MODEL, contents=contents)
+    async for chunk in chunks:
+        text = chunk.text or ""
+        if text:
+            print(f"🎤 {persona['name']} ▸ {text}", flush=True)
+            response_text += text
+    return response_text.strip()
+
+async def persona_comment(persona, artwork, image_path):
+    contents = [artwork, persona["prompt"]]
+    # 每位觀眾一筆 persona_review（失敗時 outcome="error"），個別觀眾的失敗率可以直接從 metrics 看出來
+    with Metrics.stage("persona_review", persona=persona["name"]):
+        if stream:
+            response_text = await stream_comment(persona, contents)
+            print(f"🎤 {persona['name']} 回應完成（{len(response_text)} 字）")
+        else:
+            response = await client.aio.models.generate_content(
+                model=AUDIENCE_MODEL,
+                contents=contents
+            )
+            response_text = response.text.strip()
+            print(f"🎤 {persona['name']} 回應：\n", response_text)
+    await asyncio.to_thread(save_audience_response, response_text, image_path, persona["feedback_file"])
+    return response_text
+
+# ---------- 所有觀眾一次請求（共用同一張圖的輸入 token） ----------
+def joint_request(personas, artwork):
+    members = "\n".join(f"- {p['name']}: {p['prompt']}" for p in personas)
+    schema = types.Schema(
+        type="ARRAY",
+        items=types.Schema(
+            type="OBJECT",
+            properties={"name": types.Schema(type="STRING"), "review": types.Schema(type="STRING")},
+            required=["name", "review"],
+        ),
+    )
+    return dict(
+        model=AUDIENCE_MODEL,
+        contents=[artwork, JOINT_PROMPT.format(count=len(personas), members=members)],
+        config=types.GenerateContentConfig(response_mime_type="application/json", response_schema=schema),
+    )
+
+def parse_joint_reviews(text, personas):
+    """回傳 {觀眾名稱: 評論}；JSON 壞掉或缺了某位觀眾時，缺的部分由呼叫端改用個別請求補上。"""
+    try:
+        entries = json.loads(text)
+    except (TypeError, ValueError):
+        return {}
+    names = {p["name"] for p in personas}
+    reviews = {}
+    for entry in entries if isinstance(entries, list) else []:
+        if isinstance(entry, dict) and entry.get("name") in names and str(entry.get("review", "")).strip():
+            reviews[entry["name"]] = str(entry["review"]).strip()
+    return reviews
+
+async def joint_comment(personas, artwork, image_path):
+    try:
+        with Metrics.stage("joint_review", personas=len(personas)) as fields:
+            response = await client.aio.models.generate_content(**joint_request(personas, artwork))
+            reviews = parse_joint_reviews(response.text, personas)
+            fields["parsed"] = len(reviews)
+    except Exception:
+        # 合併請求失敗（joint_review 記為 error）：不等重試，所有觀眾直接改為個別請求
+        print("❌ 合併評論請求失敗，改為個別請求：")
+        traceback.print_exc()
+        reviews = {}
+    for persona in personas:
+        if persona["name"] in reviews:
+            print(f"🎤 {persona['name']} 回應：\n", reviews[persona["name"]])
+            await asyncio.to_thread(
+                save_audience_response, reviews[persona["name"]], image_path, persona["feedback_file"]
+            )
+    missing = [p for p in personas if p["name"] not in reviews]
+    if missing:
+        print(f"⚠️ 合併評論中缺少 {', '.join(p['name'] for p in missing)}，改為個別請求")
+    fallback = await asyncio.gather(
+        *(persona_comment(p, artwork, image_path) for p in missing),
+        return_exceptions=True
+    )
+    reviews.update((p["name"], result) for p, result in zip(missing, fallback))
+    return [reviews[p["name"]] for p in personas]
+
+# ---------- 所有觀眾同時評論同一件作品 ----------
+async def review_artwork(image_path, personas):
+    """回傳 (觀眾名稱 → 評論, [(評論失敗的觀眾, 例外)])。"""
+    pending = [p for p in personas if not has_already_commented(image_path, p["feedback_file"])]
+    if not pending:
+        print(f"⚠️ 已對圖片 {os.path.basename(image_path)} 評論過，跳過本輪。")
+        return {}, []
+
+    print(f"\n👁️ {len(pending)} 位觀眾正在觀看 {os.path.basename(image_path)} 並留下回饋...")
+    artwork = await asyncio.to_thread(load_artwork, image_path)
+    if review_mode == "joint" and len(pending) > 1:
+        try:
+            results = await joint_comment(pending, artwork, image_path)
+        except Exception as e:
+            results = [e] * len(pending)
+    else:
+        results = await asyncio.gather(
+            *(persona_comment(p, artwork, image_path) for p in pending),
+            return_exceptions=True
+        )
+
+    responses, failed = {}, []
+    for persona, result in zip(pending, results):
+        if isinstance(result, Exception):
+            print(f"❌ {persona['name']} 評論 {os.path.basename(image_path)} 失敗：")
+            traceback.print_exception(type(result), result, result.__traceback__)
+            failed.append((persona, result))
+        else:
+            responses[persona["name"]] = result
+    return responses, failed
+
+# ---------- 主迴圈 ----------
+async def review_with_retry(image_path, personas, attempt, retries):
+    _, failed = await review_artwork(image_path, personas)
+    if not failed:
+        return
+    names = ", ".join(p["name"] for p, _ in failed)
+    if attempt >= REVIEW_RETRIES:
+        raise ReviewFailed(f"{names} 評論 {os.path.basename(image_path)} 重試 {attempt} 次仍失敗") from failed[0][1]
+    delay = REVIEW_RETRY_DELAY * 2 ** attempt
+    print(f"🔁 {delay:.0f} 秒後重試 {names} 對 {os.path.basename(image_path)} 的評論")
+    retries.append((time.monotonic() + delay, image_path, [p for p, _ in failed], attempt + 1))
+
+async def run_audiences(personas, folder="GeneratedImages"):
+    watcher = ArtworkWatcher.get_watcher(folder)
+    last_seen = None
+    retries = []   # (到期時間, 作品, 要重試的觀眾, 已重試次數)
+    while True:
+        # 等待策展人存下新作品；有待重試的評論時最多等到最早的重試時間
+        timeout = max(0.0, min(entry[0] for entry in retries) - time.monotonic()) if retries else 60
+        latest = await asyncio.to_thread(watcher.wait_for_new, last_seen, timeout)
+        if latest is not None:
+            last_seen = latest
+            await review_with_retry(latest, personas, 0, retries)
+        due = [entry for entry in retries if entry[0] <= time.monotonic()]
+        for entry in due:
+            retries.remove(entry)
+            await review_with_retry(*entry[1:], retries)
+
+def setup(metrics_port=None, use_handoff=False, upload_original=False, component="audience", use_stream=False,
+          mode="separate"):
+    global handoff, upload_derivatives, stream, review_mode
+    Metrics.configure(component, port=metrics_port)
+    upload_derivatives = not upload_original
+    stream = use_stream
+    review_mode = mode
+    if use_handoff and handoff is None:
+        import ArtworkHandoff
+        handoff = ArtworkHandoff.HandoffReader()
+
+def main(count=3, personas=None, metrics_port=None, use_handoff=False, upload_original=False, use_stream=False,
+         mode="separate"):
+    setup(metrics_port, use_handoff, upload_original, use_stream=use_stream, mode=mode)
+    personas = personas or make_personas(count)
+    print(f"👥 啟動 {len(personas)} 位 AI 觀眾：{', '.join(p['name'] for p in personas)}")
+    asyncio.run(run_audiences(personas))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run N AI audience personas in one process.")
+    parser.add_argument("--audiences", type=int, default=3, help="number of audience personas")
+    parser.add_argument("--personas", help="JSON file with persona definitions (overrides --audiences)")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics over HTTP on this port")
+    parser.add_argument("--handoff", action="store_true",
+                        help="read artworks from the curator's shared-memory ring buffer when available")
+    parser.add_argument("--upload-original", action="store_true",
+                        help="upload the full archive PNG instead of the cached, size-optimised derivative")
+    parser.add_argument("--stream", action="store_true", help="print each review as it is generated")
+    parser.add_argument("--review-mode", choices=REVIEW_MODES, default="separate",
+                        help="joint = one structured request (one image upload) for all personas")
+    args = parser.parse_args()
+    main(args.audiences, load_personas(args.personas) if args.personas else None, args.metrics_port, args.handoff,
+         args.upload_original, args.stream, args.review_mode)
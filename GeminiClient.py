@@ -0,0 +1,660 @@
+from google import genai
+from google.genai import errors, types
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import Metrics
+import RateLimiter
+
+# ====== Pluggable Gemini Client ======
+# 策展人與觀眾都透過 get_client() 取得 client，依 GEMINI_CLIENT_MODE 選擇後端：
+#   live   - 直接呼叫 Gemini API（預設）
+#   record - 呼叫 Gemini API，同時把每組 request/response（含 inline_data 圖片）存到 recordings/
+#   replay - 不連網，從 recordings/ 讀回錄好的回應，可設定延遲與錯誤率，用於離線測試與重現問題
+#   fake   - 不連網，產生合成的回應（基準測試、壓力測試用）
+# 每一層（錄音、替身、metrics、限流）都同時提供 generate_content 與 generate_content_stream。
+
+API_KEY = os.environ.get("GEMINI_API_KEY", "YOUR_API_KEY_HERE")
+CLIENT_MODE = os.environ.get("GEMINI_CLIENT_MODE", "live")
+RECORDINGS_DIR = os.environ.get("GEMINI_RECORDINGS", "recordings")
+REPLAY_LATENCY = float(os.environ.get("GEMINI_REPLAY_LATENCY", "0"))
+REPLAY_ERROR_RATE = float(os.environ.get("GEMINI_REPLAY_ERROR_RATE", "0"))
+REPLAY_SEED = int(os.environ.get("GEMINI_REPLAY_SEED", "0"))
+# 本機替身的串流：文字每 STREAM_CHUNK_CHARS 個字一個 chunk，延遲的 STREAM_FIRST_CHUNK 比例花在第一個 chunk 之前
+STREAM_CHUNK_CHARS = int(os.environ.get("GEMINI_STREAM_CHUNK_CHARS", "24"))
+STREAM_FIRST_CHUNK = 0.3
+
+IMAGE_EXTENSIONS = {"image/png": ".png", "image/jpeg": ".jpg", "image/webp": ".webp"}
+
+
+# ====== Request Fingerprint ======
+def _content_digest(item, digest):
+    if isinstance(item, str):
+        digest.update(item.encode("utf-8"))
+    elif isinstance(item, (list, tuple)):
+        for sub in item:
+            _content_digest(sub, digest)
+    elif isinstance(item, types.Part):
+        if item.inline_data is not None:
+            digest.update(hashlib.sha256(item.inline_data.data).digest())
+        else:
+            digest.update(item.model_dump_json(exclude_none=True).encode("utf-8"))
+    elif hasattr(item, "tobytes"):  # PIL.Image
+        digest.update(hashlib.sha256(item.tobytes()).digest())
+    elif hasattr(item, "model_dump_json"):
+        digest.update(item.model_dump_json(exclude_none=True).encode("utf-8"))
+    else:
+        digest.update(repr(item).encode("utf-8"))
+    digest.update(b"\0")
+
+
+def request_key(model, contents, config=None):
+    digest = hashlib.sha256(model.encode("utf-8"))
+    _content_digest(contents, digest)
+    if config is not None:
+        _content_digest(config, digest)
+    return digest.hexdigest()[:24]
+
+
+# ====== Recording Store ======
+class RecordingStore:
+    """
+    每個回應存成 <key>_<n>.json；圖片另存成 <key>_<n>_<candidate>_<part>.png 方便直接檢視。
+    index.jsonl 依序記錄 key / model / 檔名，回放時據此建立查詢表。
+    """
+
+    def __init__(self, folder=RECORDINGS_DIR):
+        self.folder = folder
+        self.index_path = os.path.join(folder, "index.jsonl")
+        self._lock = threading.Lock()
+        self.by_key = {}
+        self.by_model = {}
+        os.makedirs(folder, exist_ok=True)
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._add(entry["key"], entry["model"], entry["file"])
+
+    def _add(self, key, model, filename):
+        self.by_key.setdefault(key, []).append(filename)
+        self.by_model.setdefault(model, []).append(filename)
+
+    def save(self, key, model, response, elapsed=None):
+        with self._lock:
+            n = len(self.by_key.get(key, []))
+            stem = f"{key}_{n}"
+            data = response.model_dump(mode="json", exclude_none=True, exclude={"sdk_http_response"})
+            # 圖片直接寫 part.inline_data.data 的 bytes（JSON dump 裡是 URL-safe、無 padding 的 base64）
+            for c, candidate in enumerate(response.candidates or []):
+                parts = (candidate.content.parts if candidate.content else None) or []
+                for i, part in enumerate(parts):
+                    if part.inline_data is None or part.inline_data.data is None:
+                        continue
+                    blob = data["candidates"][c]["content"]["parts"][i]["inline_data"]
+                    image_file = f"{stem}_{c}_{i}{IMAGE_EXTENSIONS.get(part.inline_data.mime_type, '.bin')}"
+                    with open(os.path.join(self.folder, image_file), "wb") as f:
+                        f.write(part.inline_data.data)
+                    blob.pop("data", None)
+                    blob["file"] = image_file
+            record = {"model": model, "elapsed": elapsed, "response": data}
+            filename = f"{stem}.json"
+            with open(os.path.join(self.folder, filename), "w", encoding="utf-8") as f:
+                json.dump(record, f, ensure_ascii=False, indent=2)
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, "model": model, "file": filename}) + "\n")
+            self._add(key, model, filename)
+
+    def load(self, filename):
+        with open(os.path.join(self.folder, filename), "r", encoding="utf-8") as f:
+            record = json.load(f)
+        data = record["response"]
+        for candidate in data.get("candidates", []):
+            for part in candidate.get("content", {}).get("parts", []):
+                blob = part.get("inline_data")
+                if blob and "file" in blob:
+                    with open(os.path.join(self.folder, blob.pop("file")), "rb") as f:
+                        blob["data"] = f.read()
+        return types.GenerateContentResponse.model_validate(data)
+
+
+# ====== Streaming Helpers ======
+def _response_parts(response):
+    candidates = getattr(response, "candidates", None) or []
+    content = candidates[0].content if candidates else None
+    return list(getattr(content, "parts", None) or [])
+
+
+def _make_response(parts, usage_metadata=None):
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=parts))],
+        usage_metadata=usage_metadata
+    )
+
+
+def split_stream(response, chunk_chars=STREAM_CHUNK_CHARS):
+    """把完整 response 切成串流 chunk：文字分段，圖片等其他 part 與 usage_metadata 放在最後一個 chunk。"""
+    parts = _response_parts(response)
+    text = "".join(part.text for part in parts if part.text)
+    others = [part for part in parts if not part.text]
+    pieces = [text[i:i + chunk_chars] for i in range(0, len(text), chunk_chars)] or [""]
+    chunks = []
+    for i, piece in enumerate(pieces):
+        last = i == len(pieces) - 1
+        chunk_parts = ([types.Part(text=piece)] if piece else []) + (others if last else [])
+        chunks.append(_make_response(chunk_parts, response.usage_metadata if last else None))
+    return chunks
+
+
+def merge_stream(chunks):
+    """把串流 chunk 合併回一個完整 response（錄音用）。"""
+    text = ""
+    others = []
+    usage_metadata = None
+    for chunk in chunks:
+        for part in _response_parts(chunk):
+            if part.text:
+                text += part.text
+            else:
+                others.append(part)
+        usage_metadata = chunk.usage_metadata or usage_metadata
+    return _make_response(([types.Part(text=text)] if text else []) + others, usage_metadata)
+
+
+class AsyncModels:
+    # 對應 genai.Client().aio，只提供 .models
+    def __init__(self, models):
+        self.models = models
+
+
+# ====== Recording Proxy ======
+class RecordingModels:
+    def __init__(self, models, store):
+        self._models = models
+        self._store = store
+
+    def generate_content(self, *, model, contents, config=None, **kwargs):
+        start = time.perf_counter()
+        response = self._models.generate_content(model=model, contents=contents, config=config, **kwargs)
+        self._store.save(request_key(model, contents, config), model, response, time.perf_counter() - start)
+        return response
+
+    def generate_content_stream(self, *, model, contents, config=None, **kwargs):
+        start = time.perf_counter()
+        chunks = []
+        for chunk in self._models.generate_content_stream(model=model, contents=contents, config=config, **kwargs):
+            chunks.append(chunk)
+            yield chunk
+        self._store.save(request_key(model, contents, config), model, merge_stream(chunks), time.perf_counter() - start)
+
+
+class AsyncRecordingModels:
+    def __init__(self, models, store):
+        self._models = models
+        self._store = store
+
+    async def generate_content(self, *, model, contents, config=None, **kwargs):
+        start = time.perf_counter()
+        response = await self._models.generate_content(model=model, contents=contents, config=config, **kwargs)
+        await asyncio.to_thread(
+            self._store.save, request_key(model, contents, config), model, response, time.perf_counter() - start
+        )
+        return response
+
+    async def generate_content_stream(self, *, model, contents, config=None, **kwargs):
+        start = time.perf_counter()
+        stream = await self._models.generate_content_stream(model=model, contents=contents, config=config, **kwargs)
+
+        async def recorded():
+            chunks = []
+            async for chunk in stream:
+                chunks.append(chunk)
+                yield chunk
+            await asyncio.to_thread(
+                self._store.save, request_key(model, contents, config), model, merge_stream(chunks),
+                time.perf_counter() - start
+            )
+
+        return recorded()
+
+
+class RecordingClient:
+    def __init__(self, client, store):
+        self._client = client
+        self.models = RecordingModels(client.models, store)
+        self.aio = AsyncModels(AsyncRecordingModels(client.aio.models, store))
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+# ====== Local Stand-ins (shared latency / error injection) ======
+class StandInModels:
+    """
+    本機替身的共同部分：延遲（指數分布，平均 latency 秒）與錯誤由固定 seed 的亂數產生，
+    因此每次執行結果可重現。子類別實作 _select（在鎖內決定回應）與 _build（產生回應物件）。
+    """
+
+    def __init__(self, latency=REPLAY_LATENCY, error_rate=REPLAY_ERROR_RATE, seed=REPLAY_SEED):
+        self.latency = latency
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _next(self, model, contents, config):
+        with self._lock:
+            handle = self._select(model, contents, config)
+            delay = self._random.expovariate(1 / self.latency) if self.latency > 0 else 0
+            failed = self._random.random() < self.error_rate
+        return handle, delay, failed
+
+    def _respond(self, handle, failed):
+        if failed:
+            raise errors.ServerError(503, {"error": {"code": 503, "message": "injected stand-in error", "status": "UNAVAILABLE"}})
+        return self._build(handle)
+
+    def generate_content(self, *, model, contents, config=None, **kwargs):
+        handle, delay, failed = self._next(model, contents, config)
+        time.sleep(delay)
+        return self._respond(handle, failed)
+
+    def generate_content_stream(self, *, model, contents, config=None, **kwargs):
+        handle, delay, failed = self._next(model, contents, config)
+        time.sleep(delay * STREAM_FIRST_CHUNK)
+        chunks = split_stream(self._respond(handle, failed))
+        for i, chunk in enumerate(chunks):
+            if i:
+                time.sleep(delay * (1 - STREAM_FIRST_CHUNK) / len(chunks))
+            yield chunk
+
+
+class AsyncStandInModels:
+    def __init__(self, models):
+        self._models = models
+
+    async def generate_content(self, *, model, contents, config=None, **kwargs):
+        handle, delay, failed = self._models._next(model, contents, config)
+        await asyncio.sleep(delay)
+        return await asyncio.to_thread(self._models._respond, handle, failed)
+
+    async def generate_content_stream(self, *, model, contents, config=None, **kwargs):
+        handle, delay, failed = self._models._next(model, contents, config)
+
+        async def stream():
+            await asyncio.sleep(delay * STREAM_FIRST_CHUNK)
+            chunks = split_stream(await asyncio.to_thread(self._models._respond, handle, failed))
+            for i, chunk in enumerate(chunks):
+                if i:
+                    await asyncio.sleep(delay * (1 - STREAM_FIRST_CHUNK) / len(chunks))
+                yield chunk
+
+        return stream()
+
+
+class StandInClient:
+    def __init__(self, models):
+        self.models = models
+        self.aio = AsyncModels(AsyncStandInModels(models))
+
+
+# ====== Replay Backend ======
+class ReplayModels(StandInModels):
+    """
+    先以完整 request 指紋比對；找不到時（例如觀眾看的是新圖）退回同一個 model 的錄音，
+    依序輪流回放。
+    """
+
+    def __init__(self, store, latency=REPLAY_LATENCY, error_rate=REPLAY_ERROR_RATE, seed=REPLAY_SEED):
+        super().__init__(latency, error_rate, seed)
+        self.store = store
+        self._cursors = {}
+
+    def _select(self, model, contents, config):
+        key = request_key(model, contents, config)
+        if key in self.store.by_key:
+            pool_name, pool = key, self.store.by_key[key]
+        elif model in self.store.by_model:
+            pool_name, pool = model, self.store.by_model[model]
+        else:
+            raise LookupError(f"沒有 {model} 的錄音，請先以 GEMINI_CLIENT_MODE=record 錄製")
+        cursor = self._cursors.get(pool_name, 0)
+        self._cursors[pool_name] = cursor + 1
+        return pool[cursor % len(pool)]
+
+    def _build(self, filename):
+        return self.store.load(filename)
+
+
+def replay_client(store, latency=REPLAY_LATENCY, error_rate=REPLAY_ERROR_RATE, seed=REPLAY_SEED):
+    return StandInClient(ReplayModels(store, latency, error_rate, seed))
+
+
+# ====== Fake Backend (synthetic responses, no recordings needed) ======
+FAKE_VOCABULARY = (
+    "luminous recursive fractal lattice neural signal glitch symmetry entropy vector "
+    "spectral algorithmic cascade quantum mirror topology gradient pulse archive "
+    "synthetic horizon code resonance infinite emergent silicon dream"
+).split()
+# 每張圖片約 258 個輸入 token（Gemini 的圖片計價單位）；文字以 4 字元 ≈ 1 token 估算
+FAKE_IMAGE_TOKENS = 258
+# 多觀眾合併評論（GeminiAudience review_mode="joint"）的提示中，每位觀眾一行「- 名稱: 問題」
+FAKE_PERSONA_LINE = re.compile(r"^- ([^:\n]+):", flags=re.MULTILINE)
+
+
+def _prompt_parts(contents):
+    for item in contents if isinstance(contents, list) else [contents]:
+        if isinstance(item, str):
+            yield item, None
+        else:
+            yield getattr(item, "text", None), getattr(item, "inline_data", None) or getattr(item, "file_data", None)
+
+
+def fake_prompt_tokens(contents):
+    tokens = 0
+    for text, media in _prompt_parts(contents):
+        tokens += len(text or "") // 4 + (FAKE_IMAGE_TOKENS if media is not None else 0)
+    return tokens
+
+
+class FakeModels(StandInModels):
+    """
+    產生合成的策展論述、三聯圖（含 work1-3 圖說）與觀眾回應，用於壓力測試與基準測試。
+    圖片為固定 seed 的雜訊（PNG 壓縮特性接近真實生成圖），預先產生幾張後輪流使用。
+    """
+
+    def __init__(self, latency=REPLAY_LATENCY, error_rate=REPLAY_ERROR_RATE, seed=REPLAY_SEED,
+                 image_size=(1024, 1024), image_variants=4):
+        super().__init__(latency, error_rate, seed)
+        self.image_size = image_size
+        self.image_variants = image_variants
+        self._images = {}
+        self.calls = 0
+        self.usage = {}     # model -> {"calls", "prompt_tokens", "candidates_tokens"}
+
+    def _sentence(self, words):
+        return " ".join(self._random.choice(FAKE_VOCABULARY) for _ in range(words))
+
+    def _select(self, model, contents, config):
+        self.calls += 1
+        modalities = getattr(config, "response_modalities", None) or []
+        if "IMAGE" in modalities:
+            captions = " ".join(f"work{i + 1}: {self._sentence(12).capitalize()}." for i in range(3))
+            handle = {"text": captions, "image": self.calls % self.image_variants}
+        elif getattr(config, "response_mime_type", None) == "application/json":
+            prompt = "\n".join(text for text, _ in _prompt_parts(contents) if text)
+            reviews = [{"name": name.strip(), "review": f"I feel {self._sentence(40)}."}
+                       for name in FAKE_PERSONA_LINE.findall(prompt)]
+            handle = {"text": json.dumps(reviews)}
+        elif isinstance(contents, str):
+            title = self._sentence(6).title()
+            handle = {"text": f"{title}: {self._sentence(60)}."}
+        else:
+            handle = {"text": f"I feel {self._sentence(40)}."}
+        handle["prompt_tokens"] = fake_prompt_tokens(contents)
+        handle["candidates_tokens"] = len(handle["text"]) // 4
+        usage = self.usage.setdefault(model, {"calls": 0, "prompt_tokens": 0, "candidates_tokens": 0})
+        usage["calls"] += 1
+        usage["prompt_tokens"] += handle["prompt_tokens"]
+        usage["candidates_tokens"] += handle["candidates_tokens"]
+        return handle
+
+    def _image_bytes(self, variant):
+        data = self._images.get(variant)
+        if data is None:
+            from PIL import Image
+            from io import BytesIO
+            width, height = self.image_size
+            noise = random.Random(variant).randbytes(width * height * 3)
+            image = Image.frombytes("RGB", (width, height), noise)
+            # 三等分各自染色，才像三張不同的作品（通過 Triptych 的接縫檢查）
+            third = width // 3
+            for i, tint in enumerate(((200, 60, 60), (60, 200, 60), (60, 60, 200))):
+                box = (i * third, 0, (i + 1) * third, height)
+                image.paste(Image.blend(image.crop(box), Image.new("RGB", (third, height), tint), 0.5), box[:2])
+            buffer = BytesIO()
+            image.save(buffer, "PNG")
+            data = self._images[variant] = buffer.getvalue()
+        return data
+
+    def _build(self, handle):
+        parts = [types.Part(text=handle["text"])]
+        if "image" in handle:
+            parts.append(types.Part(inline_data=types.Blob(data=self._image_bytes(handle["image"]), mime_type="image/png")))
+        prompt_tokens, tokens = handle["prompt_tokens"], handle["candidates_tokens"]
+        return types.GenerateContentResponse(
+            candidates=[types.Candidate(content=types.Content(role="model", parts=parts))],
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt_tokens, candidates_token_count=tokens,
+                total_token_count=prompt_tokens + tokens
+            )
+        )
+
+
+def fake_client(latency=REPLAY_LATENCY, error_rate=REPLAY_ERROR_RATE, seed=REPLAY_SEED, **kwargs):
+    return StandInClient(FakeModels(latency, error_rate, seed, **kwargs))
+
+
+# ====== Instrumented Proxy (Metrics) ======
+def _count_chunk(fields, chunk, start):
+    # 串流呼叫：累加各 chunk 的位元組，記錄第一個 chunk 的時間；token 用量以最後一個有值的 chunk 為準
+    fields.setdefault("first_chunk_s", round(time.perf_counter() - start, 6))
+    chunk_fields = Metrics.response_fields(chunk)
+    fields["response_bytes"] = fields.get("response_bytes", 0) + chunk_fields.pop("response_bytes")
+    fields.update(chunk_fields)
+
+
+class InstrumentedModels:
+    def __init__(self, models):
+        self._models = models
+
+    def generate_content(self, *, model, contents, config=None, **kwargs):
+        with Metrics.stage("model_call", model=model, request_bytes=Metrics.payload_bytes(contents)) as fields:
+            response = self._models.generate_content(model=model, contents=contents, config=config, **kwargs)
+            fields.update(Metrics.response_fields(response))
+        return response
+
+    def generate_content_stream(self, *, model, contents, config=None, **kwargs):
+        with Metrics.stage("model_call", model=model, stream=True, request_bytes=Metrics.payload_bytes(contents)) as fields:
+            start = time.perf_counter()
+            for chunk in self._models.generate_content_stream(model=model, contents=contents, config=config, **kwargs):
+                _count_chunk(fields, chunk, start)
+                yield chunk
+
+
+class AsyncInstrumentedModels:
+    def __init__(self, models):
+        self._models = models
+
+    async def generate_content(self, *, model, contents, config=None, **kwargs):
+        with Metrics.stage("model_call", model=model, request_bytes=Metrics.payload_bytes(contents)) as fields:
+            response = await self._models.generate_content(model=model, contents=contents, config=config, **kwargs)
+            fields.update(Metrics.response_fields(response))
+        return response
+
+    async def generate_content_stream(self, *, model, contents, config=None, **kwargs):
+        async def instrumented():
+            with Metrics.stage("model_call", model=model, stream=True,
+                               request_bytes=Metrics.payload_bytes(contents)) as fields:
+                start = time.perf_counter()
+                stream = await self._models.generate_content_stream(
+                    model=model, contents=contents, config=config, **kwargs
+                )
+                async for chunk in stream:
+                    _count_chunk(fields, chunk, start)
+                    yield chunk
+
+        return instrumented()
+
+
+class InstrumentedClient:
+    def __init__(self, client):
+        self._client = client
+        self.models = InstrumentedModels(client.models)
+        self.aio = AsyncModels(AsyncInstrumentedModels(client.aio.models))
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+# ====== Throttled Proxy (shared rate limit + retry) ======
+def request_priority(config):
+    # 策展人的圖片生成（response_modalities 含 IMAGE）優先於其他請求
+    modalities = getattr(config, "response_modalities", None) or []
+    return RateLimiter.HIGH if "IMAGE" in modalities else RateLimiter.NORMAL
+
+
+def _retry_delay(bucket, model, attempt, error):
+    """可以重試時回傳等待秒數，否則回傳 None（由呼叫端重新拋出）。"""
+    if not RateLimiter.is_retryable(error) or attempt == RateLimiter.RETRY_ATTEMPTS - 1:
+        return None
+    delay = RateLimiter.backoff_delay(attempt, error)
+    if bucket is not None and getattr(error, "code", None) == 429:
+        bucket.block(delay)
+    print(f"⚠️ {model} 呼叫失敗（{error}），{delay:.1f} 秒後重試（第 {attempt + 1} 次）")
+    return delay
+
+
+class ThrottledModels:
+    def __init__(self, models, bucket=None):
+        self._models = models
+        self._bucket = bucket
+
+    def _acquire(self, model, config):
+        if self._bucket is not None:
+            with Metrics.stage("rate_limit_wait", model=model):
+                self._bucket.acquire(request_priority(config))
+
+    def generate_content(self, *, model, contents, config=None, **kwargs):
+        for attempt in range(RateLimiter.RETRY_ATTEMPTS):
+            self._acquire(model, config)
+            try:
+                return self._models.generate_content(model=model, contents=contents, config=config, **kwargs)
+            except Exception as e:
+                delay = _retry_delay(self._bucket, model, attempt, e)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+
+    def generate_content_stream(self, *, model, contents, config=None, **kwargs):
+        for attempt in range(RateLimiter.RETRY_ATTEMPTS):
+            self._acquire(model, config)
+            started = False
+            try:
+                for chunk in self._models.generate_content_stream(model=model, contents=contents, config=config, **kwargs):
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                # 已經送出部分內容就不能重來，只有第一個 chunk 之前的錯誤才重試
+                delay = None if started else _retry_delay(self._bucket, model, attempt, e)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+
+
+class AsyncThrottledModels:
+    def __init__(self, models, bucket=None):
+        self._models = models
+        self._bucket = bucket
+
+    async def _acquire(self, model, config):
+        if self._bucket is not None:
+            with Metrics.stage("rate_limit_wait", model=model):
+                await self._bucket.acquire_async(request_priority(config))
+
+    async def generate_content(self, *, model, contents, config=None, **kwargs):
+        for attempt in range(RateLimiter.RETRY_ATTEMPTS):
+            await self._acquire(model, config)
+            try:
+                return await self._models.generate_content(model=model, contents=contents, config=config, **kwargs)
+            except Exception as e:
+                delay = _retry_delay(self._bucket, model, attempt, e)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+
+    async def generate_content_stream(self, *, model, contents, config=None, **kwargs):
+        async def throttled():
+            for attempt in range(RateLimiter.RETRY_ATTEMPTS):
+                await self._acquire(model, config)
+                started = False
+                try:
+                    stream = await self._models.generate_content_stream(
+                        model=model, contents=contents, config=config, **kwargs
+                    )
+                    async for chunk in stream:
+                        started = True
+                        yield chunk
+                    return
+                except Exception as e:
+                    delay = None if started else _retry_delay(self._bucket, model, attempt, e)
+                    if delay is None:
+                        raise
+                    await asyncio.sleep(delay)
+
+        return throttled()
+
+
+class ThrottledClient:
+    def __init__(self, client, bucket=None):
+        self._client = client
+        self.models = ThrottledModels(client.models, bucket)
+        self.aio = AsyncModels(AsyncThrottledModels(client.aio.models, bucket))
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+# ====== Client Factory ======
+def create_client(mode=CLIENT_MODE, recordings=RECORDINGS_DIR):
+    if mode == "live":
+        client = genai.Client(api_key=API_KEY)
+    elif mode == "record":
+        client = RecordingClient(genai.Client(api_key=API_KEY), RecordingStore(recordings))
+    elif mode == "replay":
+        client = replay_client(RecordingStore(recordings))
+    elif mode == "fake":
+        client = fake_client()
+    else:
+        raise ValueError(f"未知的 GEMINI_CLIENT_MODE：{mode}（可用 live / record / replay / fake）")
+    if Metrics.enabled():
+        client = InstrumentedClient(client)
+    # 每次嘗試各記錄一筆 model_call；只有真的連到 API 的模式才共用配額
+    bucket = RateLimiter.get_bucket() if mode in ("live", "record") and RateLimiter.RATE_LIMIT_RPM > 0 else None
+    return ThrottledClient(client, bucket)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = create_client()
+        return _client
+
+
+def use_client(client):
+    # 指定之後 get_client() 回傳的 client（基準測試、壓力測試用）；需在第一次請求前呼叫
+    global _client
+    with _client_lock:
+        _client = client
+        return client
+
+
+class DeferredClient:
+    """
+    模組層級的 client 佔位：匯入策展人/觀眾模組時不建立 client，
+    第一次存取 .models / .aio 時才呼叫 get_client()。
+    """
+
+    def __getattr__(self, name):
+        return getattr(get_client(), name)
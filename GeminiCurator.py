@@ -1,16 +1,40 @@
-from google import genai
 from google.genai import types
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-import textwrap
-from PIL import Image
-from io import BytesIO
 import os
-from datetime import datetime
+import argparse
+import itertools
+import queue
 import re
+import threading
+import time
+import traceback
+import ArtworkArchive
+import ExhibitionLog
+import GeminiClient
+import Metrics
+import PillowCompositor
+import StatementIndex
+import Triptych
+from GalleryStyle import CAPTION_STYLE, TITLE_STYLE, caption_text, title_text
+
+try:
+    import matplotlib.pyplot as plt
+    import matplotlib.patches as patches
+except ImportError:  # 無頭渲染節點（--renderer pillow）可以不安裝 matplotlib
+    plt = None
+    patches = None
 
 # ====== Gemini Client API======
-client = genai.Client(api_key="YOUR_API_KEY_HERE")
+# 後端（live / record / replay）與 API key 設定見 GeminiClient.py；第一次請求時才建立
+client = GeminiClient.DeferredClient()
+
+# ====== Shared-memory Handoff (main(handoff=True) 時啟用) ======
+handoff = None
+# 資源追蹤（main(track_resources=N) 時每 N 輪記錄一次，見 ResourceMonitor.py）
+tracker = None
+# 存檔解析度（浸泡測試調低以加快速度）
+SAVE_DPI = 300
+# 串流模式（main(stream=True)）：論述逐字出現在終端機與畫面標題，完成後立刻交給圖片階段
+stream = False
 
 # ====== Curator Prompt ======
 curator_prompt = '''
@@ -21,8 +45,8 @@ Make sure the curatorial statement can inspire a generative image model to creat
 '''
 
 # ====== Generate Curatorial Statement ======
-def generate_exhibition_statement(prompt):
-    response = client.models.generate_content(
+def generate_exhibition_statement(prompt, on_text=None):
+    request = dict(
         model="gemini-1.5-flash",
         contents=prompt,
         config=types.GenerateContentConfig(
@@ -30,10 +54,61 @@ def generate_exhibition_statement(prompt):
         temperature=1.0
         )
     )
+    if stream:
+        return stream_exhibition_statement(request, on_text)
+    response = client.models.generate_content(**request)
     statement = response.text
     print("🎯 策展論述：\n", statement)
     return statement
 
+def stream_exhibition_statement(request: dict, on_text=None) -> str:
+    # on_text(目前為止的論述)：每收到一段文字就呼叫，例如逐步更新畫面標題
+    print("🎯 策展論述：")
+    statement = ""
+    for chunk in client.models.generate_content_stream(**request):
+        text = chunk.text or ""
+        if not text:
+            continue
+        print(text, end="", flush=True)
+        statement += text
+        if on_text is not None:
+            on_text(statement)
+    print()
+    return statement
+
+# ====== Skip Near-duplicate Statements (before the expensive image call) ======
+def generate_novel_statement(prompt, on_text=None):
+    """
+    產生與過去論述不重複的策展論述（見 StatementIndex.py）。相似度超過門檻時重新生成，
+    最多 DUPLICATE_RETRIES 次；仍然重複就採用其中最不相似的一則，不讓展覽停擺。
+    回傳的論述已在索引中保留（其他 worker 不會同時採用相似的論述），作品存檔後由 settle_statement() 寫入。
+    """
+    index = StatementIndex.get_index()
+    best, best_score = None, None
+    for attempt in range(StatementIndex.DUPLICATE_RETRIES + 1):
+        statement = generate_exhibition_statement(prompt, on_text)
+        with Metrics.stage("duplicate_check") as fields:
+            reserved, score = index.reserve(statement)
+            fields["similarity"] = round(score, 3)
+        if reserved:
+            return statement
+        if best_score is None or score < best_score:
+            best, best_score = statement, score
+        if attempt < StatementIndex.DUPLICATE_RETRIES:
+            print(f"🔁 論述與過去的展覽過於相似（{score:.2f}），重新生成（{attempt + 1}/{StatementIndex.DUPLICATE_RETRIES}）")
+        else:
+            print(f"⚠️ 重新生成後仍然相似，採用最不相似的論述（{best_score:.2f}）")
+    index.reserve(best, force=True)
+    return best
+
+def settle_statement(statement, image_path):
+    # 作品存檔後才把論述寫入相似度索引；沒有展出就放掉保留
+    index = StatementIndex.get_index()
+    if image_path:
+        index.commit(statement)
+    else:
+        index.release(statement)
+
 # ====== Extract Captions from Gemini Text Response ======
 def extract_captions(text_response):
     pattern = r"(work\d+:\s*)(.*?)(?=work\d+:|$)"  
@@ -46,12 +121,8 @@ def extract_captions(text_response):
 
     return captions[:3]
 
-# ====== Generate Image Based on Statement ======
-def generate_image_from_statement(statement: str, save_dir: str = "GeneratedImages", fig=None, axs=None) -> tuple[str, str]:
-    os.makedirs(save_dir, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    image_path = os.path.join(save_dir, f"generated_exhibition_{timestamp}.png")
-
+# ====== Request Triptych Image from Gemini ======
+def request_exhibition_image(statement: str) -> tuple[bytes, str]:
     response = client.models.generate_content(
         model="gemini-2.0-flash-exp-image-generation",
         contents=[
@@ -71,32 +142,151 @@ def generate_image_from_statement(statement: str, save_dir: str = "GeneratedImag
             image_data = part.inline_data.data
         elif part.text:
             text_response += part.text.strip() + "\n"
+    return image_data, text_response
+
+# ====== Split Model Image into Three Panels ======
+def split_triptych(image_data: bytes) -> tuple:
+    # 三張圖都是同一個 ndarray 的 view（見 Triptych.py），不再各自 crop 複製；回傳 (原圖, ndarray, panels)
+    with Metrics.stage("decode", bytes=len(image_data)):
+        image = Triptych.decode(image_data)
+    with Metrics.stage("split"):
+        array, panels = Triptych.split(image)
+    return image, array, panels
+
+def request_triptych(statement: str) -> tuple[bytes, str, list]:
+    """
+    生成三聯圖並在存檔前檢查品質（空白 panel、沒有接縫、比例不對）；不合格就重新生成，
+    最多 Triptych.IMAGE_RETRIES 次，仍不合格回傳 (None, 文字, [])：這檔展覽不會展出，也不會驚動觀眾。
+    """
+    for attempt in range(Triptych.IMAGE_RETRIES + 1):
+        image_data, text_response = request_exhibition_image(statement)
+        if not image_data:
+            return None, text_response, []
+        image, array, panels = split_triptych(image_data)
+        with Metrics.stage("quality_gate") as fields:
+            result = Triptych.check(image.size, array, panels)
+            fields["problems"] = len(result["problems"])
+        if not result["problems"]:
+            return image_data, text_response, panels
+        print(f"🚫 三聯圖未通過品質檢查：{', '.join(result['problems'])}（{attempt + 1}/{Triptych.IMAGE_RETRIES + 1}）")
+    return None, text_response, []
+
+# ====== Prepare One Exhibition (network + decode, no display) ======
+def request_exhibition(prompt: str = curator_prompt, on_text=None) -> dict:
+    # 只有網路部分：策展論述與未解碼的原始圖片（也是 ExhibitionQueue 存在磁碟上的內容）
+    statement = generate_novel_statement(prompt, on_text)
+    try:
+        image_data, text_response, images = request_triptych(statement)
+    except Exception:
+        settle_statement(statement, None)
+        raise
+    if not image_data:
+        settle_statement(statement, None)
+    return {"statement": statement, "image_data": image_data, "text_response": text_response, "images": images}
+
+def build_exhibition(raw: dict) -> dict:
+    image_data, text_response = raw["image_data"], raw["text_response"]
+    images = raw.get("images")
+    if images is None:
+        # 從 ExhibitionQueue 取出的只有原始圖片（已在生產端通過品質檢查）
+        images = split_triptych(image_data)[2] if image_data else []
+    return {
+        "statement": raw["statement"],
+        "images": images,
+        "captions": raw.get("captions") or extract_captions(text_response),
+        "text_response": text_response.strip(),
+    }
+
+def prepare_exhibition(prompt: str = curator_prompt, on_text=None) -> dict:
+    """
+    產生一檔展覽所需的全部內容（策展論述、三聯圖、圖說），不碰 matplotlib，
+    因此可以在背景執行緒中預先準備下一檔展覽。
+    """
+    return build_exhibition(request_exhibition(prompt, on_text))
 
-    if image_data:
-        image = Image.open(BytesIO(image_data))
-        width, _ = image.size
-        image = image.resize((width, width//3), Image.LANCZOS)
-        split_width = width // 3
-        image1 = image.crop((0, 0, split_width, width//3))
-        image2 = image.crop((split_width, 0, split_width * 2, width//3))
-        image3 = image.crop((split_width * 2, 0, width, width//3))
-        
-        raw_parts = text_response.strip().split("work")[1:]  # 第一個是空的，跳過
-        captions = extract_captions(text_response)
-        while len(captions) < 3:
-            captions.append("No caption available.")
-        captions = captions[:3]
-        plot_image([image1, image2, image3], fig, axs, statement, captions)
-        plt.pause(3)
-        plt.savefig(image_path, bbox_inches='tight', dpi=300)
-
-
-    if not image_path:
+# ====== Display and Archive One Exhibition ======
+def show_exhibition(exhibition: dict, fig, axs, save_dir: str = "GeneratedImages", render_pause: float = 3, gallery=None):
+    """
+    展示並存檔一檔展覽。fig 為 None 時使用無頭模式：以 Pillow 直接合成框線、三聯圖與文字，
+    不需要 matplotlib 或 GUI；有 gallery（GalleryDisplay.BlitGallery）時只以 blit 更新圖片與文字。
+    """
+    if not exhibition["images"]:
         print("⚠️ 未成功產生圖片")
+        return None
+
+    # 日期分層、不會碰撞的檔名；存檔完成後才登錄並更新 LATEST，觀眾不會讀到寫到一半的檔案
+    archive = ArtworkArchive.get_archive(save_dir)
+    image_path = archive.new_path()
+    render_and_save(exhibition, image_path, fig, axs, render_pause, gallery)
+    with Metrics.stage("archive_register"):
+        archive.register(image_path)
+    if fig is None:
+        pause(render_pause, fig)
+    return image_path
+
+def render_and_save(exhibition: dict, image_path: str, fig, axs, render_pause: float = 3, gallery=None):
+    if fig is None:
+        with Metrics.stage("render", renderer="pillow"):
+            canvas = PillowCompositor.compose_exhibition(
+                exhibition["images"], exhibition["statement"], exhibition["captions"], dpi=SAVE_DPI
+            )
+        with Metrics.stage("save", renderer="pillow") as fields:
+            png = PillowCompositor.save_canvas(canvas, image_path, dpi=SAVE_DPI)
+            fields["bytes"] = len(png)
+        publish_handoff(image_path, canvas, png)
+        return
+
+    if gallery is not None:
+        with Metrics.stage("render", renderer="blit"):
+            gallery.show(exhibition["images"], exhibition["statement"], exhibition["captions"])
+        pause(render_pause, fig)
+        with Metrics.stage("save", renderer="blit") as fields:
+            gallery.savefig(image_path, bbox_inches='tight', dpi=SAVE_DPI)
+            fields["bytes"] = os.path.getsize(image_path)
+        return
+
+    with Metrics.stage("render", renderer="matplotlib"):
+        plot_image(exhibition["images"], fig, axs, exhibition["statement"], exhibition["captions"])
+    pause(render_pause, fig)
+    with Metrics.stage("save", renderer="matplotlib") as fields:
+        plt.savefig(image_path, bbox_inches='tight', dpi=SAVE_DPI)
+        fields["bytes"] = os.path.getsize(image_path)
+
+def publish_handoff(image_path: str, canvas, png: bytes):
+    """
+    存檔後、登錄作品（更新 LATEST、喚醒觀眾）之前，把 Pillow 合成的畫面（就是典藏的那張）放進共享記憶體，
+    觀眾被喚醒時就能直接讀取。附上記憶體中 PNG bytes 的內容雜湊（與觀眾對磁碟檔案算出的 file_key 相同），
+    觀眾從 handoff 或磁碟讀取時共用同一份上傳縮圖（見 UploadCache.py）。
+    只支援無頭模式：matplotlib 的 300 dpi 存檔只有 PNG，要發布像素得在顯示執行緒上重新解碼（約 300 ms），
+    因此 matplotlib 模式的觀眾一律從磁碟讀取。
+    """
+    if handoff is None:
+        return
+    with Metrics.stage("handoff_publish"):
+        import UploadCache
+        handoff.publish(os.path.basename(image_path), image=canvas, key=UploadCache.bytes_key(png))
+
+def pause(seconds: float, fig=None):
+    # 有畫面時用 plt.pause 讓 GUI 持續更新；無頭模式直接 sleep
+    # （plt.pause(0) 在非互動 backend 會無限等待，因此 0 秒直接略過）
+    if seconds <= 0:
+        return
+    if fig is None:
+        time.sleep(seconds)
+    else:
+        plt.pause(seconds)
+
+# ====== Generate Image Based on Statement ======
+def generate_image_from_statement(statement: str, save_dir: str = "GeneratedImages", fig=None, axs=None, render_pause: float = 3, gallery=None) -> tuple[str, str]:
+    image_data, text_response, images = request_triptych(statement)
+    exhibition = build_exhibition(
+        {"statement": statement, "image_data": image_data, "text_response": text_response, "images": images}
+    )
+    image_path = show_exhibition(exhibition, fig, axs, save_dir, render_pause, gallery)
+
     if text_response:
         print(f"💬 附加文字說明：\n{text_response}")
 
-
     return image_path, text_response.strip()
 
 # ====== Plot Initialization ======
@@ -147,6 +337,17 @@ def plot_init():
         fig.add_artist(artist)
     return fig, axs
 
+def show_title(statement: str, fig, gallery=None):
+    """串流模式：論述還在生成時就先把標題畫到畫面上（只更新標題，不動圖片）。"""
+    if fig is None:
+        return
+    if gallery is not None:
+        gallery.show_title(statement)
+        return
+    fig.suptitle(title_text(statement), **TITLE_STYLE)
+    fig.canvas.draw_idle()
+    fig.canvas.flush_events()
+
 # ====== Plot Images with Captions and Title ======
 def plot_image(images: list, fig, axs: tuple, statement: str, captions: list = None):
     for ax in axs:
@@ -158,90 +359,252 @@ def plot_image(images: list, fig, axs: tuple, statement: str, captions: list = N
             ax.axis("off")
             # ➕ 每張圖片下面加 caption
             if captions and i < len(captions):
-                ax.text(
-                    0.5, -0.1,  # 位置：x=中間，y=圖片下方
-                    textwrap.fill(captions[i], width=40),
-                    fontsize=10,
-                    color="gray",
-                    ha='center',  # 水平置中
-                    va='top',     # 垂直對齊頂端
-                    transform=ax.transAxes
-                )
+                ax.text(0.5, -0.1, caption_text(captions[i]), transform=ax.transAxes, **CAPTION_STYLE)
 
     # ➕ 上方策展標題
-    texts = statement.split(":")[0]
-    # texts = texts.split(".")[0] + "."
-    wrapped_title = "\n".join(textwrap.wrap(texts, width=125))
     # 調整上下邊距
     plt.subplots_adjust(top=0.8, bottom=0.15)   
 
-    fig.suptitle(
-        wrapped_title,
-        fontsize=30,
-        fontweight="bold",
-        color="black",
-        y=0.85,                   
-        linespacing=1.5,
-        horizontalalignment="center" 
-    )
+    fig.suptitle(title_text(statement), **TITLE_STYLE)
 
 
 # ====== Save Curatorial Statement to TXT ======
-def save_exhibition_statement(statement, filename="exhibition_statement.txt"):
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    formatted = (
-        f"\n{'='*60}\n"
-        f"🗓️ 策展時間：{timestamp}\n\n"
-        f"{statement.strip()}\n"
-        f"{'='*60}\n"
-    )
-    with open(filename, "a", encoding="utf-8") as f:
-        f.write(formatted)
+def save_exhibition_statement(statement, filename="exhibition_statement.txt", image_path=None,
+                              save_dir="GeneratedImages"):
+    image_name = os.path.basename(image_path) if image_path else None
+    with Metrics.stage("log_append", file=filename) as m:
+        record = ExhibitionLog.write_entry(filename, statement, image=image_name)
+        m["bytes"] = len(record["text"].encode("utf-8"))
+    if image_path:
+        # manifest 只記論述紀錄的 seq，論述本文只存一份
+        ArtworkArchive.get_archive(save_dir).set_statement_seq(image_path, record["seq"])
     print(f"✅ 策展論述已儲存到 {filename}")
 
 
 # ====== Save Captions / Response Text to TXT ======
-def save_response_text(response_text, filename="generated_image_response.txt"):
+def save_response_text(response_text, filename="generated_image_response.txt", image_path=None):
     """
     將 Gemini 生成圖片時附帶的文字描述存成 txt 檔案。
     """
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    formatted = (
-        f"\n{'-'*60}\n"
-        f"🕒 生成時間：{timestamp}\n\n"
-        f"{response_text.strip()}\n"
-        f"{'-'*60}\n"
-    )
-    with open(filename, "a", encoding="utf-8") as f:
-        f.write(formatted)
+    image_name = os.path.basename(image_path) if image_path else None
+    with Metrics.stage("log_append", file=filename) as m:
+        record = ExhibitionLog.write_entry(filename, response_text, image=image_name)
+        m["bytes"] = len(record["text"].encode("utf-8"))
     print(f"✅ 圖片附加描述已儲存到 {filename}")
 
 
 # ====== Full Generation Workflow ======
-def generate_exhibition_once(fig, axs) -> tuple[str, str]:
-    statement = generate_exhibition_statement(curator_prompt)
-    save_exhibition_statement(statement)
-    image_path, response_text= generate_image_from_statement(statement, fig=fig, axs=axs)
+def generate_exhibition_once(fig, axs, render_pause: float = 3, gallery=None) -> tuple[str, str]:
+    statement = generate_novel_statement(curator_prompt, on_text=lambda text: show_title(text, fig, gallery))
+    image_path = None
+    try:
+        image_path, response_text= generate_image_from_statement(statement, fig=fig, axs=axs, render_pause=render_pause, gallery=gallery)
+    finally:
+        # 圖片完成後才寫入，讓論述紀錄能以圖片檔名查詢；生成失敗時論述仍會保留
+        save_exhibition_statement(statement, image_path=image_path)
+        settle_statement(statement, image_path)
     # ➕ 存回應文字
     if response_text:  
-        save_response_text(response_text)
+        save_response_text(response_text, image_path=image_path)
 
     return statement, image_path, response_text
 
 
+# ====== Exhibition Pipeline (prefetch next exhibitions in background) ======
+class ExhibitionPipeline:
+    """
+    背景執行緒持續準備下一檔（與下下檔）展覽，放進有上限的佇列；
+    主執行緒只負責展示，展示節奏只取決於 dwell 時間而不是 API 延遲。
+    """
+
+    def __init__(self, prefetch: int = 2, workers: int = 1, retry_delay: float = 5):
+        self.queue = queue.Queue(maxsize=prefetch)
+        self.workers = workers
+        self.retry_delay = retry_delay
+        self._stopped = threading.Event()
+        self._threads = []
+        self.partial = None   # 串流模式下正在生成中的論述（等待時先顯示在畫面上）
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._produce, name=f"ExhibitionWorker-{i + 1}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self._stopped.set()
+
+    def qsize(self):
+        return self.queue.qsize()
+
+    def _produce(self):
+        while not self._stopped.is_set():
+            try:
+                exhibition = prepare_exhibition(curator_prompt, on_text=self._on_text)
+            except Exception:
+                print("❌ 背景準備展覽失敗，稍後重試：")
+                traceback.print_exc()
+                self._stopped.wait(self.retry_delay)
+                continue
+            while not self._stopped.is_set():
+                try:
+                    self.queue.put(exhibition, timeout=1)
+                    break
+                except queue.Full:
+                    continue
+            else:
+                # 停止時沒放進佇列的展覽不會展出，放掉論述的保留
+                settle_statement(exhibition["statement"], None)
+
+    def _on_text(self, statement):
+        self.partial = statement
+
+    def get(self, fig=None, poll: float = 0.1, gallery=None):
+        if fig is None:
+            return self.queue.get()
+        # 等待期間持續處理 GUI 事件，避免視窗無回應；串流中的論述同步顯示為標題
+        shown = None
+        while True:
+            try:
+                exhibition = self.queue.get_nowait()
+                self.partial = None
+                return exhibition
+            except queue.Empty:
+                partial = self.partial
+                if partial and partial != shown:
+                    show_title(partial, fig, gallery)
+                    shown = partial
+                plt.pause(poll)
+
+
+def clear_display(fig, axs, gallery=None):
+    if fig is None:
+        return
+    if gallery is not None:
+        gallery.clear()
+        return
+    for ax in axs:
+        ax.clear()
+        ax.axis("off")
+    fig.suptitle("")
+    fig.canvas.draw()
+
+
 # ====== Main Loop ======
-def main():
+def setup(metrics_port: int = None, use_handoff: bool = False, component: str = "curator", use_stream: bool = False,
+          track_resources: int = 0):
+    global handoff, stream, tracker
+    Metrics.configure(component, port=metrics_port)
+    stream = use_stream
+    if track_resources and tracker is None:
+        import ResourceMonitor
+        tracker = ResourceMonitor.ResourceTracker(every=track_resources).start()
+        print(f"🩺 資源追蹤：每 {track_resources} 輪記錄到 {tracker.report}")
+    if use_handoff and handoff is None:
+        import ArtworkHandoff
+        handoff = ArtworkHandoff.HandoffWriter()
+        print(f"🔗 共享記憶體 handoff：{handoff.path}")
+
+
+def init_display(renderer: str = "matplotlib", blit: bool = False):
+    if renderer == "pillow":
+        return None, None, None
+    if handoff is not None:
+        print("⚠️ handoff 只支援 --renderer pillow，matplotlib 模式的觀眾會從磁碟讀取作品")
     fig, axs = plot_init()
-    while True:
-        generate_exhibition_once(fig, axs)
-        for ax in axs:
-            ax.clear()
-            ax.axis("off")
-        fig.suptitle("")
-        fig.canvas.draw()
-        plt.pause(1)
+    gallery = None
+    if blit:
+        import GalleryDisplay
+        gallery = GalleryDisplay.BlitGallery(fig, axs)
+    return fig, axs, gallery
+
+
+def make_source(prefetch: int = 2, workers: int = 1, queue_dir: str = None, low_water: int = 5, refill: int = 10, concurrency: int = 2):
+    """
+    展示迴圈的展覽來源：queue_dir 有值時從磁碟上預先生成的佇列取用（低於 low_water 時背景補貨），
+    否則由背景執行緒即時預先準備 prefetch 檔；兩者都沒有時回傳 None（序列流程）。
+    """
+    if queue_dir:
+        import ExhibitionQueue
+        return ExhibitionQueue.BufferedExhibitions(queue_dir, low_water, refill, concurrency).start()
+    if prefetch > 0:
+        return ExhibitionPipeline(prefetch=prefetch, workers=workers).start()
+    return None
+
+
+def run_gallery(fig, axs, pipeline=None, dwell: float = 3, transition: float = 1, gallery=None, max_cycles: int = None):
+    # max_cycles：跑完指定輪數後返回（浸泡測試用），None 表示永遠執行
+    cycles = itertools.count(1) if max_cycles is None else range(1, max_cycles + 1)
+    if pipeline is None:
+        # 舊的序列流程：生成 → 展示 → 存檔 → 清空
+        for cycle in cycles:
+            generate_exhibition_once(fig, axs, render_pause=dwell, gallery=gallery)
+            clear_display(fig, axs, gallery)
+            pause(transition, fig)
+            if tracker is not None:
+                tracker.sample(cycle, fig)
+        return
+
+    for cycle in cycles:
+        # 佇列空了代表生成速度跟不上展示節奏（display_wait 會變長）
+        with Metrics.stage("display_wait", queued=pipeline.qsize()):
+            exhibition = pipeline.get(fig, gallery=gallery)
+        image_path = None
+        try:
+            image_path = show_exhibition(exhibition, fig, axs, render_pause=dwell, gallery=gallery)
+        finally:
+            save_exhibition_statement(exhibition["statement"], image_path=image_path)
+            settle_statement(exhibition["statement"], image_path)
+        if exhibition["text_response"]:
+            print(f"💬 附加文字說明：\n{exhibition['text_response']}")
+            save_response_text(exhibition["text_response"], image_path=image_path)
+        if image_path:
+            print(f"🖼️ 展出作品：{image_path}（佇列中尚有 {pipeline.qsize()} 檔）")
+        clear_display(fig, axs, gallery)
+        pause(transition, fig)
+        if tracker is not None:
+            tracker.sample(cycle, fig)
+
+
+def main(prefetch: int = 2, workers: int = 1, dwell: float = 3, transition: float = 1, renderer: str = "matplotlib", blit: bool = False, metrics_port: int = None, use_handoff: bool = False, use_stream: bool = False,
+         queue_dir: str = None, low_water: int = 5, refill: int = 10, concurrency: int = 2, track_resources: int = 0):
+    setup(metrics_port, use_handoff, use_stream=use_stream, track_resources=track_resources)
+    # 先讓背景 worker 送出第一個請求，等待回應的同時建立視窗
+    pipeline = make_source(prefetch, workers, queue_dir, low_water, refill, concurrency)
+    fig, axs, gallery = init_display(renderer, blit)
+    if pipeline is None:
+        run_gallery(fig, axs, dwell=dwell, transition=transition, gallery=gallery)
+        return
+
+    try:
+        run_gallery(fig, axs, pipeline, dwell, transition, gallery)
+    finally:
+        pipeline.stop()
     # generate_exhibition_once(fig, axs)
     # plt.close(fig)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="AI curator gallery loop.")
+    parser.add_argument("--prefetch", type=int, default=2, help="ready exhibitions to buffer (0 = serial loop)")
+    parser.add_argument("--workers", type=int, default=1, help="background generation workers")
+    parser.add_argument("--dwell", type=float, default=3, help="seconds each exhibition stays on display")
+    parser.add_argument("--transition", type=float, default=1, help="blank pause between exhibitions")
+    parser.add_argument("--renderer", choices=["matplotlib", "pillow"], default="matplotlib",
+                        help="pillow = headless compositor, no matplotlib/GUI needed")
+    parser.add_argument("--blit", action="store_true",
+                        help="keep the frame as a cached background and only update images/text between exhibitions")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics over HTTP on this port")
+    parser.add_argument("--handoff", action="store_true",
+                        help="publish each artwork to a shared-memory ring buffer for the audiences")
+    parser.add_argument("--stream", action="store_true",
+                        help="stream the curatorial statement (console and gallery title update as text arrives)")
+    parser.add_argument("--queue", help="display pre-generated exhibitions from this on-disk queue (see ExhibitionQueue.py)")
+    parser.add_argument("--low-water", type=int, default=5, help="refill the queue in the background below this many")
+    parser.add_argument("--refill", type=int, default=10, help="exhibitions generated per refill (0 = never refill)")
+    parser.add_argument("--concurrency", type=int, default=2, help="concurrent generations during a refill")
+    parser.add_argument("--track-resources", type=int, default=0, metavar="N",
+                        help="every N exhibitions, record RSS/tracemalloc/artists/open files to resource_report.jsonl")
+    args = parser.parse_args()
+    main(args.prefetch, args.workers, args.dwell, args.transition, args.renderer, args.blit, args.metrics_port, args.handoff,
+         args.stream, args.queue, args.low_water, args.refill, args.concurrency, args.track_resources)
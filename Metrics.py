@@ -0,0 +1,269 @@
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# ====== Metrics ======
+# 每個模型呼叫與本機階段（decode / render / save / log append ...）都記錄耗時、位元組數、
+# token 用量與結果，輸出兩種格式：
+#   metrics/<component>.jsonl  - 每筆事件一行，超過大小自動輪替（.1 .2 ...）
+#   metrics/<component>.prom   - Prometheus 文字格式的累計值（也可用 --metrics-port 以 HTTP 提供）
+# 只有呼叫過 configure() 的程序才會記錄（只是匯入模組的工具不會在目前目錄留下 metrics/）；GEMINI_METRICS=0 可關閉。
+# 同一個 component 名稱同時只給一個程序使用（<component>.lock），已被佔用時改寫到 <component>-<pid>.*，
+# 例如三個 AudienceNMonitor 同時執行時不會互相覆寫 .prom、輪替彼此的 .jsonl。
+
+METRICS_ENABLED = os.environ.get("GEMINI_METRICS", "1") != "0"
+METRICS_DIR = os.environ.get("GEMINI_METRICS_DIR", "metrics")
+MAX_BYTES = 10 * 1024 * 1024
+BACKUPS = 3
+PROM_INTERVAL = 5.0
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float("inf"))
+
+_state = {
+    "component": "gemini",
+    "folder": METRICS_DIR,
+    "enabled": METRICS_ENABLED,
+    "configured": False,
+    "claimed": None,        # (要求的名稱, folder, 實際使用的名稱, lock fd)
+    "last_prom": 0.0,
+}
+_lock = threading.Lock()
+_counts = {}        # (stage, outcome) -> n
+_durations = {}     # stage -> [bucket counts..., sum, count]
+_totals = {}        # (metric, labels tuple) -> value
+
+
+def configure(component=None, folder=None, enabled=None, port=None):
+    if folder is not None:
+        _state["folder"] = folder
+    if enabled is not None:
+        _state["enabled"] = enabled
+    _state["configured"] = True
+    if _state["enabled"]:
+        _state["component"] = _claim(component or _state["component"])
+    elif component is not None:
+        _state["component"] = component
+    if port:
+        serve(port)
+
+
+def _claim(component):
+    claimed = _state["claimed"]
+    if claimed is not None and claimed[:2] == (component, _state["folder"]):
+        return claimed[2]   # 同一程序再次 configure（例如 GallerySupervisor 的策展人與觀眾）
+    if claimed is not None:
+        os.close(claimed[3])
+    os.makedirs(_state["folder"], exist_ok=True)
+    fd = os.open(os.path.join(_state["folder"], f"{component}.lock"), os.O_RDWR | os.O_CREAT, 0o666)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        name = component
+    except OSError:
+        name = f"{component}-{os.getpid()}"
+    _state["claimed"] = (component, _state["folder"], name, fd)
+    return name
+
+
+def enabled():
+    return _state["enabled"] and _state["configured"]
+
+
+def _path(suffix):
+    return os.path.join(_state["folder"], f"{_state['component']}{suffix}")
+
+
+def _rotate(path):
+    for i in range(BACKUPS - 1, 0, -1):
+        if os.path.exists(f"{path}.{i}"):
+            os.replace(f"{path}.{i}", f"{path}.{i + 1}")
+    os.replace(path, f"{path}.1")
+
+
+def _append(event):
+    path = _path(".jsonl")
+    os.makedirs(_state["folder"], exist_ok=True)
+    if os.path.exists(path) and os.path.getsize(path) > MAX_BYTES:
+        _rotate(path)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+
+def _add_total(metric, labels, value):
+    key = (metric, tuple(sorted(labels.items())))
+    _totals[key] = _totals.get(key, 0) + value
+
+
+def record(stage, duration, outcome="ok", **fields):
+    if not enabled():
+        return
+    event = {
+        "ts": datetime.now().isoformat(timespec="milliseconds"),
+        "component": _state["component"],
+        "stage": stage,
+        "duration_s": round(duration, 6),
+        "outcome": outcome,
+    }
+    event.update({k: v for k, v in fields.items() if v is not None})
+    with _lock:
+        _counts[(stage, outcome)] = _counts.get((stage, outcome), 0) + 1
+        histogram = _durations.setdefault(stage, [0] * len(BUCKETS) + [0.0, 0])
+        for i, bound in enumerate(BUCKETS):
+            if duration <= bound:
+                histogram[i] += 1
+        histogram[-2] += duration
+        histogram[-1] += 1
+        model_labels = {"stage": stage, "model": fields.get("model", "")}
+        for field in ("request_bytes", "response_bytes"):
+            if fields.get(field):
+                _add_total(f"gemini_{field}_total", model_labels, fields[field])
+        for kind in ("prompt_tokens", "output_tokens", "total_tokens"):
+            if fields.get(kind):
+                _add_total("gemini_tokens_total", dict(model_labels, kind=kind), fields[kind])
+        try:
+            _append(event)
+        except OSError as e:
+            print(f"⚠️ 無法寫入 metrics：{e}")
+        now = time.monotonic()
+        write_prom = now - _state["last_prom"] >= PROM_INTERVAL
+        if write_prom:
+            _state["last_prom"] = now
+    if write_prom:
+        _write_prometheus()
+
+
+@contextmanager
+def stage(name, **fields):
+    """
+    with Metrics.stage("render") as m:
+        ...
+        m["response_bytes"] = n   # 可在區塊內補充欄位
+    """
+    fields = dict(fields)
+    start = time.perf_counter()
+    try:
+        yield fields
+    except BaseException as e:
+        record(name, time.perf_counter() - start, outcome="error", error=type(e).__name__, **fields)
+        raise
+    record(name, time.perf_counter() - start, **fields)
+
+
+# ====== Model Payload Helpers ======
+def payload_bytes(contents):
+    if isinstance(contents, str):
+        return len(contents.encode("utf-8"))
+    if isinstance(contents, (list, tuple)):
+        return sum(payload_bytes(item) for item in contents)
+    inline_data = getattr(contents, "inline_data", None)
+    if inline_data is not None and inline_data.data:
+        return len(inline_data.data)
+    text = getattr(contents, "text", None)
+    if isinstance(text, str):
+        return len(text.encode("utf-8"))
+    return 0
+
+
+def response_fields(response):
+    fields = {"response_bytes": 0}
+    for candidate in getattr(response, "candidates", None) or []:
+        content = getattr(candidate, "content", None)
+        for part in getattr(content, "parts", None) or []:
+            fields["response_bytes"] += payload_bytes(part)
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None:
+        fields["prompt_tokens"] = usage.prompt_token_count
+        fields["output_tokens"] = usage.candidates_token_count
+        fields["total_tokens"] = usage.total_token_count
+    return fields
+
+
+# ====== Prometheus Text Format ======
+def _escape(value):
+    # Prometheus 文字格式：label 值中的 \ " 與換行必須跳脫
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    inner = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+    return "{" + inner + "}"
+
+
+def render_prometheus():
+    lines = [
+        "# HELP gemini_stage_total Completed stages by outcome.",
+        "# TYPE gemini_stage_total counter",
+    ]
+    with _lock:
+        for (name, outcome), n in sorted(_counts.items()):
+            lines.append(f"gemini_stage_total{_labels([('stage', name), ('outcome', outcome)])} {n}")
+        lines += [
+            "# HELP gemini_stage_duration_seconds Stage duration.",
+            "# TYPE gemini_stage_duration_seconds histogram",
+        ]
+        for name, histogram in sorted(_durations.items()):
+            for bound, n in zip(BUCKETS, histogram):
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"gemini_stage_duration_seconds_bucket{_labels([('stage', name), ('le', le)])} {n}")
+            lines.append(f"gemini_stage_duration_seconds_sum{_labels([('stage', name)])} {histogram[-2]:.6f}")
+            lines.append(f"gemini_stage_duration_seconds_count{_labels([('stage', name)])} {histogram[-1]}")
+        typed = set()
+        for (metric, labels), value in sorted(_totals.items()):
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            lines.append(f"{metric}{_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def _write_prometheus():
+    path = _path(".prom")
+    os.makedirs(_state["folder"], exist_ok=True)
+    text = render_prometheus()
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def flush():
+    if enabled() and (_counts or _totals):
+        _write_prometheus()
+
+
+atexit.register(flush)
+
+
+# ====== HTTP Endpoint ======
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port, host="0.0.0.0"):
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="MetricsServer", daemon=True).start()
+    print(f"📈 Metrics 服務啟動：http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,133 @@
+from PIL import Image, ImageDraw, ImageFont
+from functools import lru_cache
+from io import BytesIO
+import textwrap
+
+# ====== Headless Pillow Compositor ======
+# 不經過 matplotlib，直接用 Pillow 合成與 GeminiCurator.plot_init / plot_image 相同的
+# 三層木框、三聯圖、策展標題與圖說。靜態的外框層只繪製一次並重複使用。
+# 版面數值對應 plt.figure(figsize=(15, 8)) + subplots_adjust(top=0.8, bottom=0.15) 在 300 dpi 下的結果。
+
+FIGURE_SIZE = (15, 8)        # inches，同 plot_init
+DPI = 300
+BACKGROUND = "#FFF3EE"
+FRAMES = [
+    # (inset, linewidth in points, color)：外層深木框、中層淺木邊、內層金邊
+    (0.0, 30, "#4b2e2b"),
+    (0.03, 10, "#c19a6b"),
+    (0.04, 3, "#d4af37"),
+]
+SUBPLOT_LEFT, SUBPLOT_RIGHT = 0.125, 0.9
+SUBPLOT_BOTTOM, SUBPLOT_TOP = 0.15, 0.8
+SUBPLOT_WSPACE = 0.2
+TITLE_Y, TITLE_SIZE, TITLE_WRAP, TITLE_LINESPACING = 0.85, 30, 125, 1.5
+CAPTION_SIZE, CAPTION_WRAP, CAPTION_COLOR = 10, 40, "gray"
+
+REGULAR_FONTS = ["DejaVuSans.ttf", "arial.ttf", "Arial.ttf"]
+BOLD_FONTS = ["DejaVuSans-Bold.ttf", "arialbd.ttf", "Arial Bold.ttf"]
+
+
+def _points(value, dpi):
+    return max(1, round(value * dpi / 72))
+
+
+@lru_cache(maxsize=None)
+def load_font(size_px, bold=False, font_path=None):
+    candidates = ([font_path] if font_path else []) + (BOLD_FONTS if bold else REGULAR_FONTS)
+    for candidate in candidates:
+        try:
+            return ImageFont.truetype(candidate, size_px)
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(size=size_px)
+    except TypeError:  # Pillow < 10.1 沒有可縮放的預設字型
+        return ImageFont.load_default()
+
+
+# ====== Static Frame Layer (prerendered once per size) ======
+@lru_cache(maxsize=4)
+def render_frame(figsize=FIGURE_SIZE, dpi=DPI):
+    width, height = round(figsize[0] * dpi), round(figsize[1] * dpi)
+    frame = Image.new("RGB", (width, height), BACKGROUND)
+    draw = ImageDraw.Draw(frame)
+    for inset, linewidth, color in FRAMES:
+        stroke = _points(linewidth, dpi)
+        # matplotlib 的線條以邊界為中心向內外各延伸一半
+        left = inset * width - stroke / 2
+        top = inset * height - stroke / 2
+        right = (1 - inset) * width + stroke / 2
+        bottom = (1 - inset) * height + stroke / 2
+        radius = max(stroke, round(0.002 * width))
+        draw.rounded_rectangle((left, top, right, bottom), radius=radius, outline=color, width=stroke)
+    return frame
+
+
+def panel_boxes(width, height, count=3):
+    # 對應 plt.subplot(1, 3, i+1)：等寬子圖、影像以 aspect='equal' 置中
+    total = (SUBPLOT_RIGHT - SUBPLOT_LEFT) * width
+    axes_width = total / (count + SUBPLOT_WSPACE * (count - 1))
+    gap = axes_width * SUBPLOT_WSPACE
+    axes_top = (1 - SUBPLOT_TOP) * height
+    axes_height = (SUBPLOT_TOP - SUBPLOT_BOTTOM) * height
+    boxes = []
+    for i in range(count):
+        left = SUBPLOT_LEFT * width + i * (axes_width + gap)
+        boxes.append((left, axes_top, axes_width, axes_height))
+    return boxes
+
+
+def _fit(image, box):
+    left, top, box_width, box_height = box
+    scale = min(box_width / image.width, box_height / image.height)
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    x = round(left + (box_width - size[0]) / 2)
+    y = round(top + (box_height - size[1]) / 2)
+    return size, (x, y)
+
+
+def _draw_centered_lines(draw, lines, center_x, top, font, fill, linespacing=1.2):
+    line_height = font.size * linespacing if hasattr(font, "size") else 12 * linespacing
+    for i, line in enumerate(lines):
+        draw.text((center_x, top + i * line_height), line, font=font, fill=fill, anchor="ma")
+
+
+# ====== Compose Full Exhibition ======
+def compose_exhibition(images: list, statement: str, captions: list = None, figsize=FIGURE_SIZE, dpi=DPI, font_path=None):
+    canvas = render_frame(figsize, dpi).copy()
+    width, height = canvas.size
+    draw = ImageDraw.Draw(canvas)
+
+    caption_font = load_font(_points(CAPTION_SIZE, dpi), font_path=font_path)
+    for i, box in enumerate(panel_boxes(width, height)):
+        if i >= len(images):
+            break
+        # panel 可以是 PIL 圖或 ndarray（GeminiCurator.split_triptych 回傳的 view）
+        panel = images[i] if isinstance(images[i], Image.Image) else Image.fromarray(images[i])
+        panel = panel.convert("RGB")
+        size, position = _fit(panel, box)
+        if panel.size != size:
+            panel = panel.resize(size, Image.LANCZOS)
+        canvas.paste(panel, position)
+        if captions and i < len(captions):
+            # 同 ax.text(0.5, -0.1, ...)：圖片下方 10% 高度處、置中
+            caption_top = position[1] + size[1] * 1.1
+            lines = textwrap.fill(captions[i], width=CAPTION_WRAP).split("\n")
+            _draw_centered_lines(draw, lines, position[0] + size[0] / 2, caption_top, caption_font, CAPTION_COLOR)
+
+    # 上方策展標題（同 plot_image：取第一個冒號前的文字）
+    texts = statement.split(":")[0]
+    title_lines = textwrap.wrap(texts, width=TITLE_WRAP)
+    title_font = load_font(_points(TITLE_SIZE, dpi), bold=True, font_path=font_path)
+    _draw_centered_lines(draw, title_lines, width / 2, (1 - TITLE_Y) * height, title_font, "black", TITLE_LINESPACING)
+    return canvas
+
+
+def save_canvas(canvas, image_path: str, dpi=DPI) -> bytes:
+    # 先編碼到記憶體再寫檔，回傳同一份 PNG bytes（策展人用它計算 handoff 的內容雜湊，不必重讀檔案）
+    buffer = BytesIO()
+    canvas.save(buffer, "PNG", dpi=(dpi, dpi))
+    data = buffer.getvalue()
+    with open(image_path, "wb") as f:
+        f.write(data)
+    return data
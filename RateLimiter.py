@@ -0,0 +1,147 @@
+import asyncio
+import httpx
+import os
+import random
+import re
+import struct
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# ====== Shared API Rate Limiter ======
+# 策展人與所有觀眾（不同程序）共用同一個 token bucket，狀態存在一個小檔案裡，以檔案鎖保護：
+#   tokens, updated_at, blocked_until  (struct "<ddd")
+# 每次 generate_content 前取一個 token；一般請求（觀眾評論）必須留下 RATE_LIMIT_RESERVE 個 token，
+# 這些保留額度只有高優先請求（策展人的圖片生成）能用。
+# 收到 429 時把 blocked_until 往後推，所有程序一起暫停，而不是各自重試打爆配額。
+# 預設關閉（行為與加入前相同），設定 GEMINI_RATE_LIMIT_RPM（例如免費方案的 15）才啟用。
+# 狀態檔放在執行目錄（與 logs/、metrics/ 相同），同一台機器上不同的展覽不會共用同一個 bucket。
+
+RATE_LIMIT_RPM = float(os.environ.get("GEMINI_RATE_LIMIT_RPM", "0"))
+RATE_LIMIT_BURST = float(os.environ.get("GEMINI_RATE_LIMIT_BURST", "4"))
+RATE_LIMIT_RESERVE = float(os.environ.get("GEMINI_RATE_LIMIT_RESERVE", "1"))
+RATE_LIMIT_FILE = os.environ.get("GEMINI_RATE_LIMIT_FILE", ".ratelimit.state")
+
+RETRY_ATTEMPTS = int(os.environ.get("GEMINI_RETRY_ATTEMPTS", "5"))
+RETRY_BASE_DELAY = float(os.environ.get("GEMINI_RETRY_BASE_DELAY", "1"))
+RETRY_MAX_DELAY = float(os.environ.get("GEMINI_RETRY_MAX_DELAY", "60"))
+RETRY_CODES = {408, 429, 500, 502, 503, 504}
+
+HIGH = "high"
+NORMAL = "normal"
+
+STATE = struct.Struct("<ddd")
+
+
+class TokenBucket:
+    def __init__(self, path=RATE_LIMIT_FILE, rpm=RATE_LIMIT_RPM, burst=RATE_LIMIT_BURST, reserve=RATE_LIMIT_RESERVE):
+        self.path = path
+        self.rate = rpm / 60
+        self.burst = max(burst, 1 + reserve)
+        self.reserve = reserve
+        self._lock = threading.Lock()   # 檔案鎖是以程序為單位，同一程序內的執行緒另外用這個鎖
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o666)
+
+    def _locked(self, update):
+        with self._lock:
+            fd = self._fd
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            try:
+                os.lseek(fd, 0, os.SEEK_SET)
+                raw = os.read(fd, STATE.size)
+                now = time.time()
+                state = STATE.unpack(raw) if len(raw) == STATE.size else (self.burst, now, 0.0)
+                state, result = update(now, *state)
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.write(fd, STATE.pack(*state))
+                return result
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                else:
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+    def try_acquire(self, priority=NORMAL):
+        """取得一個 token 回傳 0，否則回傳建議等待的秒數。"""
+        need = 1 if priority == HIGH else 1 + self.reserve
+
+        def update(now, tokens, updated_at, blocked_until):
+            tokens = min(self.burst, tokens + max(0.0, now - updated_at) * self.rate)
+            if now < blocked_until:
+                return (tokens, now, blocked_until), blocked_until - now
+            if tokens >= need:
+                return (tokens - 1, now, blocked_until), 0.0
+            return (tokens, now, blocked_until), (need - tokens) / self.rate
+
+        return self._locked(update)
+
+    def acquire(self, priority=NORMAL):
+        waited = 0.0
+        while True:
+            wait = self.try_acquire(priority)
+            if wait <= 0:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+    async def acquire_async(self, priority=NORMAL):
+        # 檔案鎖可能被其他程序持有，在執行緒中等待，不阻塞 event loop
+        waited = 0.0
+        while True:
+            wait = await asyncio.to_thread(self.try_acquire, priority)
+            if wait <= 0:
+                return waited
+            await asyncio.sleep(wait)
+            waited += wait
+
+    def block(self, seconds):
+        # 配額被拒（429）：所有共用這個 bucket 的程序都暫停 seconds 秒
+        def update(now, tokens, updated_at, blocked_until):
+            return (0.0, now, max(blocked_until, now + seconds)), None
+
+        self._locked(update)
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_bucket(path=RATE_LIMIT_FILE):
+    path = os.path.abspath(path)
+    with _buckets_lock:
+        bucket = _buckets.get(path)
+        if bucket is None:
+            bucket = _buckets[path] = TokenBucket(path)
+        return bucket
+
+
+# ====== Retry Policy ======
+def is_retryable(error):
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return code in RETRY_CODES
+    return isinstance(error, (ConnectionError, TimeoutError, httpx.TransportError))
+
+
+def retry_after(error):
+    # Gemini 的 429 會在 details 裡帶 RetryInfo，例如 {"retryDelay": "31s"}
+    details = getattr(error, "details", None)
+    match = re.search(r"""["']retryDelay["']:\s*["'](\d+(?:\.\d+)?)s["']""", str(details))
+    return float(match.group(1)) if match else None
+
+
+def backoff_delay(attempt, error=None):
+    """指數退避加 full jitter；伺服器有指定 retryDelay 時以它為下限。"""
+    delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+    hinted = retry_after(error) if error is not None else None
+    return max(delay, hinted) if hinted else delay
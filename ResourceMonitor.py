@@ -0,0 +1,202 @@
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from RunInfo import current_rss_mb, git_revision
+
+# ====== Resource Tracking for the Long-running Display Loop ======
+# 展示迴圈一跑就是好幾天，同一個 figure 反覆 imshow / text / suptitle，RSS 緩慢增加時很難看出是誰。
+# ResourceTracker 每 N 輪記錄一次：RSS、tracemalloc 目前/峰值、gc 物件數、開啟的檔案數、執行緒數、
+# matplotlib figure 與 artist 數量，並附上與上一次 tracemalloc snapshot 相比成長最多的程式位置，
+# 每筆一行寫到 resource_report.jsonl。
+#
+#   python GeminiCurator.py --track-resources 50
+#   python ResourceMonitor.py soak --cycles 2000 --max-growth-mb 40    # 假後端浸泡測試，超過上限就失敗
+
+REPORT_FILE = os.environ.get("GEMINI_RESOURCE_REPORT", "resource_report.jsonl")
+TRACEMALLOC_FRAMES = int(os.environ.get("GEMINI_TRACEMALLOC_FRAMES", "1"))
+TOP_GROWTH = 10
+
+
+def open_fds():
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return None
+
+
+def figure_counts(fig=None):
+    # 只在 pyplot 已經載入時才查（無頭模式不為了量測而載入 matplotlib）
+    pyplot = sys.modules.get("matplotlib.pyplot")
+    counts = {"figures": len(pyplot.get_fignums()) if pyplot is not None else 0}
+    if fig is not None:
+        counts["artists"] = len(fig.findobj())
+        counts["images"] = sum(len(ax.images) for ax in fig.axes)
+        counts["texts"] = sum(len(ax.texts) for ax in fig.axes) + len(fig.texts)
+    return counts
+
+
+class ResourceTracker:
+    """trace=False 時不啟動 tracemalloc（它會讓每次配置變慢數倍），只記錄 RSS、物件、artist 與檔案數。"""
+
+    def __init__(self, every=50, report=REPORT_FILE, frames=TRACEMALLOC_FRAMES, trace=True):
+        self.every = every
+        self.report = report
+        self.frames = frames
+        self.trace = trace
+        self.samples = []
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        if not self.trace:
+            return self
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self._snapshot = tracemalloc.take_snapshot()
+        return self
+
+    def _growth(self):
+        # 不用 Snapshot.filter_traces（純 Python 逐筆比對，數十萬筆 trace 要好幾秒），比較完再略過 tracemalloc 自己
+        snapshot = tracemalloc.take_snapshot()
+        stats = snapshot.compare_to(self._snapshot, "lineno") if self._snapshot is not None else []
+        self._snapshot = snapshot
+        growth = [
+            {"where": str(stat.traceback), "size_kb": round(stat.size_diff / 1024, 1), "count": stat.count_diff}
+            for stat in stats if stat.size_diff > 0 and stat.traceback[0].filename != tracemalloc.__file__
+        ]
+        return growth[:TOP_GROWTH]
+
+    def sample(self, cycle, fig=None, force=False):
+        """每輪呼叫；只有每 every 輪（或 force）才真正量測並寫入報告。"""
+        if not force and cycle % self.every:
+            return None
+        with self._lock:
+            current, peak = tracemalloc.get_traced_memory() if self.trace else (None, None)
+            entry = {
+                "cycle": cycle,
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "rss_mb": current_rss_mb(),
+                "traced_mb": round(current / 1024 / 1024, 2) if self.trace else None,
+                "traced_peak_mb": round(peak / 1024 / 1024, 2) if self.trace else None,
+                # tracemalloc 自己的簿記也算在 RSS 裡，RSS 成長但 traced 不變時先看這個
+                "tracemalloc_mb": round(tracemalloc.get_tracemalloc_memory() / 1024 / 1024, 2) if self.trace else None,
+                "gc_objects": len(gc.get_objects()),
+                "open_fds": open_fds(),
+                "threads": threading.active_count(),
+                **figure_counts(fig),
+                "top_growth": self._growth() if self.trace else [],
+            }
+            self.samples.append(entry)
+            with open(self.report, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        print(f"🩺 第 {cycle} 輪：RSS {entry['rss_mb'] or 0:.1f} MB、traced {entry['traced_mb'] or '-'} MB、"
+              f"{entry['gc_objects']} 個物件、{entry.get('artists', '-')} 個 artist、{entry['open_fds']} 個檔案")
+        return entry
+
+
+# ====== Soak Test (fake backend) ======
+def summarize(samples, warmup, max_growth_mb):
+    steady = [s for s in samples if s["cycle"] >= warmup] or samples[-1:]
+    first, last = steady[0], steady[-1]
+
+    def growth(key):
+        if first.get(key) is None or last.get(key) is None:
+            return None
+        return round(last[key] - first[key], 2)
+
+    result = {
+        "from_cycle": first["cycle"],
+        "to_cycle": last["cycle"],
+        "rss_growth_mb": growth("rss_mb"),
+        "traced_growth_mb": growth("traced_mb"),
+        "gc_objects_growth": growth("gc_objects"),
+        "open_fds_growth": growth("open_fds"),
+        "artists_growth": growth("artists"),
+        "max_growth_mb": max_growth_mb,
+    }
+    # RSS 不可用（非 Linux）時改用 tracemalloc 的 Python 配置量判斷；兩者都沒有就無從判斷，視為失敗
+    measured = result["rss_growth_mb"] if result["rss_growth_mb"] is not None else result["traced_growth_mb"]
+    result["passed"] = measured is not None and measured <= max_growth_mb
+    return result
+
+
+def soak(cycles, renderer, blit, prefetch, every, warmup, max_growth_mb, image_size, dpi, workdir=None, trace=False):
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    import GeminiClient
+    GeminiClient.use_client(GeminiClient.fake_client(latency=0, image_size=(image_size, image_size)))
+    import GeminiCurator
+
+    workdir = workdir or tempfile.mkdtemp(prefix="gemini_soak_")
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+    GeminiCurator.SAVE_DPI = dpi
+    tracker = GeminiCurator.tracker = ResourceTracker(every=every, trace=trace).start()
+    GeminiCurator.setup(component="soak")
+    pipeline = GeminiCurator.make_source(prefetch)
+    fig, axs, gallery = GeminiCurator.init_display(renderer, blit)
+    started = time.perf_counter()
+    try:
+        GeminiCurator.run_gallery(fig, axs, pipeline, dwell=0, transition=0, gallery=gallery, max_cycles=cycles)
+    finally:
+        if pipeline is not None:
+            pipeline.stop()
+    elapsed = time.perf_counter() - started
+    if not tracker.samples or tracker.samples[-1]["cycle"] != cycles:
+        tracker.sample(cycles, fig, force=True)
+    result = summarize(tracker.samples, warmup, max_growth_mb)
+    result.update({"cycles": cycles, "elapsed_s": round(elapsed, 1), "workdir": workdir,
+                   "report": os.path.join(workdir, tracker.report)})
+    return result, tracker.samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resource tracking tools for the long-running display loop.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    soak_parser = sub.add_parser("soak", help="run many display cycles against the fake backend and bound RSS growth")
+    soak_parser.add_argument("--cycles", type=int, default=2000)
+    soak_parser.add_argument("--renderer", choices=["matplotlib", "pillow"], default="matplotlib")
+    soak_parser.add_argument("--blit", action="store_true")
+    soak_parser.add_argument("--prefetch", type=int, default=2, help="0 = serial loop")
+    soak_parser.add_argument("--every", type=int, default=100, help="sample every N cycles")
+    soak_parser.add_argument("--warmup", type=int, default=200, help="cycles before the growth baseline")
+    soak_parser.add_argument("--max-growth-mb", type=float, default=40, help="fail if RSS grows more than this after warmup")
+    soak_parser.add_argument("--image-size", type=int, default=512, help="edge of the fake model image (px)")
+    soak_parser.add_argument("--dpi", type=int, default=50, help="archive PNG dpi (300 in production; lower = faster soak)")
+    soak_parser.add_argument("--tracemalloc", action="store_true",
+                             help="also record tracemalloc totals and top growing lines (several times slower)")
+    soak_parser.add_argument("--workdir", help="scratch directory (default: temporary)")
+    soak_parser.add_argument("--output", help="write the summary and samples as JSON")
+    summary_parser = sub.add_parser("summary", help="summarize an existing resource_report.jsonl")
+    summary_parser.add_argument("report", nargs="?", default=REPORT_FILE)
+    summary_parser.add_argument("--warmup", type=int, default=0)
+    summary_parser.add_argument("--max-growth-mb", type=float, default=40)
+    args = parser.parse_args()
+
+    if args.command == "summary":
+        with open(args.report, "r", encoding="utf-8") as f:
+            samples = [json.loads(line) for line in f if line.strip()]
+        print(json.dumps(summarize(samples, args.warmup, args.max_growth_mb), indent=2))
+        return
+
+    output = os.path.abspath(args.output) if args.output else None
+    result, samples = soak(args.cycles, args.renderer, args.blit, args.prefetch, args.every, args.warmup,
+                           args.max_growth_mb, args.image_size, args.dpi, args.workdir, args.tracemalloc)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump({"revision": git_revision(), "config": vars(args), "result": result, "samples": samples},
+                      f, indent=2, ensure_ascii=False)
+    if not result["passed"]:
+        sys.exit(f"❌ 浸泡測試失敗：暖機後記憶體成長 {result['rss_growth_mb']} MB，超過上限 {args.max_growth_mb} MB")
+    print("✅ 浸泡測試通過")
+
+
+if __name__ == "__main__":
+    main()
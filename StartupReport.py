@@ -0,0 +1,183 @@
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from RunInfo import SOURCE_DIR, git_revision
+
+# ====== Startup Report ======
+# 每個入口在新的直譯器中量測兩件事：
+#   1. python -X importtime -c "import <module>"：模組匯入總時間與最重的匯入項目
+#   2. time-to-first-request：執行入口的 main()（假後端、零延遲，只剩本機成本），
+#      量到第一個模型請求完成、且 main 已準備好使用回應（策展人：畫面已建立）為止，
+#      以及同一程序內再次請求的時間（= GallerySupervisor 重啟 task 後的第一個請求）
+# 曾經把 google.genai / matplotlib / numpy 改成第一次使用時才匯入：匯入時間從約 1.2 秒降到約 0.1 秒，
+# 但這份報告的 time-to-first-request 沒有變快（第一個請求本來就要等它們載入），因此又改回一般匯入。
+#
+#   python StartupReport.py --repeat 5 --output startup_report.json
+
+# 入口：(模組, 執行 main 直到第一個請求完成的程式, 再次請求的程式)
+ENTRIES = {
+    "curator": (
+        "GeminiCurator",
+        # run_gallery 是 main 使用第一份展覽的地方：此時背景 worker 已送出請求、畫面已建立
+        "GeminiCurator.run_gallery = lambda *args, **kwargs: answered.wait()\n"
+        "GeminiCurator.main()",
+        "GeminiCurator.generate_exhibition_statement(GeminiCurator.curator_prompt)",
+    ),
+    "audience": (
+        "GeminiAudience",
+        # 執行目錄已放好一件作品，觀眾 main 啟動後立即評論它
+        "threading.Thread(target=GeminiAudience.main, kwargs={'count': 1}, daemon=True).start()\n"
+        "answered.wait()",
+        "GeminiAudience.client.models.generate_content("
+        "model=GeminiAudience.AUDIENCE_MODEL, contents=[GeminiAudience.AUDIENCE_PROMPT])",
+    ),
+}
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+# 入口本身（例如觀眾執行緒）也會印到 stdout，量測結果只從這一行讀取
+TIMING_LINE = re.compile(r"^@@startup-report@@ (\S+) (\S+)$", flags=re.MULTILINE)
+
+FIRST_REQUEST_SCRIPT = """
+import asyncio, os, sys, threading, time
+import GeminiClient
+answered = threading.Event()
+
+
+def _watch(cls):
+    # 任何一個模型請求完成時設定 answered（策展人用同步 client、觀眾用 async client）
+    call = cls.generate_content
+    if asyncio.iscoroutinefunction(call):
+        async def watched(self, **kwargs):
+            response = await call(self, **kwargs)
+            answered.set()
+            return response
+    else:
+        def watched(self, **kwargs):
+            response = call(self, **kwargs)
+            answered.set()
+            return response
+    cls.generate_content = watched
+
+
+_watch(GeminiClient.ThrottledModels)
+_watch(GeminiClient.AsyncThrottledModels)
+import {module}
+{run}
+first = time.time()
+start = time.perf_counter()
+{request}
+print(f"\\n@@startup-report@@ {{first!r}} {{time.perf_counter() - start!r}}")
+sys.stdout.flush()
+os._exit(0)   # 不等觀眾迴圈等背景執行緒
+"""
+
+
+def _env():
+    env = dict(os.environ, GEMINI_CLIENT_MODE="fake", GEMINI_METRICS="0", MPLBACKEND="Agg")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [SOURCE_DIR, env.get("PYTHONPATH")]))
+    return env
+
+
+def _importtime(code):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=SOURCE_DIR, env=_env(), capture_output=True, text=True, check=True
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append({"module": name, "depth": len(indent) // 2, "self_ms": int(self_us) / 1000,
+                            "cumulative_ms": int(cumulative_us) / 1000})
+    return entries
+
+
+def import_profile(module, top=8):
+    # 扣掉直譯器本身啟動時就會載入的模組（site、encodings ...）
+    startup = {e["module"] for e in _importtime("pass")}
+    entries = [e for e in _importtime(f"import {module}") if e["module"] not in startup]
+    return {
+        "total_ms": round(sum(e["cumulative_ms"] for e in entries if e["depth"] == 0), 1),
+        "heaviest": sorted((e for e in entries if e["depth"] <= 1),
+                           key=lambda e: e["cumulative_ms"], reverse=True)[:top],
+    }
+
+
+def seed_artwork(folder):
+    # 觀眾的 main 需要一件已登錄的作品才會送出第一個請求
+    import ArtworkArchive
+    from PIL import Image
+    archive = ArtworkArchive.ArtworkArchive(os.path.join(folder, ArtworkArchive.ARCHIVE_DIR))
+    path = archive.new_path()
+    Image.new("RGB", (96, 32), "gray").save(path)
+    archive.register(path)
+    archive.db.close()
+
+
+def first_request(module, run, request):
+    script = FIRST_REQUEST_SCRIPT.format(module=module, run=run, request=request)
+    # 每次都在新的執行目錄，不沿用上一次的作品、紀錄與快取
+    with tempfile.TemporaryDirectory(prefix="gemini_startup_") as workdir:
+        seed_artwork(workdir)
+        launched = time.time()
+        result = subprocess.run(
+            [sys.executable, "-c", script], cwd=workdir, env=_env(), capture_output=True, text=True, check=True
+        )
+    first, warm = map(float, TIMING_LINE.findall(result.stdout)[-1])
+    return first - launched, warm
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def measure(repeat):
+    report = {}
+    for entry, (module, run, request) in ENTRIES.items():
+        runs = [first_request(module, run, request) for _ in range(repeat)]
+        report[entry] = {
+            "imports": import_profile(module),
+            "time_to_first_request_s": round(median([cold for cold, _ in runs]), 3),
+            "restart_to_request_s": round(median([warm for _, warm in runs]), 4),
+        }
+    return report
+
+
+def print_report(report):
+    for name, result in report.items():
+        print(f"\n🚀 {name}: import {result['imports']['total_ms']:.0f} ms, "
+              f"first request {result['time_to_first_request_s'] * 1000:.0f} ms after launch, "
+              f"{result['restart_to_request_s'] * 1000:.1f} ms after a supervised restart")
+        for item in result["imports"]["heaviest"]:
+            print(f"   {item['module']:<28} {item['cumulative_ms']:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report import time and time-to-first-request for each entry point.")
+    parser.add_argument("--repeat", type=int, default=3, help="launches per entry (median is reported)")
+    parser.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args()
+
+    report = measure(args.repeat)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "revision": git_revision(),
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "python": sys.version.split()[0],
+                "entries": report,
+            }, f, indent=2)
+        print(f"\n✅ 啟動報告已儲存到 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
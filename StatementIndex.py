@@ -0,0 +1,253 @@
+import argparse
+import functools
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+import numpy as np
+import ExhibitionLog
+
+# ====== Near-duplicate Statement Index ======
+# curator_prompt 固定、temperature 1.0，策展論述常常大同小異，但每一則都要付一次完整的圖片生成。
+# 這裡以 MinHash（字詞 shingle）+ LSH 分段建立過去論述的相似度索引，
+# 存在 exhibition_statement.txt 旁邊的 exhibition_statement.similarity.sqlite：
+#   statements (id, ts, signature, text)   每則論述的 MinHash 簽章
+#   buckets    (bucket, id)                每個 LSH band 的雜湊值 → 論述 id（有索引）
+# 查詢時只比對與新論述至少有一個 band 相同的候選，數萬筆資料也只需一次索引查詢。
+# 多個背景 worker 同時生成時，reserve() 在同一個鎖內比對「已索引 + 其他 worker 保留中」的論述並保留這一則；
+# 圖片存檔後才 commit() 寫入索引，生成失敗就 release()，沒展出的論述不會擋住之後相似的論述。
+#
+#   python StatementIndex.py check "Silicon Dream Lattice: ..."
+#   python StatementIndex.py bench --entries 20000
+
+STATEMENT_FILE = "exhibition_statement.txt"
+NUM_PERM = 128
+BANDS = 32                       # 32 band × 4 row：Jaccard 約 0.4 以上的論述幾乎一定會成為候選
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 2
+MERSENNE_PRIME = (1 << 31) - 1
+
+# Jaccard 相似度超過門檻視為重複，重新生成論述最多 DUPLICATE_RETRIES 次
+DUPLICATE_THRESHOLD = float(os.environ.get("GEMINI_DUPLICATE_THRESHOLD", "0.6"))
+DUPLICATE_RETRIES = int(os.environ.get("GEMINI_DUPLICATE_RETRIES", "2"))
+
+LEGACY_STATEMENT_PATTERN = re.compile(r"🗓️ 策展時間：(.+?)\n\n(.*?)\n={60}", flags=re.DOTALL)
+
+
+# ====== MinHash ======
+@functools.lru_cache(maxsize=None)
+def _permutations():
+    generator = np.random.default_rng(20250101)   # 固定種子：簽章寫進資料庫，每次啟動必須相同
+    a = generator.integers(1, MERSENNE_PRIME, NUM_PERM, dtype=np.uint64)
+    b = generator.integers(0, MERSENNE_PRIME, NUM_PERM, dtype=np.uint64)
+    band_salt = np.arange(BANDS, dtype=np.uint64) << np.uint64(32)
+    return a, b, band_salt
+
+
+def shingles(text):
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < SHINGLE_WORDS:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def signature(text):
+    a, b, _ = _permutations()
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles(text)), dtype=np.uint64)
+    # (a*h + b) mod p：a, b < 2^31、h < 2^32，乘積不會超過 uint64
+    return ((np.outer(a, hashes) + b[:, None]) % np.uint64(MERSENNE_PRIME)).min(axis=1).astype(np.uint32)
+
+
+def band_buckets(sig):
+    rows = sig.reshape(BANDS, ROWS).astype(np.uint64)
+    # 每個 band 壓成一個 31 bit 雜湊，再加上 band 編號，全部放在同一個整數欄位
+    folded = np.zeros(BANDS, dtype=np.uint64)
+    for column in range(ROWS):
+        folded = (folded * np.uint64(1000003) + rows[:, column]) % np.uint64(MERSENNE_PRIME)
+    return (folded | _permutations()[2]).astype(np.int64).tolist()
+
+
+def similarity(a, b):
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+# ====== Persistent Index ======
+def index_path(filename=STATEMENT_FILE):
+    root, _ = os.path.splitext(filename)
+    return f"{root}.similarity.sqlite"
+
+
+class StatementIndex:
+    def __init__(self, filename=STATEMENT_FILE):
+        self.filename = filename
+        self._lock = threading.Lock()
+        self._pending = {}   # 已保留、等待圖片存檔的論述 → 簽章
+        self.db = sqlite3.connect(index_path(filename), timeout=30, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS statements (id INTEGER PRIMARY KEY, ts TEXT, signature BLOB, text TEXT)"
+        )
+        self.db.execute("CREATE TABLE IF NOT EXISTS buckets (bucket INTEGER, id INTEGER)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS buckets_bucket ON buckets (bucket)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.db.commit()
+        self._backfill()
+
+    def _backfill(self):
+        # 第一次建立索引時匯入既有論述（結構化 log；沒有的話讀舊的文字檔），只做一次
+        with self._lock:
+            if self.db.execute("SELECT value FROM meta WHERE key = 'backfilled'").fetchone():
+                return
+        # 結構化 log 與論述檔放在同一個資料夾下（論述檔在工作目錄時就是 ./logs）
+        folder = os.path.join(os.path.dirname(self.filename), ExhibitionLog.LOG_DIR)
+        log = ExhibitionLog.get_log(ExhibitionLog.stream_for_file(self.filename), folder)
+        entries = [(record["text"], record["ts"]) for record in log]
+        if not entries and os.path.exists(self.filename):
+            with open(self.filename, "r", encoding="utf-8") as f:
+                entries = [(text, ts) for ts, text in LEGACY_STATEMENT_PATTERN.findall(f.read())]
+        for text, ts in entries:
+            self._insert(text, signature(text), ts)
+        with self._lock:
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES ('backfilled', '1')")
+            self.db.commit()
+
+    def _insert(self, text, sig, timestamp=None):
+        with self._lock:
+            self._pending.pop(text.strip(), None)
+            cursor = self.db.execute(
+                "INSERT INTO statements (ts, signature, text) VALUES (?, ?, ?)",
+                (timestamp or time.strftime(ExhibitionLog.TIMESTAMP_FORMAT), sig.tobytes(), text.strip())
+            )
+            self.db.executemany(
+                "INSERT INTO buckets VALUES (?, ?)", [(bucket, cursor.lastrowid) for bucket in band_buckets(sig)]
+            )
+            self.db.commit()
+            return cursor.lastrowid
+
+    def add(self, text, timestamp=None):
+        return self._insert(text, signature(text), timestamp)
+
+    def _nearest(self, sig):
+        # 需持有 _lock：已索引的候選加上其他 worker 保留中的論述
+        buckets = band_buckets(sig)
+        rows = self.db.execute(
+            "SELECT signature, text FROM statements WHERE id IN ("
+            f"SELECT id FROM buckets WHERE bucket IN ({','.join('?' * len(buckets))}))",
+            buckets
+        ).fetchall()
+        candidates = [(np.frombuffer(blob, dtype=np.uint32), text) for blob, text in rows]
+        candidates += [(pending, text) for text, pending in self._pending.items()]
+        best, best_score = None, 0.0
+        for candidate_sig, candidate in candidates:
+            score = similarity(sig, candidate_sig)
+            if score > best_score:
+                best, best_score = candidate, score
+        return best, best_score
+
+    def nearest(self, text, sig=None):
+        """回傳 (最相似的既有論述, 估計的 Jaccard 相似度)；沒有候選時回傳 (None, 0.0)。"""
+        sig = signature(text) if sig is None else sig
+        with self._lock:
+            return self._nearest(sig)
+
+    def reserve(self, text, threshold=None, force=False):
+        """
+        比對與保留在同一個鎖內完成：相似度低於門檻（或 force）時保留這則論述並回傳 (True, 相似度)，
+        否則回傳 (False, 相似度)。保留的論述之後必須 commit() 或 release()。
+        """
+        threshold = DUPLICATE_THRESHOLD if threshold is None else threshold
+        text = text.strip()
+        sig = signature(text)
+        with self._lock:
+            _, score = self._nearest(sig)
+            if score >= threshold and not force:
+                return False, score
+            self._pending[text] = sig
+            return True, score
+
+    def commit(self, text, timestamp=None):
+        """作品存檔後才把保留的論述寫入索引；這個程序沒有保留它（例如已由佇列的生產者寫入）時不做事。"""
+        text = text.strip()
+        with self._lock:
+            sig = self._pending.get(text)
+        return None if sig is None else self._insert(text, sig, timestamp)
+
+    def release(self, text):
+        # 生成失敗、沒有展出：放掉保留，不寫入索引
+        with self._lock:
+            self._pending.pop(text.strip(), None)
+
+    def __len__(self):
+        with self._lock:
+            return self.db.execute("SELECT COUNT(*) FROM statements").fetchone()[0]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(filename=STATEMENT_FILE):
+    key = os.path.abspath(index_path(filename))
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = StatementIndex(filename)
+        return index
+
+
+# ====== CLI ======
+def bench(entries, lookups=1000):
+    import tempfile
+    words = [f"w{i}" for i in range(400)]
+    generator = np.random.default_rng(0)
+    folder = tempfile.mkdtemp(prefix="statement_index_")
+    index = StatementIndex(os.path.join(folder, STATEMENT_FILE))
+    texts = [" ".join(generator.choice(words, 60)) for _ in range(entries)]
+    start = time.perf_counter()
+    for text in texts:
+        index.add(text)
+    print(f"📥 {entries} 則論述建立索引：{(time.perf_counter() - start) * 1000 / entries:.3f} ms/則")
+    queries = [" ".join(generator.choice(words, 60)) for _ in range(lookups // 2)]
+    queries += [text.replace(text.split()[0], "novel", 1) for text in texts[:lookups // 2]]   # 近似重複
+    sigs = [signature(q) for q in queries]
+    start = time.perf_counter()
+    for query, sig in zip(queries, sigs):
+        index.nearest(query, sig)
+    lookup_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    start = time.perf_counter()
+    for query in queries:
+        signature(query)
+    signature_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    hits = sum(index.nearest(q, s)[1] >= DUPLICATE_THRESHOLD for q, s in zip(queries[lookups // 2:], sigs[lookups // 2:]))
+    print(f"🔎 查詢：{lookup_ms:.3f} ms/次（另加簽章 {signature_ms:.3f} ms），近似重複命中 {hits}/{lookups // 2}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Near-duplicate index over past curatorial statements.")
+    parser.add_argument("--file", default=STATEMENT_FILE, help="statement log the index sits next to")
+    sub = parser.add_subparsers(dest="command", required=True)
+    check = sub.add_parser("check", help="show the most similar past statement")
+    check.add_argument("text")
+    sub.add_parser("status", help="show how many statements are indexed")
+    bench_parser = sub.add_parser("bench", help="microbenchmark insert/lookup on a synthetic index")
+    bench_parser.add_argument("--entries", type=int, default=20000)
+    bench_parser.add_argument("--lookups", type=int, default=1000)
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        bench(args.entries, args.lookups)
+        return
+    index = get_index(args.file)
+    if args.command == "status":
+        print(f"📚 {index_path(args.file)}：{len(index)} 則論述")
+        return
+    match, score = index.nearest(args.text)
+    verdict = "重複" if score >= DUPLICATE_THRESHOLD else "新論述"
+    print(f"🔁 相似度 {score:.2f}（門檻 {DUPLICATE_THRESHOLD}）→ {verdict}")
+    if match:
+        print(match)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import argparse
+import os
+import time
+from io import BytesIO
+import numpy as np
+from PIL import Image
+
+# ====== Triptych Split and Quality Gate ======
+# 模型回傳一張圖，左中右三等分就是三聯圖。原本先 LANCZOS resize 成 (width, width//3)，
+# 再 crop 出三張各自複製的 PIL 圖；這裡解碼成一個 ndarray 後，三張圖都是同一塊記憶體的 view
+# （已經是 3:1 時連 resize 都省掉），並在存檔、通知觀眾之前做幾個向量化的檢查：
+#   blank   某一張幾乎是單色（亮度標準差 < PANEL_MIN_STD）
+#   aspect  原圖比例不可能是左右三聯圖（直式或過寬）
+#   seam    兩條接縫附近的欄間差異都不比整張圖的一般欄間差異大（預設關閉：prompt 要求三張圖
+#           「seamlessly connected」，接得好的作品反而會被擋下；設定 GEMINI_SEAM_MIN_RATIO 才檢查）
+# 不合格的圖由 GeminiCurator 重新生成（GEMINI_IMAGE_RETRIES 次），仍不合格就不展出。
+#
+#   python Triptych.py bench --size 1024x1024 --repeat 20
+
+PANEL_MIN_STD = float(os.environ.get("GEMINI_PANEL_MIN_STD", "4"))
+SEAM_MIN_RATIO = float(os.environ.get("GEMINI_SEAM_MIN_RATIO", "0"))   # 0 = 不檢查接縫（例如 1.5 才檢查）
+IMAGE_RETRIES = int(os.environ.get("GEMINI_IMAGE_RETRIES", "1"))
+ASPECT_RANGE = (0.9, 4.5)       # 原圖寬 / 高
+SEAM_WINDOW = 0.02              # 接縫可能偏離三等分的位置（佔寬度比例）
+SAMPLE_STEP = 2                 # 檢查時每 2 個像素取 1 個（strided view，不複製）
+RGB_WEIGHTS = (0.299, 0.587, 0.114)
+
+
+def decode(image_data: bytes):
+    # Image.open 只讀標頭，load() 才真正解碼像素；在這裡完成，decode 與 split 的耗時才分得開
+    image = Image.open(BytesIO(image_data))
+    image.load()
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGB")
+    return image
+
+
+def split(image) -> tuple:
+    """
+    回傳 (整張圖的 ndarray, [三張 panel view])；必要時先 resize 成 3:1（與原本的版面相同）。
+    寬度不能被 3 整除時，剩下的欄位歸最後一張，不丟掉右邊緣。
+    """
+    width, height = image.size
+    if height != width // 3:
+        image = image.resize((width, width // 3), Image.LANCZOS)
+    array = np.asarray(image)
+    panel_width = width // 3
+    bounds = (0, panel_width, 2 * panel_width, width)
+    panels = [array[:, bounds[i]:bounds[i + 1]] for i in range(3)]
+    return array, panels
+
+
+def luminance(array):
+    sample = array[::SAMPLE_STEP, ::SAMPLE_STEP, :3]
+    return sample.astype(np.float32) @ np.array(RGB_WEIGHTS, dtype=np.float32)
+
+
+def panel_std(panels):
+    return [float(luminance(panel).std()) for panel in panels]
+
+
+def seam_ratios(array):
+    """每條接縫附近最大的欄間差異 / 全圖欄間差異的中位數（接縫越明顯數值越大）。"""
+    gray = luminance(array)
+    column_diff = np.abs(np.diff(gray, axis=1)).mean(axis=0)
+    baseline = float(np.median(column_diff)) or 1e-6
+    width = gray.shape[1]
+    window = max(1, int(width * SEAM_WINDOW))
+    ratios = []
+    for seam in (width // 3, 2 * width // 3):
+        lo, hi = max(0, seam - window), min(len(column_diff), seam + window)
+        ratios.append(float(column_diff[lo:hi].max()) / baseline)
+    return ratios
+
+
+def check(source_size, array, panels) -> dict:
+    """回傳檢查結果；problems 為空代表可以展出。"""
+    width, height = source_size
+    stds = panel_std(panels)
+    seams = seam_ratios(array) if SEAM_MIN_RATIO > 0 else []
+    problems = []
+    if not ASPECT_RANGE[0] <= width / height <= ASPECT_RANGE[1]:
+        problems.append(f"aspect {width}x{height}")
+    blank = [i + 1 for i, std in enumerate(stds) if std < PANEL_MIN_STD]
+    if blank:
+        problems.append(f"blank panel {blank}")
+    if seams and max(seams) < SEAM_MIN_RATIO:
+        problems.append(f"no seam ({max(seams):.2f})")
+    return {"problems": problems, "panel_std": [round(s, 1) for s in stds], "seam_ratio": [round(s, 2) for s in seams]}
+
+
+# ====== Microbenchmark: PIL resize + crop vs ndarray views ======
+def legacy_split(image_data: bytes) -> list:
+    # 原本 GeminiCurator.split_triptych 的作法（crop 之後 load，才是實際複製像素的時間點）
+    image = Image.open(BytesIO(image_data))
+    width, _ = image.size
+    image = image.resize((width, width//3), Image.LANCZOS)
+    split_width = width // 3
+    panels = [image.crop((i * split_width, 0, (i + 1) * split_width, width//3)) for i in range(3)]
+    for panel in panels:
+        panel.load()
+    return panels
+
+
+def synthetic_triptych(width, height, seed=0):
+    generator = np.random.default_rng(seed)
+    array = generator.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    third = width // 3
+    for i, tint in enumerate(((1.0, 0.4, 0.4), (0.4, 1.0, 0.4), (0.4, 0.4, 1.0))):
+        array[:, i * third:(i + 1) * third] = (array[:, i * third:(i + 1) * third] * np.array(tint)).astype(np.uint8)
+    buffer = BytesIO()
+    Image.fromarray(array).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def _time(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return sorted(samples)[len(samples) // 2] * 1000
+
+
+def bench(width, height, repeat):
+    data = synthetic_triptych(width, height)
+    decoded = decode(data)
+    array, panels = split(decoded)
+    results = {
+        "legacy decode+resize+crop": _time(lambda: legacy_split(data), repeat),
+        "decode": _time(lambda: decode(data), repeat),
+        "split": _time(lambda: split(decoded), repeat),
+        "decode+split": _time(lambda: split(decode(data)), repeat),
+        "checks": _time(lambda: check(decoded.size, array, panels), repeat),
+    }
+    print(f"🖼️ {width}x{height} PNG，{repeat} 次取中位數")
+    for name, ms in results.items():
+        print(f"   {name:<28} {ms:8.2f} ms")
+    print(f"   panels share memory: {all(np.shares_memory(array, panel) for panel in panels)}, "
+          f"checks: {check(decoded.size, array, panels)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Triptych split and quality gate tools.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    bench_parser = sub.add_parser("bench", help="compare the PIL resize+crop path with ndarray views")
+    bench_parser.add_argument("--size", action="append", help="WIDTHxHEIGHT (repeatable; default 1024x1024 and 3072x1024)")
+    bench_parser.add_argument("--repeat", type=int, default=20)
+    check_parser = sub.add_parser("check", help="run the quality gate on image files")
+    check_parser.add_argument("paths", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        for size in args.size or ["1024x1024", "3072x1024"]:
+            width, height = map(int, size.lower().split("x"))
+            bench(width, height, args.repeat)
+        return
+    for path in args.paths:
+        with open(path, "rb") as f:
+            image = decode(f.read())
+        array, panels = split(image)
+        print(f"{path}: {check(image.size, array, panels)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from PIL import Image
+
+# ====== Upload Derivative Cache ======
+# 觀眾原本把 300 dpi 的完整 PNG（約 4500x2400）原封不動上傳給 gemini-2.0-flash。
+# 這裡以內容雜湊為 key，產生一份適合模型的縮小版（最長邊 UPLOAD_MAX_EDGE、JPEG/WebP），
+# 存在 .upload_cache/，第一位看到作品的觀眾產生，其他觀眾（包括其他程序）直接重用。
+# 快取以檔案 mtime 當作最近使用時間，超過 UPLOAD_CACHE_BYTES 時從最久未用的開始刪除（LRU）。
+# key 一律是典藏 PNG 的 sha256：從磁碟讀取時自己計算，從共享記憶體讀取時由策展人隨畫面附上
+# （ArtworkHandoff，以存檔前在記憶體中編碼好的 PNG bytes 計算），同一件作品不論怎麼讀到都只有一份縮圖。
+
+CACHE_DIR = os.environ.get("GEMINI_UPLOAD_CACHE", ".upload_cache")
+UPLOAD_MAX_EDGE = int(os.environ.get("GEMINI_UPLOAD_MAX_EDGE", "1536"))
+UPLOAD_FORMAT = os.environ.get("GEMINI_UPLOAD_FORMAT", "JPEG").upper()
+UPLOAD_QUALITY = int(os.environ.get("GEMINI_UPLOAD_QUALITY", "85"))
+UPLOAD_CACHE_BYTES = int(os.environ.get("GEMINI_UPLOAD_CACHE_BYTES", str(256 * 1024 * 1024)))
+
+FORMATS = {"JPEG": ("jpg", "image/jpeg"), "WEBP": ("webp", "image/webp")}
+
+DIGEST_MEMO = 256
+_digests = OrderedDict()    # path -> ((size, mtime), 內容雜湊)，避免同一檔案重複計算；只保留最近 DIGEST_MEMO 筆
+_lock = threading.Lock()
+
+
+def bytes_key(data):
+    # 與 file_key 相同的內容雜湊，給已經在記憶體中的 PNG（例如策展人剛編碼好的畫面）
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_key(path):
+    stat = os.stat(path)
+    path = os.path.abspath(path)
+    marker = (stat.st_size, stat.st_mtime_ns)
+    with _lock:
+        memo = _digests.get(path)
+        if memo is not None and memo[0] == marker:
+            _digests.move_to_end(path)
+            return memo[1]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    key = digest.hexdigest()
+    with _lock:
+        _digests[path] = (marker, key)
+        _digests.move_to_end(path)
+        while len(_digests) > DIGEST_MEMO:
+            _digests.popitem(last=False)
+    return key
+
+
+def _cache_path(key):
+    extension, _ = FORMATS[UPLOAD_FORMAT]
+    # 參數寫進檔名，調整設定後不會誤用舊的縮圖
+    return os.path.join(CACHE_DIR, f"{key[:32]}_{UPLOAD_MAX_EDGE}q{UPLOAD_QUALITY}.{extension}")
+
+
+def make_derivative(image):
+    image = image.convert("RGB")
+    if max(image.size) > UPLOAD_MAX_EDGE:
+        image.thumbnail((UPLOAD_MAX_EDGE, UPLOAD_MAX_EDGE), Image.LANCZOS)
+    buffer = BytesIO()
+    image.save(buffer, UPLOAD_FORMAT, quality=UPLOAD_QUALITY)
+    return buffer.getvalue()
+
+
+def evict():
+    try:
+        entries = [os.path.join(CACHE_DIR, name) for name in os.listdir(CACHE_DIR) if not name.endswith(".tmp")]
+    except FileNotFoundError:
+        return
+    stats = []
+    for path in entries:
+        try:
+            stats.append((os.stat(path), path))
+        except FileNotFoundError:
+            continue  # 其他程序剛好刪掉
+    total = sum(stat.st_size for stat, _ in stats)
+    for stat, path in sorted(stats, key=lambda item: item[0].st_mtime):
+        if total <= UPLOAD_CACHE_BYTES:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= stat.st_size
+
+
+def get_or_create(key, open_image, still_valid=None):
+    """
+    回傳 (bytes, mime_type, hit)。open_image 只有在快取沒有這份縮圖時才會被呼叫。
+    still_valid：縮圖產生後、寫入快取前再確認一次來源沒被覆寫（共享記憶體的 seqlock），否則回傳 None、不寫入。
+    """
+    path = _cache_path(key)
+    _, mime_type = FORMATS[UPLOAD_FORMAT]
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        os.utime(path)  # 更新最近使用時間
+        return data, mime_type, True
+    except FileNotFoundError:
+        pass
+
+    data = make_derivative(open_image())
+    if still_valid is not None and not still_valid():
+        return None
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    evict()
+    return data, mime_type, False
+
+
+def derivative_for_file(image_path):
+    return get_or_create(file_key(image_path), lambda: Image.open(image_path))
+
+
+def derivative_for_image(key, image, still_valid=None):
+    # 已解碼的畫面（例如共享記憶體中的作品）；key 必須是同一件作品典藏 PNG 的 file_key
+    return get_or_create(key, lambda: image, still_valid)
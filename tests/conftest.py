@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 專案是平面的頂層模組（沒有套件），測試直接匯入
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
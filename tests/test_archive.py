@@ -0,0 +1,51 @@
+import os
+import sqlite3
+import threading
+import time
+from PIL import Image
+import ArtworkArchive
+
+
+def save_artwork(archive, created):
+    path = archive.new_path()
+    Image.new("RGB", (64, 64), "gray").save(path)
+    os.utime(path, (created, created))
+    return path
+
+
+def test_register_runs_retention_off_the_calling_thread(tmp_path, monkeypatch):
+    archive = ArtworkArchive.ArtworkArchive(str(tmp_path / "GeneratedImages"))
+    monkeypatch.setattr(ArtworkArchive, "MAX_DAYS", 1)
+    old = time.time() - 3 * 86400
+    paths = [save_artwork(archive, old + i) for i in range(3)]
+    for path in paths[:2]:
+        archive.register(path, created=os.path.getmtime(path))
+
+    threads = []
+    make_thumbnail = ArtworkArchive.make_thumbnail
+    monkeypatch.setattr(ArtworkArchive, "make_thumbnail", lambda *args: threads.append(threading.current_thread())
+                        or make_thumbnail(*args))
+    archive.register(paths[2], created=time.time())
+    archive.wait_for_retention(5)
+
+    assert threads and all(thread.name == "ArchiveRetention" for thread in threads)
+    assert [archive.get(os.path.splitext(os.path.basename(p))[0])["state"] for p in paths] == \
+        [ArtworkArchive.COLD, ArtworkArchive.COLD, ArtworkArchive.HOT]
+
+
+def test_manifest_stores_the_statement_seq(tmp_path):
+    folder = str(tmp_path / "GeneratedImages")
+    # 舊版 manifest：statement 欄存的是論述本文
+    os.makedirs(folder)
+    db = sqlite3.connect(os.path.join(folder, ArtworkArchive.MANIFEST_NAME))
+    db.execute("CREATE TABLE artworks (id TEXT PRIMARY KEY, path TEXT, created REAL, bytes INTEGER, state TEXT, "
+               "thumbnail TEXT, thumbnail_bytes INTEGER, statement TEXT)")
+    db.commit()
+    db.close()
+
+    archive = ArtworkArchive.ArtworkArchive(folder)
+    path = save_artwork(archive, time.time())
+    artwork_id = archive.register(path)
+    assert archive.get(artwork_id)["statement_seq"] is None
+    archive.set_statement_seq(path, 42)
+    assert archive.get(artwork_id)["statement_seq"] == 42
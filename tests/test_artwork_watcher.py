@@ -0,0 +1,69 @@
+import shutil
+import sys
+import time
+import pytest
+from PIL import Image
+import ArtworkArchive
+import ArtworkWatcher
+
+
+def event(mask, name=b"", padded=16):
+    # 核心把檔名補 NUL 到 padded 的倍數，length 欄位包含補齊的部分
+    length = -(-len(name) // padded) * padded if name else 0
+    return ArtworkWatcher.EVENT_HEADER.pack(1, mask, 0, length) + name.ljust(length, b"\0")
+
+
+def register_artwork(folder):
+    archive = ArtworkArchive.ArtworkArchive(folder)
+    path = archive.new_path()
+    Image.new("RGB", (8, 8), "gray").save(path)
+    archive.register(path)
+    archive.db.close()   # 同一程序開著資料夾內的 manifest 時，核心會延後 IN_DELETE_SELF
+    return path
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_parse_events_splits_a_buffer_of_padded_names():
+    buffer = (event(ArtworkWatcher.IN_MOVED_TO, b"LATEST") + event(ArtworkWatcher.IN_CLOSE_WRITE, b"a_long_artwork_name.png")
+              + event(ArtworkWatcher.IN_IGNORED))
+    assert list(ArtworkWatcher.parse_events(buffer)) == [
+        (ArtworkWatcher.IN_MOVED_TO, "LATEST"),
+        (ArtworkWatcher.IN_CLOSE_WRITE, "a_long_artwork_name.png"),
+        (ArtworkWatcher.IN_IGNORED, ""),
+    ]
+
+
+def test_polling_fallback_sees_new_artwork(tmp_path, monkeypatch):
+    monkeypatch.setattr(ArtworkWatcher, "_load_libc", lambda: None)
+    folder = str(tmp_path / "GeneratedImages")
+    watcher = ArtworkWatcher.ArtworkWatcher(folder, poll_interval=0.01)
+    try:
+        assert wait_for(lambda: watcher.backend == "polling")
+        assert watcher.wait_for_new(timeout=0.05) is None
+        path = register_artwork(folder)
+        assert watcher.wait_for_new(timeout=5) == path
+    finally:
+        watcher.stop()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux-only")
+def test_inotify_watcher_falls_back_to_polling_when_the_folder_is_removed(tmp_path):
+    folder = str(tmp_path / "GeneratedImages")
+    watcher = ArtworkWatcher.ArtworkWatcher(folder, poll_interval=0.01)
+    try:
+        assert wait_for(lambda: watcher.backend == "inotify")
+        first = register_artwork(folder)
+        assert watcher.wait_for_new(timeout=5) == first
+
+        shutil.rmtree(folder)
+        assert wait_for(lambda: watcher.backend == "polling")
+        second = register_artwork(folder)
+        assert watcher.wait_for_new(since=first, timeout=5) == second
+    finally:
+        watcher.stop()
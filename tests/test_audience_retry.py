@@ -0,0 +1,40 @@
+import asyncio
+import pytest
+import GeminiAudience
+
+
+def fake_review(monkeypatch, failures):
+    """persona_comment 的替身：failures[名稱] 次之前都丟出例外。"""
+    calls = {}
+
+    async def persona_comment(persona, artwork, image_path):
+        calls[persona["name"]] = calls.get(persona["name"], 0) + 1
+        if calls[persona["name"]] <= failures.get(persona["name"], 0):
+            raise RuntimeError("503 UNAVAILABLE")
+        return "ok"
+
+    monkeypatch.setattr(GeminiAudience, "persona_comment", persona_comment)
+    monkeypatch.setattr(GeminiAudience, "load_artwork", lambda image_path: object())
+    monkeypatch.setattr(GeminiAudience, "has_already_commented", lambda image_path, filename: False)
+    return calls
+
+
+def test_failed_persona_is_queued_for_retry(monkeypatch):
+    calls = fake_review(monkeypatch, {"Audience2": 1})
+    personas = GeminiAudience.make_personas(3)
+    retries = []
+    asyncio.run(GeminiAudience.review_with_retry("a.png", personas, 0, retries))
+    assert [(image, [p["name"] for p in waiting], attempt) for _, image, waiting, attempt in retries] == \
+        [("a.png", ["Audience2"], 1)]
+
+    _, image, waiting, attempt = retries.pop()
+    asyncio.run(GeminiAudience.review_with_retry(image, waiting, attempt, retries))
+    assert retries == [] and calls == {"Audience1": 1, "Audience2": 2, "Audience3": 1}
+
+
+def test_exhausted_retries_raise_for_the_supervisor(monkeypatch):
+    fake_review(monkeypatch, {"Audience1": 99})
+    with pytest.raises(GeminiAudience.ReviewFailed):
+        asyncio.run(GeminiAudience.review_with_retry(
+            "a.png", GeminiAudience.make_personas(1), GeminiAudience.REVIEW_RETRIES, []
+        ))
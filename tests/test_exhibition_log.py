@@ -0,0 +1,50 @@
+import multiprocessing
+import ExhibitionLog
+
+
+def append_many(folder, writer, count):
+    log = ExhibitionLog.ExhibitionLog("audience_feedback1", folder)
+    for i in range(count):
+        log.append(f"{writer}-{i}", image=f"{writer}-{i}.png")
+
+
+def test_concurrent_processes_get_unique_seq(tmp_path):
+    folder = str(tmp_path / "logs")
+    ExhibitionLog.ExhibitionLog("audience_feedback1", folder)
+    workers = [multiprocessing.Process(target=append_many, args=(folder, writer, 50)) for writer in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert all(worker.exitcode == 0 for worker in workers)
+
+    log = ExhibitionLog.ExhibitionLog("audience_feedback1", folder)
+    records = list(log)
+    assert len(log) == len(records) == 200
+    assert sorted(record["seq"] for record in records) == list(range(1, 201))
+    assert [record["text"] for record in log.find("3-49.png")] == ["3-49"]
+
+
+def test_append_indexes_lines_left_by_an_interrupted_writer(tmp_path):
+    folder = str(tmp_path / "logs")
+    log = ExhibitionLog.ExhibitionLog("audience_feedback1", folder)
+    log.append("first", image="a.png")
+    # 另一個程序寫完 segment 後、寫入索引前中斷
+    with open(log._segment_path(1), "ab") as f:
+        f.write(b'{"seq": 2, "ts": "2025-01-01 00:00:00", "image": "b.png", "text": "orphan"}\n')
+    record = log.append("third", image="c.png")
+    assert record["seq"] == 3
+    assert [r["text"] for r in log.tail(3)] == ["first", "orphan", "third"]
+
+
+def test_append_truncates_a_torn_final_line(tmp_path):
+    folder = str(tmp_path / "logs")
+    log = ExhibitionLog.ExhibitionLog("audience_feedback1", folder)
+    log.append("first", image="a.png")
+    # 另一個程序寫到一半就中斷，最後一行沒有換行
+    with open(log._segment_path(1), "ab") as f:
+        f.write(b'{"seq": 2, "ts": "x", "ima')
+    record = log.append("second", image="b.png")
+    assert record["seq"] == 2
+    assert [r["text"] for r in log] == ["first", "second"]
+    assert [r["text"] for r in ExhibitionLog.ExhibitionLog("audience_feedback1", folder)] == ["first", "second"]
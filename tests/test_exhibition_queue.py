@@ -0,0 +1,47 @@
+import json
+import multiprocessing
+import ExhibitionQueue
+
+
+def drain(folder, output):
+    exhibition_queue = ExhibitionQueue.ExhibitionQueue(folder)
+    claimed = []
+    while True:
+        raw = exhibition_queue.pop()
+        if raw is None:
+            break
+        claimed.append(raw["id"])
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(claimed, f)
+
+
+def test_consumer_with_a_stale_listing_cannot_claim_a_taken_entry(tmp_path, monkeypatch):
+    folder = str(tmp_path / "queue")
+    first, second = ExhibitionQueue.ExhibitionQueue(folder), ExhibitionQueue.ExhibitionQueue(folder)
+    entry_id = first.put("statement", b"png", "text")
+    # 兩個取用者同時列出佇列，其中一個先 rename 成功
+    listing = second._ready()
+    assert first.pop()["id"] == entry_id
+    monkeypatch.setattr(second, "_ready", lambda: listing)
+    assert second.pop() is None
+
+
+def test_concurrent_consumers_claim_each_entry_once(tmp_path):
+    folder = str(tmp_path / "queue")
+    exhibition_queue = ExhibitionQueue.ExhibitionQueue(folder)
+    ids = {exhibition_queue.put(f"statement {i}", b"png", "text") for i in range(40)}
+    outputs = [str(tmp_path / f"consumer{i}.json") for i in range(4)]
+    workers = [multiprocessing.Process(target=drain, args=(folder, output)) for output in outputs]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert all(worker.exitcode == 0 for worker in workers)
+
+    claimed = []
+    for output in outputs:
+        with open(output, encoding="utf-8") as f:
+            claimed += json.load(f)
+    assert len(claimed) == len(set(claimed)) == 40
+    assert set(claimed) == ids
+    assert len(exhibition_queue) == 0
@@ -0,0 +1,64 @@
+import os
+import struct
+from PIL import Image
+import ArtworkHandoff
+
+KEY = "ab" * 32
+
+
+def frame(color, size=(8, 4)):
+    return Image.new("RGB", size, color)
+
+
+def test_reader_rejects_a_slot_that_is_being_written(tmp_path):
+    path = str(tmp_path / "ring")
+    writer = ArtworkHandoff.HandoffWriter(path, slots=2, slot_bytes=1024)
+    seq = writer.publish("a.png", image=frame("red"), key=KEY)
+    reader = ArtworkHandoff.HandoffReader(path)
+    assert reader.read("a.png").image.getpixel((0, 0)) == (255, 0, 0)
+
+    # 寫入端已把 slot 的 seq 清為 0、像素還沒寫完：讀取端不回傳半張畫面
+    offset = ArtworkHandoff.GLOBAL_SIZE + (seq % 2) * (ArtworkHandoff.SLOT_HEADER_SIZE + 1024)
+    struct.pack_into("<Q", writer.mm, offset, 0)
+    assert reader.read("a.png") is None
+
+
+def test_frame_is_invalid_once_its_slot_is_overwritten(tmp_path):
+    path = str(tmp_path / "ring")
+    writer = ArtworkHandoff.HandoffWriter(path, slots=1, slot_bytes=1024)
+    writer.publish("a.png", image=frame("red"), key=KEY)
+    reader = ArtworkHandoff.HandoffReader(path)
+    first = reader.read("a.png")
+    assert first.still_valid() and first.key == KEY
+
+    writer.publish("b.png", image=frame("blue"), key=KEY)
+    assert not first.still_valid()   # 讀到的像素可能已混入下一張
+    assert reader.read("a.png") is None
+    assert reader.read("b.png").image.getpixel((0, 0)) == (0, 0, 255)
+
+
+def test_new_layout_replaces_the_file_instead_of_shrinking_it(tmp_path):
+    path = str(tmp_path / "ring")
+    ArtworkHandoff.HandoffWriter(path, slots=2, slot_bytes=4096).publish("a.png", image=frame("red"), key=KEY)
+    reader = ArtworkHandoff.HandoffReader(path)
+    old = reader.read("a.png")
+    mapped = len(reader.mm)
+
+    smaller = ArtworkHandoff.HandoffWriter(path, slots=1, slot_bytes=1024)
+    assert os.path.getsize(path) < mapped
+    # 讀取端仍映射著舊檔：它的長度不變，最後一個 byte 仍可讀（就地截斷會 SIGBUS）
+    assert len(old.reader.mm) == mapped and old.reader.mm[mapped - 1] == 0
+    assert old.image.getpixel((0, 0)) == (255, 0, 0)
+
+    smaller.publish("b.png", image=frame("blue"), key=KEY)
+    assert reader.read("b.png").image.getpixel((0, 0)) == (0, 0, 255)
+    assert len(reader.mm) == os.path.getsize(path)
+
+
+def test_same_layout_reuses_the_mapped_file(tmp_path):
+    path = str(tmp_path / "ring")
+    ArtworkHandoff.HandoffWriter(path, slots=2, slot_bytes=1024).publish("a.png", image=frame("red"), key=KEY)
+    inode = os.stat(path).st_ino
+    writer = ArtworkHandoff.HandoffWriter(path, slots=2, slot_bytes=1024)
+    assert os.stat(path).st_ino == inode
+    assert writer.publish("b.png", image=frame("blue"), key=KEY) == 2
@@ -0,0 +1,45 @@
+import asyncio
+from types import SimpleNamespace
+import GeminiAudience
+
+
+class FakeModels:
+    def __init__(self, joint):
+        self.joint = joint
+        self.calls = []
+
+    async def generate_content(self, model, contents, config=None):
+        # 只有合併請求帶 response_schema
+        self.calls.append("joint" if config is not None else "single")
+        if config is not None:
+            return self.joint()
+        return SimpleNamespace(text="solo review")
+
+
+def run_joint(monkeypatch, joint):
+    models = FakeModels(joint)
+    saved = []
+    monkeypatch.setattr(GeminiAudience, "client", SimpleNamespace(aio=SimpleNamespace(models=models)))
+    monkeypatch.setattr(GeminiAudience, "review_mode", "joint")
+    monkeypatch.setattr(GeminiAudience, "load_artwork", lambda image_path: "artwork")
+    monkeypatch.setattr(GeminiAudience, "has_already_commented", lambda image_path, filename: False)
+    monkeypatch.setattr(GeminiAudience, "save_audience_response",
+                        lambda text, image_path, filename: saved.append((filename, text)))
+    responses, failed = asyncio.run(GeminiAudience.review_artwork("a.png", GeminiAudience.make_personas(3)))
+    return models.calls, responses, failed, saved
+
+
+def test_failed_joint_request_falls_back_to_separate_requests(monkeypatch):
+    def joint():
+        raise RuntimeError("400 INVALID_ARGUMENT")
+
+    calls, responses, failed, saved = run_joint(monkeypatch, joint)
+    assert calls == ["joint", "single", "single", "single"]
+    assert failed == [] and set(responses.values()) == {"solo review"}
+    assert len(saved) == 3
+
+
+def test_unparsable_joint_answer_falls_back_to_separate_requests(monkeypatch):
+    calls, responses, failed, saved = run_joint(monkeypatch, lambda: SimpleNamespace(text="Sure! Here are the reviews"))
+    assert calls == ["joint", "single", "single", "single"]
+    assert failed == [] and len(responses) == 3
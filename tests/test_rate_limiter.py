@@ -0,0 +1,50 @@
+import asyncio
+import os
+import threading
+import time
+import types
+import pytest
+import GeminiClient
+import RateLimiter
+
+
+def test_acquire_async_waits_for_the_file_lock_off_the_event_loop(tmp_path):
+    fcntl = pytest.importorskip("fcntl")
+    path = str(tmp_path / "ratelimit.state")
+    bucket = RateLimiter.TokenBucket(path, rpm=60, burst=4, reserve=1)
+    # 另一個程序持有狀態檔的鎖（不同的 open file description）
+    other = os.open(path, os.O_RDWR)
+    fcntl.flock(other, fcntl.LOCK_EX)
+    # 若 acquire_async 阻塞了 event loop，這個計時器會放開鎖，讓測試失敗而不是卡住
+    safety = threading.Timer(2, fcntl.flock, (other, fcntl.LOCK_UN))
+    safety.start()
+
+    async def scenario():
+        ticks = 0
+        acquire = asyncio.create_task(bucket.acquire_async())
+        while ticks < 5:
+            await asyncio.sleep(0.01)
+            ticks += 1
+        assert not acquire.done()
+        fcntl.flock(other, fcntl.LOCK_UN)
+        return ticks, await asyncio.wait_for(acquire, 5)
+
+    ticks, waited = asyncio.run(asyncio.wait_for(scenario(), 5))
+    safety.cancel()
+    os.close(other)
+    assert ticks == 5 and waited == 0
+
+
+def test_unconfigured_limiter_never_blocks_or_creates_a_lock_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(RateLimiter, "RATE_LIMIT_RPM", 0.0)
+    monkeypatch.setattr(RateLimiter, "_buckets", {})
+    # live 模式的 genai.Client 換成不等待的假後端，確認沒設定 RPM 時連續請求都不會被限流
+    monkeypatch.setattr(GeminiClient, "genai", types.SimpleNamespace(Client=lambda api_key: GeminiClient.fake_client(0)))
+    client = GeminiClient.create_client("live")
+    start = time.perf_counter()
+    for _ in range(50):
+        client.models.generate_content(model="gemini-1.5-flash", contents="hello")
+    assert time.perf_counter() - start < 1
+    assert not os.path.exists(RateLimiter.RATE_LIMIT_FILE)
+    assert RateLimiter._buckets == {}
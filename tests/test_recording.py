@@ -0,0 +1,48 @@
+import asyncio
+import GeminiClient
+
+IMAGE_MODEL = "gemini-2.0-flash-exp-image-generation"
+
+
+def image_config():
+    return GeminiClient.types.GenerateContentConfig(response_modalities=["TEXT", "IMAGE"])
+
+
+def parts_of(response):
+    parts = GeminiClient._response_parts(response)
+    return [part.text for part in parts if part.text], [part.inline_data.data for part in parts if part.inline_data]
+
+
+def test_record_replay_round_trips_image_parts(tmp_path):
+    folder = str(tmp_path / "recordings")
+    recording = GeminiClient.RecordingClient(
+        GeminiClient.fake_client(latency=0, image_size=(96, 96)), GeminiClient.RecordingStore(folder)
+    )
+    recorded = recording.models.generate_content(model=IMAGE_MODEL, contents="triptych", config=image_config())
+    texts, images = parts_of(recorded)
+    assert images and images[0].startswith(b"\x89PNG")
+
+    pngs = [name for name in (tmp_path / "recordings").iterdir() if name.suffix == ".png"]
+    assert len(pngs) == 1 and pngs[0].read_bytes() == images[0]
+
+    replay = GeminiClient.replay_client(GeminiClient.RecordingStore(folder), latency=0)
+    replayed = replay.models.generate_content(model=IMAGE_MODEL, contents="triptych", config=image_config())
+    assert parts_of(replayed) == (texts, images)
+
+
+def test_record_replay_stream_and_async(tmp_path):
+    folder = str(tmp_path / "recordings")
+    recording = GeminiClient.RecordingClient(
+        GeminiClient.fake_client(latency=0, image_size=(96, 96)), GeminiClient.RecordingStore(folder)
+    )
+    chunks = list(recording.models.generate_content_stream(model=IMAGE_MODEL, contents="stream", config=image_config()))
+    texts, images = parts_of(GeminiClient.merge_stream(chunks))
+
+    replay = GeminiClient.replay_client(GeminiClient.RecordingStore(folder), latency=0)
+
+    async def replay_async():
+        return await replay.aio.models.generate_content(model=IMAGE_MODEL, contents="stream", config=image_config())
+
+    replayed_texts, replayed_images = parts_of(asyncio.run(replay_async()))
+    assert "".join(replayed_texts) == "".join(texts)
+    assert replayed_images == images
@@ -0,0 +1,44 @@
+import threading
+import ExhibitionLog
+import StatementIndex
+
+STATEMENT = "Luminous lattices of recursive light fold into fractal gardens where neural tides hum in silent code"
+
+
+def test_concurrent_workers_cannot_both_reserve_the_same_statement(tmp_path):
+    index = StatementIndex.StatementIndex(str(tmp_path / "exhibition_statement.txt"))
+    barrier = threading.Barrier(4)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(index.reserve(STATEMENT)[0])
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(results) == [False, False, False, True]
+
+
+def test_statement_is_indexed_only_when_committed(tmp_path):
+    index = StatementIndex.StatementIndex(str(tmp_path / "exhibition_statement.txt"))
+    assert index.reserve(STATEMENT)[0]
+    assert len(index) == 0
+    index.release(STATEMENT)
+    assert index.nearest(STATEMENT) == (None, 0.0)
+
+    assert index.reserve(STATEMENT)[0]
+    index.commit(STATEMENT)
+    index.commit(STATEMENT)   # 已寫入的論述不會再寫一次
+    assert len(index) == 1
+    assert index.nearest(STATEMENT)[1] == 1.0
+
+
+def test_backfill_reads_the_log_next_to_the_statement_file(tmp_path):
+    ExhibitionLog.get_log("exhibition_statement", str(tmp_path / ExhibitionLog.LOG_DIR)).append(STATEMENT)
+    index = StatementIndex.StatementIndex(str(tmp_path / "exhibition_statement.txt"))
+    assert len(index) == 1
+    assert index.nearest(STATEMENT)[1] == 1.0
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["exhibition_statement.similarity.sqlite", ExhibitionLog.LOG_DIR]
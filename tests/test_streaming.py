@@ -0,0 +1,104 @@
+import asyncio
+import types
+import pytest
+from google.genai import types as genai_types
+import GeminiAudience
+import GeminiClient
+import GeminiCurator
+import RateLimiter
+
+TEXT = "Luminous Lattice: recursive light folds into fractal gardens."
+
+
+def response(text):
+    return genai_types.GenerateContentResponse(
+        candidates=[genai_types.Candidate(content=genai_types.Content(role="model", parts=[genai_types.Part(text=text)]))]
+    )
+
+
+def chunks():
+    return GeminiClient.split_stream(response(TEXT), chunk_chars=7)
+
+
+class ScriptedModels:
+    """每次 generate_content_stream 依序使用 scripts 中的一個：chunk 清單，或在第 n 個 chunk 之前丟出例外。"""
+
+    def __init__(self, *scripts):
+        self.scripts = list(scripts)
+        self.calls = 0
+
+    def _next(self):
+        self.calls += 1
+        return self.scripts.pop(0)
+
+    def generate_content_stream(self, **kwargs):
+        items, fail_at = self._next()
+        for i, chunk in enumerate(items):
+            if i == fail_at:
+                raise ConnectionError("stream reset")
+            yield chunk
+
+
+class AsyncScriptedModels(ScriptedModels):
+    async def generate_content_stream(self, **kwargs):
+        sync = ScriptedModels.generate_content_stream(self, **kwargs)
+
+        async def stream():
+            for chunk in sync:
+                yield chunk
+
+        return stream()
+
+
+def throttled(models, aio_models=None):
+    client = types.SimpleNamespace(models=models, aio=types.SimpleNamespace(models=aio_models or AsyncScriptedModels()))
+    return GeminiClient.ThrottledClient(client)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(RateLimiter, "RETRY_BASE_DELAY", 0)
+
+
+def test_split_chunks_merge_back_into_the_full_response():
+    parts = chunks()
+    assert len(parts) > 3 and all(len(chunk.text) <= 7 for chunk in parts)
+    assert GeminiClient.merge_stream(parts).text == TEXT
+
+
+def test_curator_concatenates_partial_chunks(monkeypatch):
+    models = ScriptedModels((chunks(), None))
+    monkeypatch.setattr(GeminiCurator, "client", throttled(models))
+    seen = []
+    statement = GeminiCurator.stream_exhibition_statement({"model": "m", "contents": "prompt"}, seen.append)
+    assert statement == TEXT
+    assert seen[-1] == TEXT and all(TEXT.startswith(prefix) for prefix in seen)
+    assert len(seen) == len(chunks())
+
+
+def test_error_before_the_first_chunk_is_retried(monkeypatch):
+    models = ScriptedModels((chunks(), 0), (chunks(), None))
+    monkeypatch.setattr(GeminiCurator, "client", throttled(models))
+    assert GeminiCurator.stream_exhibition_statement({"model": "m", "contents": "prompt"}) == TEXT
+    assert models.calls == 2
+
+
+def test_mid_stream_error_is_raised_without_repeating_text(monkeypatch):
+    # 已經送出部分文字就不能重試，否則畫面上的標題與論述會重複
+    models = ScriptedModels((chunks(), 3), (chunks(), None))
+    monkeypatch.setattr(GeminiCurator, "client", throttled(models))
+    seen = []
+    with pytest.raises(ConnectionError):
+        GeminiCurator.stream_exhibition_statement({"model": "m", "contents": "prompt"}, seen.append)
+    assert models.calls == 1
+    assert seen[-1] == "".join(chunk.text for chunk in chunks()[:3])
+
+
+def test_audience_stream_concatenates_and_surfaces_mid_stream_errors(monkeypatch):
+    persona = GeminiAudience.make_persona(1)
+    aio_models = AsyncScriptedModels((chunks(), None), (chunks(), 2))
+    monkeypatch.setattr(GeminiAudience, "client", throttled(ScriptedModels(), aio_models))
+    assert asyncio.run(GeminiAudience.stream_comment(persona, ["prompt"])) == TEXT
+    with pytest.raises(ConnectionError):
+        asyncio.run(GeminiAudience.stream_comment(persona, ["prompt"]))
+    assert aio_models.calls == 2
@@ -0,0 +1,71 @@
+import asyncio
+import pytest
+import GallerySupervisor
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(GallerySupervisor.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(GallerySupervisor.time, "sleep", clock.sleep)
+    monkeypatch.setattr(GallerySupervisor, "tasks", {})
+    return clock
+
+
+def crashing(clock, runs):
+    """依序執行 runs 中的秒數後崩潰；用完之後正常結束。"""
+    runs = list(runs)
+
+    def run():
+        if not runs:
+            return
+        clock.now += runs.pop(0)
+        raise RuntimeError("boom")
+
+    return run
+
+
+def test_crash_loop_backoff_doubles_up_to_the_cap(clock, monkeypatch):
+    monkeypatch.setattr(GallerySupervisor, "MAX_BACKOFF", 1)
+    restarts = []
+    GallerySupervisor.supervise("curator", crashing(clock, [0] * 6), before_restart=lambda: restarts.append(1))
+    assert clock.sleeps == [0.1, 0.2, 0.4, 0.8, 1, 1]
+    assert len(restarts) == 6
+    assert GallerySupervisor.tasks["curator"].restarts == 6
+
+
+def test_backoff_resets_after_a_stable_run(clock):
+    stable = GallerySupervisor.STABLE_SECONDS
+    GallerySupervisor.supervise("curator", crashing(clock, [0, 0, 0, stable, 0]))
+    assert clock.sleeps == [0.1, 0.2, 0.4, 0.1, 0.2]
+
+
+def test_async_task_is_restarted_in_the_same_loop(clock, monkeypatch):
+    delays = []
+
+    async def sleep(seconds):
+        delays.append(seconds)
+
+    monkeypatch.setattr(GallerySupervisor.asyncio, "sleep", sleep)
+    failures = [RuntimeError("boom")] * 3
+
+    async def run():
+        if failures:
+            raise failures.pop()
+
+    asyncio.run(GallerySupervisor.supervise_async("audiences", run))
+    assert delays == [0.1, 0.2, 0.4]
+    assert GallerySupervisor.tasks["audiences"].last_error == repr(RuntimeError("boom"))
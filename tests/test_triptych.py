@@ -0,0 +1,30 @@
+from io import BytesIO
+from PIL import Image
+import Triptych
+
+
+def png(image):
+    buffer = BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_seamlessly_connected_triptych_passes_by_default():
+    # 左右連續的漸層：沒有明顯接縫，正是 prompt 要求的「seamlessly connected」
+    gradient = Image.linear_gradient("L").rotate(90).resize((768, 256)).convert("RGB")
+    image = Triptych.decode(png(gradient))
+    array, panels = Triptych.split(image)
+    assert Triptych.check(image.size, array, panels)["problems"] == []
+
+
+def test_blank_panel_is_still_rejected():
+    image = Triptych.decode(png(Image.new("RGB", (768, 256), "white")))
+    array, panels = Triptych.split(image)
+    assert Triptych.check(image.size, array, panels)["problems"] == ["blank panel [1, 2, 3]"]
+
+
+def test_last_panel_keeps_the_leftover_columns():
+    image = Triptych.decode(png(Image.linear_gradient("L").rotate(90).resize((770, 256)).convert("RGB")))
+    array, panels = Triptych.split(image)
+    assert [panel.shape[1] for panel in panels] == [256, 256, 258]
+    assert sum(panel.shape[1] for panel in panels) == array.shape[1] == 770
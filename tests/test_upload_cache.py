@@ -0,0 +1,59 @@
+import os
+import pytest
+from PIL import Image
+import UploadCache
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(UploadCache, "CACHE_DIR", str(tmp_path / "cache"))
+    return tmp_path / "cache"
+
+
+def image():
+    return Image.new("RGB", (64, 32), "gray")
+
+
+def test_eviction_removes_the_least_recently_used_derivative(cache, monkeypatch):
+    data, _, hit = UploadCache.get_or_create("a" * 64, image)
+    assert not hit
+    monkeypatch.setattr(UploadCache, "UPLOAD_CACHE_BYTES", int(len(data) * 2.5))
+    UploadCache.get_or_create("b" * 64, image)
+    os.utime(UploadCache._cache_path("a" * 64), (100, 100))
+    os.utime(UploadCache._cache_path("b" * 64), (200, 200))
+
+    assert UploadCache.get_or_create("a" * 64, image)[2]   # 命中會更新最近使用時間，a 變成最新
+    UploadCache.get_or_create("c" * 64, image)
+    assert sorted(name[0] for name in os.listdir(cache)) == ["a", "c"]
+
+
+def test_derivative_is_not_cached_when_the_source_changed_meanwhile(cache):
+    opened = []
+
+    def open_image():
+        opened.append(1)
+        return image()
+
+    assert UploadCache.get_or_create("d" * 64, open_image, still_valid=lambda: False) is None
+    assert not os.path.exists(UploadCache._cache_path("d" * 64))
+
+    data, _, hit = UploadCache.get_or_create("d" * 64, open_image, still_valid=lambda: True)
+    assert not hit and os.path.exists(UploadCache._cache_path("d" * 64))
+    assert UploadCache.get_or_create("d" * 64, open_image) == (data, UploadCache.FORMATS[UploadCache.UPLOAD_FORMAT][1], True)
+    assert len(opened) == 2
+
+
+def test_file_key_memo_keeps_the_most_recent_paths(tmp_path, monkeypatch):
+    monkeypatch.setattr(UploadCache, "DIGEST_MEMO", 2)
+    monkeypatch.setattr(UploadCache, "_digests", UploadCache.OrderedDict())
+    paths = []
+    for name in "xyz":
+        path = tmp_path / f"{name}.png"
+        path.write_bytes(name.encode())
+        paths.append(str(path))
+    x, y, z = paths
+    UploadCache.file_key(x)
+    UploadCache.file_key(y)
+    UploadCache.file_key(x)
+    assert UploadCache.file_key(z) == UploadCache.bytes_key(b"z")
+    assert list(UploadCache._digests) == [x, z]